@@ -0,0 +1,143 @@
+"""Background loading and readiness tracking for the API's heavy components."""
+
+from __future__ import annotations
+
+import importlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+
+class ComponentUnavailable(RuntimeError):
+    """Raised when a component is requested before it finished loading."""
+
+
+Factory = Union[Callable[[], Any], str]
+
+
+def _resolve(factory: Factory) -> Callable[[], Any]:
+    """Import a ``"module:attribute"`` factory, so heavy modules load with the component."""
+    if not isinstance(factory, str):
+        return factory
+    module_name, _, attribute = factory.partition(":")
+    return getattr(importlib.import_module(module_name), attribute)
+
+
+@dataclass
+class Component:
+    name: str
+    factory: Factory
+    state: str = PENDING
+    value: Any = None
+    load_ms: Optional[float] = None
+    error: Optional[str] = None
+    attempts: int = 0
+
+    def status(self) -> Dict[str, Any]:
+        status: Dict[str, Any] = {"state": self.state, "load_ms": self.load_ms, "attempts": self.attempts}
+        if self.error:
+            status["error"] = self.error
+        return status
+
+
+class ComponentRegistry:
+    """Builds registered components in order, off the request path.
+
+    Factories run sequentially on a daemon thread so the event loop keeps
+    answering probes while models load; a factory may :meth:`get` any
+    component registered before it. A failed component (and any that depend
+    on it) makes the registry not ready; failed components are retried in
+    registration order every ``retry_interval`` seconds, doubling up to
+    ``max_retry_interval``, so e.g. an index or Qdrant that shows up after
+    the pod started is picked up without a restart. ``retry_interval=0``
+    disables retries.
+    """
+
+    def __init__(self, retry_interval: float = 0.0, max_retry_interval: float = 300.0) -> None:
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self._components: Dict[str, Component] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def register(self, name: str, factory: Factory) -> None:
+        self._components[name] = Component(name, factory)
+
+    def _load(self, component: Component) -> None:
+        with self._lock:
+            component.state = LOADING
+            component.attempts += 1
+        start = time.perf_counter()
+        try:
+            value = _resolve(component.factory)()
+        except Exception as exc:
+            logger.error("Loading %s failed (attempt %s): %s", component.name, component.attempts, exc)
+            with self._lock:
+                component.state = FAILED
+                component.error = str(exc) or type(exc).__name__
+                component.load_ms = round((time.perf_counter() - start) * 1000.0, 3)
+            return
+        with self._lock:
+            component.value = value
+            component.state = READY
+            component.error = None
+            component.load_ms = round((time.perf_counter() - start) * 1000.0, 3)
+        logger.info("Loaded %s in %.0f ms", component.name, component.load_ms)
+
+    def _failed(self) -> List[Component]:
+        with self._lock:
+            return [component for component in self._components.values() if component.state == FAILED]
+
+    def load_all(self) -> None:
+        for component in list(self._components.values()):
+            self._load(component)
+        delay = self.retry_interval
+        while delay > 0 and self._failed():
+            if self._stop.wait(delay):
+                return
+            for component in self._failed():
+                self._load(component)
+            delay = min(delay * 2, self.max_retry_interval)
+
+    def start(self) -> None:
+        """Load every component on a background thread (idempotent)."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.load_all, name="component-loader", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop retrying failed components."""
+        self._stop.set()
+
+    def get(self, name: str) -> Any:
+        with self._lock:
+            component = self._components[name]
+            if component.state == FAILED:
+                raise ComponentUnavailable(f"{name} failed to load: {component.error}")
+            if component.state != READY:
+                raise ComponentUnavailable(f"{name} is still {component.state}")
+            return component.value
+
+    @property
+    def state(self) -> str:
+        """``ready`` once everything loaded, ``failed`` if anything failed, else ``loading``."""
+        with self._lock:
+            states = {component.state for component in self._components.values()}
+        if states <= {READY}:
+            return READY
+        return FAILED if FAILED in states else LOADING
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: component.status() for name, component in self._components.items()}
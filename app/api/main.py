@@ -2,42 +2,123 @@
 
 from __future__ import annotations
 
+import json
 import logging
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Any, AsyncIterator, List
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 
+from app.api.components import READY, ComponentRegistry, ComponentUnavailable
 from app.config import settings
-from app.llm.answer_generator import AnswerGenerator
-from app.models.qa import QARequest, QAResponse
-from app.models.retrieval import RetrievalRequest, RetrievalResponse
+from app.models.qa import BatchQARequest, QARequest, QAResponse
+from app.models.retrieval import EvidenceBlock, RetrievalRequest, RetrievalResponse
+from app.retrieval.errors import RetrievalUnavailable
 from app.retrieval.evidence import build_evidence_blocks
-from app.retrieval.hybrid_retriever import HybridRetriever
-from app.retrieval.reranker import Reranker
+from app.retrieval.index_watcher import IndexWatcher
+from app.utils.metrics import render_prometheus
+from app.utils.tracing import collect_timings
+
+if TYPE_CHECKING:
+    from app.llm.answer_generator import AnswerGenerator
+    from app.retrieval.hybrid_retriever import HybridRetriever
+    from app.retrieval.reranker import Reranker
 
 logger = logging.getLogger(__name__)
 
+WARMUP_QUESTION = "What is the recommended first-line therapy for heart failure with reduced ejection fraction?"
+
+components = ComponentRegistry(retry_interval=settings.component_retry_seconds)
+
+
+def _start_index_watcher() -> IndexWatcher:
+    watcher = IndexWatcher(components.get("retriever"))
+    watcher.start()
+    return watcher
+
+
+def _warmup() -> None:
+    """Run one synthetic query end to end so the first real request skips lazy setup."""
+    retriever: HybridRetriever = components.get("retriever")
+    reranker: Reranker = components.get("reranker")
+    candidates = retriever.retrieve(WARMUP_QUESTION)
+    build_evidence_blocks(reranker.rerank(WARMUP_QUESTION, candidates, top_k=10))
+
+
+# Heavy modules (Qdrant, Tantivy, FlagEmbedding, OpenAI) are imported by the loader, not here.
+components.register("retriever", "app.retrieval.hybrid_retriever:HybridRetriever")
+components.register("embedder", "app.retrieval.embedder:get_bge_m3_embedder")
+components.register("reranker", "app.retrieval.reranker:Reranker")
+components.register("answer_generator", "app.llm.answer_generator:AnswerGenerator")
+components.register("index_watcher", _start_index_watcher)
+if settings.startup_warmup:
+    components.register("warmup", _warmup)
+
+
+def _component(name: str) -> Any:
+    try:
+        return components.get(name)
+    except ComponentUnavailable as exc:
+        raise HTTPException(status_code=503, detail=f"Service unavailable: {exc}") from exc
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Load models and indexes in the background so probes answer immediately."""
+    components.start()
+    try:
+        yield
+    finally:
+        components.stop()
+        try:
+            components.get("index_watcher").stop()
+        except ComponentUnavailable:
+            pass
+
+
 app = FastAPI(
     title="MedAgenticSystem",
     description="Heart disease guideline RAG API",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
-retriever = HybridRetriever()
-reranker = Reranker()
-answer_generator = AnswerGenerator()
+
+@app.exception_handler(RetrievalUnavailable)
+async def retrieval_unavailable(_request: Request, exc: RetrievalUnavailable) -> JSONResponse:
+    """Every retrieval leg failed: a transient backend outage, not a server bug."""
+    logger.error("Retrieval unavailable: %s", exc)
+    return JSONResponse(status_code=503, content={"detail": "Service unavailable: no retrieval backend answered"})
 
 
 @app.get("/health")
 def health() -> dict[str, str]:
-    """Simple readiness probe."""
+    """Liveness probe; answers as soon as the process serves requests."""
     return {"status": "ok"}
 
 
-@app.post("/ask", response_model=QAResponse)
-async def ask(payload: QARequest) -> QAResponse:
-    """Answer a clinician question using guideline evidence."""
-    candidates = retriever.retrieve(payload.question)
-    reranked = reranker.rerank(payload.question, candidates, top_k=10)
+@app.get("/ready")
+def ready() -> JSONResponse:
+    """Readiness probe: 200 once every component loaded, else 503 with per-component state."""
+    state = components.state
+    return JSONResponse(
+        {"status": state, "components": components.status()},
+        status_code=200 if state == READY else 503,
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics() -> PlainTextResponse:
+    """Expose in-process metrics in the Prometheus text format."""
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+async def _answer_evidences(question: str) -> List[EvidenceBlock]:
+    retriever: HybridRetriever = _component("retriever")
+    reranker: Reranker = _component("reranker")
+    candidates = await retriever.aretrieve(question)
+    reranked = await reranker.arerank(question, candidates, top_k=10)
     if not reranked:
         raise HTTPException(status_code=404, detail="No relevant guideline evidence found.")
 
@@ -47,25 +128,92 @@ async def ask(payload: QARequest) -> QAResponse:
             status_code=404,
             detail="Unable to assemble evidence blocks from retrieved chunks.",
         )
+    return evidences
 
-    try:
-        answer = answer_generator.generate(payload.question, evidences)
-    except Exception as exc:  # pragma: no cover - defensive
-        logger.error("LLM generation failed: %s", exc)
-        raise HTTPException(status_code=500, detail="Answer generation failed.") from exc
 
-    return QAResponse(answer=answer, evidences=evidences)
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/ask", response_model=QAResponse)
+async def ask(payload: QARequest) -> QAResponse:
+    """Answer a clinician question using guideline evidence."""
+    answer_generator: AnswerGenerator = _component("answer_generator")
+    with collect_timings() as timings:
+        evidences = await _answer_evidences(payload.question)
+        try:
+            answer = await answer_generator.agenerate(payload.question, evidences)
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.error("LLM generation failed: %s", exc)
+            raise HTTPException(status_code=500, detail="Answer generation failed.") from exc
+
+    return QAResponse(
+        answer=answer, evidences=evidences, timings=timings if payload.include_timings else None
+    )
+
+
+@app.post("/ask/stream")
+async def ask_stream(payload: QARequest) -> StreamingResponse:
+    """Stream evidence blocks, then answer tokens, as Server-Sent Events.
+
+    Events: ``evidence`` (list of blocks, sent right after reranking),
+    ``token`` (``{"delta": ...}`` per generated piece), then ``done`` with the
+    full answer, or ``error`` if generation fails mid-stream.
+    """
+    answer_generator: AnswerGenerator = _component("answer_generator")
+    evidences = await _answer_evidences(payload.question)
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("evidence", [block.model_dump() for block in evidences])
+        parts: List[str] = []
+        try:
+            async for delta in answer_generator.astream(payload.question, evidences):
+                parts.append(delta)
+                yield _sse("token", {"delta": delta})
+        except Exception as exc:  # pragma: no cover - defensive
+            logger.error("LLM streaming failed: %s", exc)
+            yield _sse("error", {"detail": "Answer generation failed."})
+            return
+        yield _sse("done", {"answer": "".join(parts).strip()})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/ask/batch")
+async def ask_batch(payload: BatchQARequest) -> StreamingResponse:
+    """Answer many questions, streaming one JSON line per question as it completes."""
+    retriever: HybridRetriever = _component("retriever")
+    reranker: Reranker = _component("reranker")
+    answer_generator: AnswerGenerator = _component("answer_generator")
+    from app.eval.batch_ask import answer_batch
+
+    async def lines() -> AsyncIterator[str]:
+        async for result in answer_batch(payload.questions, retriever, reranker, answer_generator):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
 
 
 @app.post("/retrieve", response_model=RetrievalResponse)
 async def retrieve(payload: RetrievalRequest) -> RetrievalResponse:
     """Return retrieved evidence blocks without calling the LLM."""
-    candidates = retriever.retrieve(
-        payload.question,
-        top_k_sparse=payload.top_k_sparse,
-        top_k_dense=payload.top_k_dense,
-        top_k_final=payload.top_k_final,
+    retriever: HybridRetriever = _component("retriever")
+    reranker: Reranker = _component("reranker")
+    with collect_timings() as timings:
+        candidates = await retriever.aretrieve(
+            payload.question,
+            top_k_sparse=payload.top_k_sparse,
+            top_k_dense=payload.top_k_dense,
+            top_k_final=payload.top_k_final,
+        )
+        reranked = await reranker.arerank(payload.question, candidates, top_k=10)
+        evidences = build_evidence_blocks(reranked)
+    return RetrievalResponse(
+        question=payload.question,
+        evidences=evidences,
+        timings=timings if payload.include_timings else None,
     )
-    reranked = reranker.rerank(payload.question, candidates, top_k=10)
-    evidences = build_evidence_blocks(reranked)
-    return RetrievalResponse(question=payload.question, evidences=evidences)
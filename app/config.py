@@ -19,11 +19,35 @@ class Settings(BaseSettings):
     qdrant_url: str = "http://localhost:6333"
     qdrant_api_key: Optional[str] = None
     qdrant_collection: str = "guideline_chunks_en"
+    vector_backend: str = "qdrant"
+    vector_quantization: str = "none"
+    quantization_oversampling: float = 3.0
+    quantization_rescore: bool = True
+    lexical_retrieval: bool = False
+    lexical_index_dir: str = "data/lexical_index"
+    local_index_dir: str = "data/local_index"
+    local_index_ann_threshold: int = 200_000
+    local_index_hnsw_ef: int = 128
 
     guideline_root: str = "data/raw/english_guidelines"
     parsed_docs_path: str = "data/parsed/english_docs.jsonl"
     chunks_path: str = "data/chunks/english_chunks.jsonl"
+    chunk_store_path: str = "data/chunks/english_chunks.sqlite"
     bm25_index_dir: str = "data/bm25_index"
+    index_version_path: str = "data/index_version.json"
+    manifest_path: str = "data/manifest.json"
+    ingest_incremental: bool = True
+    embedding_store_dir: Optional[str] = "data/embeddings"
+    embedding_store_dtype: str = "float16"
+    index_batch_max_tokens: int = 16_384
+    index_batch_max_size: int = 64
+    index_upsert_concurrency: int = 4
+    index_consistency_timeout: float = 120.0
+    index_reload_interval: float = 5.0
+    index_keep_versions: int = 2
+
+    parse_workers: int = 0
+    parse_pages_per_task: int = 32
 
     chunk_target_tokens: int = 320
     chunk_max_tokens: int = 420
@@ -31,7 +55,32 @@ class Settings(BaseSettings):
     max_evidence_blocks: int = 6
     max_evidence_tokens: int = 3000
 
+    rrf_k: int = 50
+    retrieval_parallel: bool = True
+    retrieval_workers: int = 8
+    retrieval_sparse_timeout: float = 2.0
+    retrieval_dense_timeout: float = 10.0
+    cpu_executor_workers: int = 4
+    query_batch_window_ms: float = 8.0
+    query_batch_max_size: int = 32
+    query_cache_size: int = 2048
+    query_cache_path: Optional[str] = "data/cache/query_embeddings.sqlite"
+    query_cache_disk_max_entries: int = 100_000
+    rerank_batch_window_ms: float = 5.0
+    rerank_batch_max_pairs: int = 128
+    rerank_batch_size: int = 32
+    rerank_cache_size: int = 20_000
+    batch_group_size: int = 32
+    batch_llm_concurrency: int = 8
+    batch_max_questions: int = 1000
+    answer_cache_ttl_seconds: float = 3600.0
+    answer_cache_max_bytes: int = 32 * 1024 * 1024
+
+    startup_warmup: bool = False
+    component_retry_seconds: float = 5.0
+
     log_level: str = "INFO"
+    otel_tracing: bool = False
     medical_disclaimer: str = (
         "This information is for educational purposes only and is not a substitute "
         "for professional medical advice. Always consult qualified clinicians"
@@ -1 +1 @@
-"""Placeholder for future evaluation scripts."""
+"""Evaluation, benchmarking and batch scripts."""
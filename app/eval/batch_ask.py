@@ -0,0 +1,163 @@
+"""Answer many questions at once with shared embedding and reranking batches."""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, TextIO
+
+from app.config import settings
+from app.eval.questions import read_questions
+from app.llm.answer_generator import AnswerGenerator
+from app.models.qa import BatchQAResult
+from app.models.retrieval import RetrievedChunk
+from app.retrieval.evidence import build_evidence_blocks
+from app.retrieval.hybrid_retriever import HybridRetriever
+from app.retrieval.reranker import Reranker
+
+logger = logging.getLogger(__name__)
+
+RERANK_TOP_K = 10
+
+
+async def _answer_one(
+    index: int,
+    question: str,
+    reranked: List[RetrievedChunk],
+    generator: Optional[AnswerGenerator],
+    semaphore: asyncio.Semaphore,
+) -> BatchQAResult:
+    evidences = build_evidence_blocks(reranked)
+    if not evidences:
+        return BatchQAResult(
+            index=index, question=question, error="No relevant guideline evidence found."
+        )
+    if generator is None:
+        return BatchQAResult(index=index, question=question, evidences=evidences)
+    async with semaphore:
+        try:
+            answer = await generator.agenerate(question, evidences)
+        except Exception as exc:
+            logger.error("LLM generation failed for question %s: %s", index, exc)
+            return BatchQAResult(
+                index=index, question=question, evidences=evidences, error="Answer generation failed."
+            )
+    return BatchQAResult(index=index, question=question, answer=answer, evidences=evidences)
+
+
+async def answer_batch(
+    questions: List[str],
+    retriever: HybridRetriever,
+    reranker: Reranker,
+    generator: Optional[AnswerGenerator],
+    group_size: Optional[int] = None,
+    concurrency: Optional[int] = None,
+) -> AsyncIterator[BatchQAResult]:
+    """Yield one result per question, in completion order.
+
+    Questions are processed in groups: each group is embedded in a single
+    ``encode_queries`` call, searched with one Qdrant batch query and reranked
+    in shared batches. LLM calls for a group start as soon as its evidence is
+    ready and run with at most ``concurrency`` in flight, overlapping with
+    retrieval of the next group. Pass ``generator=None`` to skip the LLM.
+    """
+    group_size = max(group_size or settings.batch_group_size, 1)
+    semaphore = asyncio.Semaphore(max(concurrency or settings.batch_llm_concurrency, 1))
+    results: "asyncio.Queue[Optional[BatchQAResult]]" = asyncio.Queue()
+    pending: List[asyncio.Task] = []
+
+    async def emit(index: int, question: str, reranked: List[RetrievedChunk]) -> None:
+        try:
+            result = await _answer_one(index, question, reranked, generator, semaphore)
+        except Exception as exc:
+            logger.error("Batch question %s failed: %s", index, exc)
+            result = BatchQAResult(index=index, question=question, error=str(exc))
+        await results.put(result)
+
+    async def produce() -> None:
+        try:
+            await produce_groups()
+        finally:
+            # Let in-flight answers land, then wake the consumer even if a group raised.
+            await asyncio.gather(*pending, return_exceptions=True)
+            results.put_nowait(None)
+
+    async def produce_groups() -> None:
+        for start in range(0, len(questions), group_size):
+            group = questions[start : start + group_size]
+            try:
+                candidate_lists = await retriever.aretrieve_batch(group)
+                reranked_lists = await reranker.arerank_batch(group, candidate_lists, top_k=RERANK_TOP_K)
+            except Exception as exc:
+                logger.error("Retrieval failed for questions %s-%s: %s", start, start + len(group) - 1, exc)
+                for offset, question in enumerate(group):
+                    await results.put(
+                        BatchQAResult(index=start + offset, question=question, error="Retrieval failed.")
+                    )
+                continue
+            for offset, (question, reranked) in enumerate(zip(group, reranked_lists)):
+                pending.append(asyncio.create_task(emit(start + offset, question, reranked)))
+
+    producer = asyncio.create_task(produce())
+    try:
+        while (result := await results.get()) is not None:
+            yield result
+        await producer
+    finally:
+        producer.cancel()
+        for task in pending:
+            task.cancel()
+
+
+async def _run(
+    questions: List[str],
+    output: TextIO,
+    retrieve_only: bool,
+    group_size: Optional[int],
+    concurrency: Optional[int],
+) -> int:
+    retriever = HybridRetriever()
+    reranker = Reranker()
+    generator = None if retrieve_only else AnswerGenerator()
+    count = 0
+    async for result in answer_batch(
+        questions, retriever, reranker, generator, group_size=group_size, concurrency=concurrency
+    ):
+        output.write(result.model_dump_json() + "\n")
+        output.flush()
+        count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Answer a JSONL file of questions.")
+    parser.add_argument("input", type=Path, help='JSONL file with one {"question": ...} per line.')
+    parser.add_argument("-o", "--output", type=Path, help="Output JSONL path (default: stdout).")
+    parser.add_argument("--group-size", type=int, default=None, help="Questions per retrieval batch.")
+    parser.add_argument("--concurrency", type=int, default=None, help="Max in-flight LLM calls.")
+    parser.add_argument(
+        "--retrieve-only", action="store_true", help="Return evidence blocks without calling the LLM."
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.log_level)
+    questions = list(read_questions(args.input))
+    logger.info("Loaded %s questions from %s", len(questions), args.input)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("w", encoding="utf-8") as handle:
+            total = asyncio.run(
+                _run(questions, handle, args.retrieve_only, args.group_size, args.concurrency)
+            )
+    else:
+        total = asyncio.run(
+            _run(questions, sys.stdout, args.retrieve_only, args.group_size, args.concurrency)
+        )
+    logger.info("Wrote %s batch results", total)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""Microbenchmark the BM25 leg: the original full-document decode vs. the lean chunk_id path.
+
+The baseline reproduces the pre-slimming index (every chunk field stored)
+and its ``search``, which rebuilt a full :class:`RetrievedChunk` from the
+stored fields of every hit. It is built from the chunk file into a temporary
+directory, so both paths score the same corpus. tantivy-py has no per-hit
+fast-field getter, so the lean path still reads the stored ``chunk_id`` (once
+per doc address); ``lean_hydrated`` adds the chunk store lookup needed to get
+back to full chunks.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import tantivy
+
+from app.config import settings
+from app.eval.questions import DEFAULT_QUESTIONS, read_questions
+from app.ingestion.index_bm25 import load_chunks
+from app.models.chunk import Chunk
+from app.models.retrieval import RetrievedChunk
+from app.retrieval.bm25_store import BM25Store, parse_query
+from app.retrieval.chunk_store import ChunkStore
+
+logger = logging.getLogger(__name__)
+
+BASELINE_FIELDS = [
+    "chunk_id", "guideline_id", "guideline_title", "section_id", "section_title", "organization",
+    "year", "text", "lang", "page_range", "rec_classes", "loe_list",
+]
+
+
+class BaselineBM25:
+    """The stored-everything index and decode that BM25Store replaced."""
+
+    def __init__(self, directory: Path, chunks: Iterable[Chunk]) -> None:
+        builder = tantivy.SchemaBuilder()
+        for name in BASELINE_FIELDS:
+            builder.add_text_field(name, stored=True)
+        self.index = tantivy.Index(builder.build(), path=str(directory), reuse=False)
+        writer = self.index.writer()
+        for chunk in chunks:
+            document = tantivy.Document()
+            document.add_text("chunk_id", chunk.chunk_id)
+            document.add_text("guideline_id", chunk.guideline_id)
+            document.add_text("guideline_title", chunk.guideline_title)
+            if chunk.section_id:
+                document.add_text("section_id", chunk.section_id)
+            if chunk.section_title:
+                document.add_text("section_title", chunk.section_title)
+            if chunk.organization:
+                document.add_text("organization", chunk.organization)
+            if chunk.year:
+                document.add_text("year", str(chunk.year))
+            document.add_text("text", chunk.text)
+            document.add_text("lang", chunk.lang)
+            if chunk.page_range:
+                document.add_text("page_range", f"{chunk.page_range[0]}-{chunk.page_range[1]}")
+            if chunk.rec_class_list:
+                document.add_text("rec_classes", ";".join(chunk.rec_class_list))
+            if chunk.loe_list:
+                document.add_text("loe_list", ";".join(chunk.loe_list))
+            writer.add_document(document)
+        writer.commit()
+        writer.wait_merging_threads()
+        self.index.reload()
+        self.searcher = self.index.searcher()
+
+    def search(self, question: str, top_k: int) -> List[RetrievedChunk]:
+        # Parsed against this index's schema: field ordinals differ from the lean index.
+        query = parse_query(self.index, question)
+        retrieved: List[RetrievedChunk] = []
+        for score, doc_addr in self.searcher.search(query, limit=top_k).hits:
+            fields = self.searcher.doc(doc_addr).to_dict()
+
+            def first(key: str, default: str = "") -> str:
+                return (fields.get(key) or [default])[0]
+
+            page_range = None
+            parts = first("page_range").split("-")
+            if len(parts) == 2:
+                page_range = (int(parts[0]), int(parts[1]))
+            retrieved.append(
+                RetrievedChunk(
+                    chunk_id=first("chunk_id"),
+                    guideline_id=first("guideline_id"),
+                    guideline_title=first("guideline_title"),
+                    section_id=first("section_id") or None,
+                    section_title=first("section_title") or None,
+                    organization=first("organization") or None,
+                    year=int(first("year")) if first("year") else None,
+                    text=first("text"),
+                    lang=first("lang", "en"),
+                    page_range=page_range,
+                    rec_class_list=[item.strip() for item in first("rec_classes").split(";") if item.strip()],
+                    loe_list=[item.strip() for item in first("loe_list").split(";") if item.strip()],
+                    sparse_score=float(score),
+                    metadata={},
+                )
+            )
+        return retrieved
+
+
+def decode_lean(store: BM25Store, question: str, top_k: int) -> List[str]:
+    return [hit.chunk_id for hit in store.search(question, top_k=top_k)]
+
+
+def decode_cold(store: BM25Store, question: str, top_k: int) -> List[str]:
+    store._chunk_ids.clear()
+    return decode_lean(store, question, top_k)
+
+
+def time_path(
+    decode: Callable[[BM25Store, str, int], List[str]],
+    store: BM25Store,
+    questions: List[str],
+    top_k: int,
+    repeat: int,
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    for _ in range(repeat):
+        for question in questions:
+            start = time.perf_counter()
+            decode(store, question, top_k)
+            latencies.append((time.perf_counter() - start) * 1000.0)
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+        "mean_ms": round(float(np.mean(latencies)), 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark BM25 hit decoding against the original stored-field path.")
+    parser.add_argument("--index-dir", type=Path, default=None, help="BM25 index (default: BM25_INDEX_DIR).")
+    parser.add_argument("--chunks", type=Path, default=None, help="Chunk JSONL for the baseline index (default: CHUNKS_PATH).")
+    parser.add_argument("--questions", type=Path, help='JSONL with {"question": ...} rows.')
+    parser.add_argument("--top-k", type=int, nargs="+", default=[32, 128, 512])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("-o", "--output", type=Path, help="Write results as JSON.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.log_level)
+    store = BM25Store(args.index_dir)
+    chunk_store = ChunkStore()
+    questions = list(read_questions(args.questions)) if args.questions else DEFAULT_QUESTIONS
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bm25-baseline-") as tmp:
+        baseline = BaselineBM25(Path(tmp), load_chunks(args.chunks or settings.chunks_path_obj))
+        logger.info("Built baseline index over %s chunks", baseline.searcher.num_docs)
+
+        def decode_baseline(_store: BM25Store, question: str, top_k: int) -> List[str]:
+            return [chunk.chunk_id for chunk in baseline.search(question, top_k)]
+
+        def decode_hydrated(_store: BM25Store, question: str, top_k: int) -> List[str]:
+            chunk_ids = decode_lean(store, question, top_k)
+            chunk_store.get_many(chunk_ids)
+            return chunk_ids
+
+        paths: Dict[str, Callable[[BM25Store, str, int], List[str]]] = {
+            "baseline_full_decode": decode_baseline,
+            "lean_cold": decode_cold,
+            "lean_warm": decode_lean,
+            "lean_hydrated": decode_hydrated,
+        }
+        for top_k in args.top_k:
+            decode_lean(store, questions[0], top_k)
+            # Both indexes score the same corpus and query, so their hits should agree.
+            agreement = float(np.mean([
+                decode_baseline(store, question, top_k) == decode_lean(store, question, top_k)
+                for question in questions
+            ]))
+            if agreement < 1.0:
+                logger.warning("Baseline and lean hits differ for %.0f%% of questions at top_k=%s", (1 - agreement) * 100, top_k)
+            for name, decode in paths.items():
+                row = {"top_k": top_k, "path": name, **time_path(decode, store, questions, top_k, args.repeat)}
+                if name == "baseline_full_decode":
+                    row["same_hits"] = round(agreement, 3)
+                results.append(row)
+                print(json.dumps(row))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("w", encoding="utf-8") as handle:
+            json.dump(results, handle, indent=2)
+
+
+if __name__ == "__main__":
+    main()
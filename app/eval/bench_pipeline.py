@@ -0,0 +1,241 @@
+"""Replay a question set through the full /ask pipeline and report per-stage latency.
+
+Stages are timed around ``HybridRetriever.retrieve``, ``Reranker.rerank``,
+``build_evidence_blocks`` and ``AnswerGenerator.generate``; the LLM is a local
+stub with a configurable delay, so the numbers measure this service only.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.eval.batch_ask import RERANK_TOP_K
+from app.eval.questions import DEFAULT_QUESTIONS, read_questions
+from app.retrieval.evidence import build_evidence_blocks
+
+logger = logging.getLogger(__name__)
+
+STAGES = ["retrieve", "rerank", "evidence", "generate", "total"]
+
+
+class StubChatClient:
+    """Stands in for :class:`OpenAIChatClient`: sleeps, then returns a canned answer."""
+
+    model = "stub"
+    ANSWER = "Stub answer based on the supplied guideline evidence [Doc 1]."
+
+    def __init__(self, latency_ms: float = 0.0) -> None:
+        self.latency = max(latency_ms, 0.0) / 1000.0
+
+    def complete(self, system_prompt: str, user_prompt: str, **_kwargs: Any) -> str:
+        time.sleep(self.latency)
+        return self.ANSWER
+
+    async def acomplete(self, system_prompt: str, user_prompt: str, **_kwargs: Any) -> str:
+        await asyncio.sleep(self.latency)
+        return self.ANSWER
+
+    async def astream(self, system_prompt: str, user_prompt: str, **kwargs: Any) -> AsyncIterator[str]:
+        yield await self.acomplete(system_prompt, user_prompt, **kwargs)
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (``ru_maxrss`` is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)
+
+
+def git_commit() -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=5
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {"count": 0}
+    return {
+        "count": len(samples),
+        "mean_ms": round(float(np.mean(samples)), 3),
+        "p50_ms": round(float(np.percentile(samples, 50)), 3),
+        "p95_ms": round(float(np.percentile(samples, 95)), 3),
+        "p99_ms": round(float(np.percentile(samples, 99)), 3),
+    }
+
+
+class PipelineBench:
+    """Runs each question through retrieve → rerank → evidence → generate and records stage timings."""
+
+    def __init__(self, retriever, reranker, generator, top_k_final: int = 20) -> None:
+        self.retriever = retriever
+        self.reranker = reranker
+        self.generator = generator
+        self.top_k_final = top_k_final
+        self.samples: Dict[str, List[float]] = {}
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def _record(self, timings: Dict[str, float]) -> None:
+        with self._lock:
+            for stage, value in timings.items():
+                self.samples.setdefault(stage, []).append(value)
+
+    def run_one(self, question: str) -> Dict[str, float]:
+        timings: Dict[str, float] = {}
+        start = time.perf_counter()
+        candidates = self.retriever.retrieve(question, top_k_final=self.top_k_final)
+        timings["retrieve"] = (time.perf_counter() - start) * 1000.0
+        if candidates:
+            # Sub-stage timings the retriever already records (embed_ms, sparse_ms, hydrate_ms, ...).
+            for key, value in candidates[0].metadata.get("retrieval_timings", {}).items():
+                if key.endswith("_ms") and key != "retrieve_ms":
+                    timings[f"retrieve.{key[:-3]}"] = value
+        mark = time.perf_counter()
+        reranked = self.reranker.rerank(question, candidates, top_k=RERANK_TOP_K)
+        timings["rerank"] = (time.perf_counter() - mark) * 1000.0
+        mark = time.perf_counter()
+        evidences = build_evidence_blocks(reranked)
+        timings["evidence"] = (time.perf_counter() - mark) * 1000.0
+        mark = time.perf_counter()
+        if evidences:
+            self.generator.generate(question, evidences)
+        timings["generate"] = (time.perf_counter() - mark) * 1000.0
+        timings["total"] = (time.perf_counter() - start) * 1000.0
+        return timings
+
+    def _safe_run(self, question: str) -> None:
+        try:
+            self._record(self.run_one(question))
+        except Exception as exc:
+            logger.error("Benchmark question failed: %s", exc)
+            with self._lock:
+                self.errors += 1
+
+    def run(self, questions: List[str], concurrency: int) -> float:
+        """Replay ``questions`` with ``concurrency`` workers; returns wall-clock seconds."""
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1), thread_name_prefix="bench") as executor:
+            list(executor.map(self._safe_run, questions))
+        return time.perf_counter() - start
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: Optional[float]) -> bool:
+    """Print p50/p95 and throughput deltas against ``baseline``; False if a p95 regressed past the limit."""
+    ok = True
+    for stage, stats in current["stages"].items():
+        before = baseline.get("stages", {}).get(stage)
+        if not before or not before.get("p95_ms") or "p95_ms" not in stats:
+            continue
+        change = stats["p95_ms"] / before["p95_ms"] - 1.0
+        print(
+            f"{stage:<20} p50 {before['p50_ms']:>9.2f} -> {stats['p50_ms']:>9.2f} ms   "
+            f"p95 {before['p95_ms']:>9.2f} -> {stats['p95_ms']:>9.2f} ms ({change:+.1%})"
+        )
+        if max_regression is not None and stage in STAGES and change > max_regression:
+            ok = False
+    if baseline.get("throughput_qps"):
+        print(f"{'throughput':<20} {baseline['throughput_qps']:.2f} -> {current['throughput_qps']:.2f} q/s")
+    return ok
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the retrieval and answer pipeline end to end.")
+    parser.add_argument("--questions", type=Path, help="JSONL question set (default: a built-in sample).")
+    parser.add_argument("--field", default="question", help="JSONL key holding the question text.")
+    parser.add_argument("--limit", type=int, default=None, help="Use only the first N questions.")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the question set this many times.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1], help="Worker counts to measure.")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed questions run first.")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="Simulated LLM response time.")
+    parser.add_argument("--cache", action="store_true", help="Keep query, rerank and answer caches enabled.")
+    parser.add_argument("-o", "--output", type=Path, help="Write results as JSON.")
+    parser.add_argument("--baseline", type=Path, help="Earlier --output to compare against.")
+    parser.add_argument(
+        "--max-regression", type=float, default=None, help="Exit 1 if any stage p95 grows by more than this fraction."
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.log_level)
+    if not args.cache:
+        settings.query_cache_size = 0
+        settings.rerank_cache_size = 0
+        settings.answer_cache_ttl_seconds = 0
+
+    from app.llm.answer_generator import AnswerGenerator
+    from app.retrieval.hybrid_retriever import HybridRetriever
+    from app.retrieval.reranker import Reranker
+
+    questions = list(read_questions(args.questions, args.field)) if args.questions else list(DEFAULT_QUESTIONS)
+    questions = questions[: args.limit] if args.limit else questions
+    load_start = time.perf_counter()
+    retriever, reranker = HybridRetriever(), Reranker()
+    generator = AnswerGenerator(client=StubChatClient(args.llm_latency_ms))
+    load_seconds = time.perf_counter() - load_start
+    PipelineBench(retriever, reranker, generator).run(questions[: args.warmup], 1)
+
+    runs: List[Dict[str, Any]] = []
+    for concurrency in args.concurrency:
+        bench = PipelineBench(retriever, reranker, generator)
+        wall = bench.run(questions * max(args.repeat, 1), concurrency)
+        completed = len(bench.samples.get("total", []))
+        run = {
+            "concurrency": concurrency,
+            "questions": completed,
+            "errors": bench.errors,
+            "wall_seconds": round(wall, 3),
+            "throughput_qps": round(completed / wall, 3) if wall else 0.0,
+            "stages": {stage: summarize(samples) for stage, samples in sorted(bench.samples.items())},
+        }
+        runs.append(run)
+        logger.info("concurrency=%s: %.2f q/s over %s questions", concurrency, run["throughput_qps"], completed)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "vector_backend": settings.vector_backend,
+        "lexical_retrieval": settings.lexical_retrieval,
+        "caches": args.cache,
+        "llm_latency_ms": args.llm_latency_ms,
+        "load_seconds": round(load_seconds, 3),
+        "peak_rss_mb": peak_rss_mb(),
+        "runs": runs,
+    }
+    print(json.dumps(report, indent=2))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.baseline:
+        with args.baseline.open("r", encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        previous = {run["concurrency"]: run for run in baseline.get("runs", [])}
+        ok = True
+        for run in runs:
+            if run["concurrency"] in previous:
+                print(f"-- concurrency {run['concurrency']} vs {baseline.get('commit') or args.baseline}")
+                ok = compare(run, previous[run["concurrency"]], args.max_regression) and ok
+        if not ok:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
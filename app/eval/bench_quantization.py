@@ -0,0 +1,144 @@
+"""Compare recall@k and latency of quantized local dense indexes against float32.
+
+Numbers are for the local backend (``VECTOR_BACKEND=local``) only: Qdrant
+int8/binary collections quantize and rescore server-side, behind their own
+HNSW graph, and are not measured here. The float32 reference is an exact
+scan (no HNSW graph), so recall is measured against true nearest neighbours.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.eval.questions import read_questions
+from app.retrieval.local_vector_store import (
+    META_FILE,
+    QUANTIZATION_MODES,
+    ROWS_FILE,
+    VECTORS_FILE,
+    LocalVectorStore,
+    write_local_index,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def load_float_index(directory: Path) -> Tuple[List[Tuple[str, str]], np.ndarray]:
+    """Read the ``(chunk_id, lang)`` rows and float32 vectors of an existing local index."""
+    with (directory / META_FILE).open("r", encoding="utf-8") as handle:
+        meta = json.load(handle)
+    matrix = np.fromfile(directory / VECTORS_FILE, dtype=np.float32).reshape(meta["count"], meta["dim"])
+    with (directory / ROWS_FILE).open("r", encoding="utf-8") as handle:
+        entries = [json.loads(line) for line in handle if line.strip()]
+    return [(entry["chunk_id"], entry.get("lang", "en")) for entry in entries], matrix
+
+
+def sample_queries(matrix: np.ndarray, count: int, noise: float, seed: int) -> np.ndarray:
+    """Corpus rows plus Gaussian noise, for when no question file is given."""
+    rng = np.random.default_rng(seed)
+    sampled = matrix[rng.choice(matrix.shape[0], size=min(count, matrix.shape[0]), replace=False)]
+    return sampled + rng.normal(scale=noise, size=sampled.shape).astype(np.float32)
+
+
+def resident_bytes(store: LocalVectorStore) -> int:
+    """Bytes the store keeps in RAM for scanning (the float matrix when unquantized)."""
+    if store.codes is None:
+        return int(store.matrix.nbytes)
+    return int(store.codes.nbytes + (store.scales.nbytes if store.scales is not None else 0))
+
+
+def benchmark(
+    rows: List[Tuple[str, str]],
+    matrix: np.ndarray,
+    queries: np.ndarray,
+    top_k: int,
+    modes: List[str],
+    lang: str,
+) -> List[Dict[str, float]]:
+    report: List[Dict[str, float]] = []
+    reference: Optional[List[set]] = None
+    # Exact float32 reference; quantized indexes never use the graph anyway.
+    settings.local_index_ann_threshold = 0
+    with tempfile.TemporaryDirectory(prefix="bench-quant-") as tmp:
+        for mode in ["none"] + [mode for mode in modes if mode != "none"]:
+            directory = Path(tmp) / mode
+            write_local_index(directory, rows, matrix, quantization=mode)
+            store = LocalVectorStore(directory)
+            store.search(queries[0], top_k=top_k, lang=lang)
+            latencies: List[float] = []
+            hits: List[set] = []
+            for query in queries:
+                start = time.perf_counter()
+                results = store.search(query, top_k=top_k, lang=lang)
+                latencies.append((time.perf_counter() - start) * 1000.0)
+                hits.append({hit.chunk_id for hit in results})
+            if reference is None:
+                reference = hits
+            recall = np.mean([len(got & want) / max(len(want), 1) for got, want in zip(hits, reference)])
+            report.append(
+                {
+                    "backend": "local",
+                    "quantization": mode,
+                    f"recall@{top_k}": round(float(recall), 4),
+                    "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                    "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+                    "resident_mb": round(resident_bytes(store) / 2**20, 2),
+                }
+            )
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--index-dir", type=Path, default=Path(settings.local_index_dir), help="Float32 local index to benchmark."
+    )
+    parser.add_argument("--questions", type=Path, help='JSONL with {"question": ...}; encoded with BGE-M3.')
+    parser.add_argument("--sample", type=int, default=200, help="Noisy corpus rows to use without --questions.")
+    parser.add_argument("--noise", type=float, default=0.02, help="Noise std added to sampled rows.")
+    parser.add_argument("--top-k", type=int, default=32)
+    parser.add_argument("--modes", nargs="+", default=["int8", "binary"], choices=QUANTIZATION_MODES)
+    parser.add_argument("--lang", default="en")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=Path, help="Write results as JSON.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.log_level)
+    rows, matrix = load_float_index(args.index_dir)
+    if args.questions:
+        from app.retrieval.embedder import embed_queries
+
+        queries = np.asarray(embed_queries(list(read_questions(args.questions))), dtype=np.float32)
+    else:
+        queries = sample_queries(matrix, args.sample, args.noise, args.seed)
+    logger.info("Benchmarking %s queries over %s vectors", len(queries), len(rows))
+
+    results = benchmark(rows, matrix, queries, args.top_k, args.modes, args.lang)
+    for result in results:
+        print(json.dumps(result))
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("w", encoding="utf-8") as handle:
+            json.dump(
+                {
+                    "backend": "local",
+                    "top_k": args.top_k,
+                    "oversampling": settings.quantization_oversampling,
+                    "results": results,
+                },
+                handle,
+                indent=2,
+            )
+
+
+if __name__ == "__main__":
+    main()
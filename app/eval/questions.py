@@ -0,0 +1,28 @@
+"""Question sets shared by the evaluation and benchmark scripts."""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Iterator
+
+# Built-in sample used when a benchmark is run without --questions.
+DEFAULT_QUESTIONS = [
+    "beta blocker dose in heart failure with reduced ejection fraction",
+    "anticoagulation for atrial fibrillation in elderly patients",
+    "statin therapy after acute coronary syndrome",
+    "blood pressure target for hypertension with diabetes",
+    "indications for implantable cardioverter defibrillator",
+    "SGLT2 inhibitors in chronic heart failure",
+    "aspirin for primary prevention of cardiovascular disease",
+    "management of stable angina",
+]
+
+
+def read_questions(path: Path, field: str = "question") -> Iterator[str]:
+    """Yield the ``field`` value (``question`` by default) of every non-empty JSONL row."""
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            yield json.loads(line)[field]
@@ -0,0 +1,220 @@
+"""Sweep retrieval knobs on a labeled question set and trade recall@k/MRR/nDCG against latency.
+
+Input is JSONL with ``{"question": ..., "relevant_chunk_ids": [...]}`` per
+line. Every combination of ``top_k_sparse``, ``top_k_dense``,
+``top_k_final`` and the RRF constant is run over all questions (optionally
+followed by reranking the ``top_k_final`` candidates), and the ranked chunk
+ids are scored against the labels.
+
+Query embeddings are computed once up front so every configuration sees the
+same (cached) encoding cost; the rerank cache is disabled so reranking cost
+is measured for real.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import math
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.eval.batch_ask import RERANK_TOP_K
+from app.eval.bench_pipeline import git_commit
+
+logger = logging.getLogger(__name__)
+
+LabeledQuestion = Tuple[str, Set[str]]
+
+
+def read_labeled(path: Path) -> List[LabeledQuestion]:
+    labeled: List[LabeledQuestion] = []
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            relevant = set(row.get("relevant_chunk_ids") or [])
+            if not relevant:
+                logger.warning("Skipping question without relevant_chunk_ids: %s", row.get("question"))
+                continue
+            labeled.append((row["question"], relevant))
+    return labeled
+
+
+def recall_at(ranked: Sequence[str], relevant: Set[str], k: int) -> float:
+    return len(relevant.intersection(ranked[:k])) / len(relevant)
+
+
+def reciprocal_rank(ranked: Sequence[str], relevant: Set[str]) -> float:
+    for rank, chunk_id in enumerate(ranked, start=1):
+        if chunk_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+
+def ndcg_at(ranked: Sequence[str], relevant: Set[str], k: int) -> float:
+    """Binary-relevance nDCG@k."""
+    dcg = sum(1.0 / math.log2(rank + 1) for rank, chunk_id in enumerate(ranked[:k], start=1) if chunk_id in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+
+def score_config(rankings: List[List[str]], labels: List[Set[str]], cutoffs: Sequence[int]) -> Dict[str, float]:
+    metrics: Dict[str, float] = {}
+    for k in cutoffs:
+        metrics[f"recall@{k}"] = round(float(np.mean([recall_at(r, rel, k) for r, rel in zip(rankings, labels)])), 4)
+        metrics[f"ndcg@{k}"] = round(float(np.mean([ndcg_at(r, rel, k) for r, rel in zip(rankings, labels)])), 4)
+    metrics["mrr"] = round(float(np.mean([reciprocal_rank(r, rel) for r, rel in zip(rankings, labels)])), 4)
+    return metrics
+
+
+def run_config(
+    retriever,
+    reranker,
+    questions: List[str],
+    top_k_sparse: int,
+    top_k_dense: int,
+    top_k_final: int,
+) -> Tuple[List[List[str]], Dict[str, float]]:
+    """Ranked chunk ids per question plus p50/p95 retrieve, rerank and total latency."""
+    rankings: List[List[str]] = []
+    samples: Dict[str, List[float]] = {"retrieve": [], "rerank": [], "total": []}
+    for question in questions:
+        start = time.perf_counter()
+        candidates = retriever.retrieve(
+            question, top_k_sparse=top_k_sparse, top_k_dense=top_k_dense, top_k_final=top_k_final
+        )
+        mark = time.perf_counter()
+        if reranker is not None:
+            candidates = reranker.rerank(question, candidates, top_k=len(candidates))
+        end = time.perf_counter()
+        samples["retrieve"].append((mark - start) * 1000.0)
+        samples["rerank"].append((end - mark) * 1000.0)
+        samples["total"].append((end - start) * 1000.0)
+        rankings.append([chunk.chunk_id for chunk in candidates])
+    latency: Dict[str, float] = {}
+    for stage, values in samples.items():
+        if stage == "rerank" and reranker is None:
+            continue
+        latency[f"{stage}_p50_ms"] = round(float(np.percentile(values, 50)), 3)
+        latency[f"{stage}_p95_ms"] = round(float(np.percentile(values, 95)), 3)
+    return rankings, latency
+
+
+def cheapest(rows: List[Dict[str, Any]], metric: str, min_ratio: float) -> Optional[Dict[str, Any]]:
+    """Lowest p50 latency configuration whose ``metric`` is within ``min_ratio`` of the best."""
+    best = max(row[metric] for row in rows)
+    eligible = [row for row in rows if row[metric] >= best * min_ratio]
+    return min(eligible, key=lambda row: row["total_p50_ms"]) if eligible else None
+
+
+def plot(rows: List[Dict[str, Any]], metrics: Sequence[str], path: Path) -> None:
+    try:
+        import matplotlib
+
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        logger.warning("matplotlib is not installed; skipping %s", path)
+        return
+    figure, axes = plt.subplots(1, len(metrics), figsize=(5 * len(metrics), 4), squeeze=False)
+    latency = [row["total_p50_ms"] for row in rows]
+    for axis, metric in zip(axes[0], metrics):
+        axis.scatter(latency, [row[metric] for row in rows])
+        for row in rows:
+            label = f"{row['top_k_sparse']}/{row['top_k_dense']}/{row['top_k_final']} k={row['rrf_k']}"
+            axis.annotate(label, (row["total_p50_ms"], row[metric]), fontsize=6, alpha=0.7)
+        axis.set_xlabel("p50 latency (ms)")
+        axis.set_ylabel(metric)
+        axis.grid(alpha=0.3)
+    figure.suptitle("sparse/dense/final top_k and RRF k")
+    figure.tight_layout()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    figure.savefig(path, dpi=150)
+    logger.info("Wrote %s", path)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Sweep retrieval top_k/RRF settings against labeled questions.")
+    parser.add_argument("labels", type=Path, help='JSONL with {"question": ..., "relevant_chunk_ids": [...]}.')
+    parser.add_argument("--top-k-sparse", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--top-k-dense", type=int, nargs="+", default=[8, 16, 32])
+    parser.add_argument("--top-k-final", type=int, nargs="+", default=[10, 20])
+    parser.add_argument("--rrf-k", type=int, nargs="+", default=[settings.rrf_k])
+    parser.add_argument("--rerank", action="store_true", help="Rerank the top_k_final candidates before scoring.")
+    parser.add_argument("--cutoffs", type=int, nargs="+", default=[5, RERANK_TOP_K])
+    parser.add_argument(
+        "--min-ratio", type=float, default=0.98, help="Suggest the cheapest config within this share of the best."
+    )
+    parser.add_argument("-o", "--output", type=Path, help="Write results as JSON.")
+    parser.add_argument("--csv", type=Path, help="Write one row per configuration as CSV.")
+    parser.add_argument("--plot", type=Path, help="Save a metric-vs-latency plot (needs matplotlib).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=settings.log_level)
+    settings.rerank_cache_size = 0
+
+    from app.retrieval.embedder import encode_queries
+    from app.retrieval.hybrid_retriever import HybridRetriever
+    from app.retrieval.reranker import Reranker
+
+    labeled = read_labeled(args.labels)
+    if not labeled:
+        raise SystemExit(f"No labeled questions in {args.labels}")
+    questions = [question for question, _relevant in labeled]
+    labels = [relevant for _question, relevant in labeled]
+    retriever = HybridRetriever()
+    reranker = Reranker() if args.rerank else None
+    encode_queries(questions)
+    logger.info("Evaluating %s labeled questions", len(questions))
+
+    rows: List[Dict[str, Any]] = []
+    grid = itertools.product(args.top_k_sparse, args.top_k_dense, args.top_k_final, args.rrf_k)
+    for top_k_sparse, top_k_dense, top_k_final, rrf_k in grid:
+        retriever.rrf_k = rrf_k
+        rankings, latency = run_config(retriever, reranker, questions, top_k_sparse, top_k_dense, top_k_final)
+        row = {
+            "top_k_sparse": top_k_sparse,
+            "top_k_dense": top_k_dense,
+            "top_k_final": top_k_final,
+            "rrf_k": rrf_k,
+            "rerank": bool(args.rerank),
+            **score_config(rankings, labels, args.cutoffs),
+            **latency,
+        }
+        rows.append(row)
+        print(json.dumps(row))
+
+    metric = f"recall@{max(args.cutoffs)}"
+    suggestion = cheapest(rows, metric, args.min_ratio)
+    if suggestion is not None:
+        print(f"Cheapest configuration within {args.min_ratio:.0%} of the best {metric}: {json.dumps(suggestion)}")
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        with args.output.open("w", encoding="utf-8") as handle:
+            json.dump(
+                {"commit": git_commit(), "questions": len(questions), "suggestion": suggestion, "results": rows},
+                handle,
+                indent=2,
+            )
+    if args.csv:
+        args.csv.parent.mkdir(parents=True, exist_ok=True)
+        with args.csv.open("w", encoding="utf-8", newline="") as handle:
+            writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.plot:
+        plot(rows, [metric, f"ndcg@{max(args.cutoffs)}", "mrr"], args.plot)
+
+
+if __name__ == "__main__":
+    main()
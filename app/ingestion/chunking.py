@@ -4,24 +4,43 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import re
+import sqlite3
 from collections import defaultdict
+from itertools import groupby
 from pathlib import Path
 from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 from app.config import settings
+from app.ingestion.manifest import IngestionManifest, read_rows_by_guideline
 from app.models.chunk import Chunk
 from app.models.document import Paragraph
-from app.utils.tokenization import count_tokens, get_cl100k_encoding
+from app.retrieval.chunk_store import staged_path
+from app.utils.tokenization import count_tokens, get_cl100k_encoding, tokenizer_name
 
 logger = logging.getLogger(__name__)
 
 REC_CLASS_PATTERN = re.compile(r"(Class\s+(I{1,3}|IV|V|IIa|IIb))", re.IGNORECASE)
 LOE_PATTERN = re.compile(r"(Level\s+(A|B|C))", re.IGNORECASE)
 
+CHUNK_STAGE = "chunk"
+
 encoding = get_cl100k_encoding("building English guideline chunks")
 
 
+def chunk_signature(parse_signature: str = "") -> str:
+    """Settings that change chunk boundaries; any change forces a full re-chunk.
+
+    ``parse_signature`` is the signature the parse stage last ran with, so a
+    parser or paragraph change re-chunks guidelines whose PDFs did not change.
+    """
+    return (
+        f"chunk-v3:{tokenizer_name(encoding)}:{settings.chunk_target_tokens}:"
+        f"{settings.chunk_max_tokens}:{settings.chunk_overlap}:{parse_signature}"
+    )
+
+
 def read_paragraphs(path: Path) -> Iterator[Paragraph]:
     with path.open("r", encoding="utf-8") as handle:
         for line in handle:
@@ -51,7 +70,7 @@ def build_chunk_id(guideline_id: str, section_id: Optional[str], counter: int) -
     return f"{guideline_id}-{section_part}-{counter:04d}"
 
 
-def build_chunk(paragraphs: List[Paragraph], counter: int) -> Chunk:
+def build_chunk(paragraphs: List[Paragraph], counter: int, paragraph_tokens: List[int]) -> Chunk:
     first = paragraphs[0]
     text = "\n\n".join(p.text for p in paragraphs)
     page_numbers = [p.page for p in paragraphs if p.page]
@@ -69,33 +88,39 @@ def build_chunk(paragraphs: List[Paragraph], counter: int) -> Chunk:
         page_range=page_range,
         lang=first.lang,
         text=text,
+        token_count=sum(paragraph_tokens),
         rec_class_list=rec_classes,
         loe_list=loe_list,
         metadata={
             "paragraph_ids": [p.order for p in paragraphs],
             "paragraph_count": len(paragraphs),
+            "paragraph_tokens": paragraph_tokens,
         },
     )
 
 
 def chunk_section(paragraphs: List[Paragraph], counter_start: int) -> Iterator[Chunk]:
     buffer: List[Paragraph] = []
+    buffer_tokens: List[int] = []
     current_tokens = 0
     counter = counter_start
 
     def flush_buffer() -> Optional[Chunk]:
-        nonlocal buffer, current_tokens, counter
+        nonlocal buffer, buffer_tokens, current_tokens, counter
         if not buffer:
             return None
         counter += 1
-        chunk = build_chunk(buffer, counter)
+        chunk = build_chunk(buffer, counter, list(buffer_tokens))
         overlap = settings.chunk_overlap
         buffer = buffer[-overlap:] if overlap else []
-        current_tokens = sum(count_tokens(p.text, encoding) for p in buffer)
+        buffer_tokens = buffer_tokens[-overlap:] if overlap else []
+        current_tokens = sum(buffer_tokens)
         return chunk
 
     for paragraph in paragraphs:
-        paragraph_tokens = count_tokens(paragraph.text, encoding)
+        paragraph_tokens = paragraph.token_count
+        if paragraph_tokens is None:
+            paragraph_tokens = count_tokens(paragraph.text, encoding)
         if (
             buffer
             and current_tokens + paragraph_tokens > settings.chunk_max_tokens
@@ -104,6 +129,7 @@ def chunk_section(paragraphs: List[Paragraph], counter_start: int) -> Iterator[C
             if chunk:
                 yield chunk
         buffer.append(paragraph)
+        buffer_tokens.append(paragraph_tokens)
         current_tokens += paragraph_tokens
         if current_tokens >= settings.chunk_target_tokens:
             chunk = flush_buffer()
@@ -144,15 +170,59 @@ def chunk_paragraphs(paragraphs: Iterator[Paragraph]) -> Iterator[Chunk]:
         yield chunk
 
 
-def write_chunks(chunks: Iterable[Chunk], output_path: Path) -> int:
+def write_rows(rows: Iterable[str], output_path: Path) -> int:
     output_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
     count = 0
-    with output_path.open("w", encoding="utf-8") as handle:
-        for count, chunk in enumerate(chunks, start=1):
-            handle.write(json.dumps(chunk.model_dump()) + "\n")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        for count, row in enumerate(rows, start=1):
+            handle.write(row)
+    os.replace(tmp_path, output_path)
     return count
 
 
+def write_chunks(chunks: Iterable[Chunk], output_path: Path) -> int:
+    return write_rows((json.dumps(chunk.model_dump()) + "\n" for chunk in chunks), output_path)
+
+
+def write_chunk_store(path: Path, rows: Iterable[str]) -> int:
+    """Rebuild the SQLite chunk store from chunk JSONL rows and swap it in atomically."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    db = sqlite3.connect(str(tmp_path))
+    try:
+        db.execute("CREATE TABLE chunks (chunk_id TEXT PRIMARY KEY, body TEXT NOT NULL)")
+        count = 0
+        with db:
+            for row in rows:
+                if not row.strip():
+                    continue
+                db.execute(
+                    "INSERT OR REPLACE INTO chunks (chunk_id, body) VALUES (?, ?)",
+                    (json.loads(row)["chunk_id"], row.strip()),
+                )
+                count += 1
+    finally:
+        db.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+def iter_chunk_rows(
+    paragraphs: Iterable[Paragraph],
+    reused: Dict[str, List[str]],
+) -> Iterator[str]:
+    """Yield chunk rows per guideline, reusing previous rows where available."""
+    for guideline_id, group in groupby(paragraphs, key=lambda paragraph: paragraph.guideline_id):
+        if guideline_id in reused:
+            yield from reused[guideline_id]
+            continue
+        for chunk in chunk_paragraphs(group):
+            yield json.dumps(chunk.model_dump()) + "\n"
+
+
 def main() -> None:
     logging.basicConfig(level=settings.log_level)
     paragraphs_path = settings.parsed_docs_path_obj
@@ -160,9 +230,30 @@ def main() -> None:
     if not paragraphs_path.exists():
         logger.error("Parsed documents not found at %s", paragraphs_path)
         return
-    chunks = chunk_paragraphs(read_paragraphs(paragraphs_path))
-    total = write_chunks(chunks, settings.chunks_path_obj)
-    logger.info("Wrote %s chunk rows to %s", total, settings.chunks_path)
+    manifest = IngestionManifest.load()
+    parse_record = manifest.stage("parse")
+    content_hashes = parse_record.items
+    signature = chunk_signature(parse_record.signature)
+    previous: Dict[str, str] = {}
+    if manifest.is_current(CHUNK_STAGE, signature):
+        previous = manifest.stage(CHUNK_STAGE).items
+    unchanged = {
+        guideline_id
+        for guideline_id, content_hash in content_hashes.items()
+        if previous.get(guideline_id) == content_hash
+    }
+    reused = read_rows_by_guideline(settings.chunks_path_obj, unchanged)
+    logger.info("Reusing chunks for %s unchanged guidelines", len(reused))
+
+    rows = iter_chunk_rows(read_paragraphs(paragraphs_path), reused)
+    total = write_rows(rows, settings.chunks_path_obj)
+    # The store is only staged: the index steps publish it with their own
+    # swap, so the API never hydrates old index hits from new chunk text.
+    with settings.chunks_path_obj.open("r", encoding="utf-8") as handle:
+        write_chunk_store(staged_path(), handle)
+    manifest.record(CHUNK_STAGE, signature, content_hashes)
+    manifest.save()
+    logger.info("Wrote %s chunk rows to %s and staged %s", total, settings.chunks_path, staged_path())
 
 
 if __name__ == "__main__":
@@ -0,0 +1,141 @@
+"""Local store of corpus embeddings keyed by chunk text hash."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def _slug(model_name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", model_name)
+
+
+class EmbeddingStore:
+    """Append-only memory-mapped matrix of vectors plus a hash -> row index.
+
+    Layout under ``root/<model>/``: ``vectors.<dtype>`` holds raw rows of
+    ``dim`` values and ``index.json`` maps a chunk text hash to its row.
+    Rows are appended and never rewritten, so re-indexing an unchanged corpus
+    only reads the memmap. Vectors are always returned as float32.
+    BGE-M3 lexical weights, when indexed, are appended to ``lexical.jsonl``.
+    """
+
+    def __init__(self, root: Path, model_name: str, dim: int, dtype: str = "float16") -> None:
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.directory = Path(root) / _slug(model_name)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.vectors_path = self.directory / f"vectors.{self.dtype.name}"
+        self.index_path = self.directory / "index.json"
+        self.lexical_path = self.directory / "lexical.jsonl"
+        self._lexical: Optional[Dict[str, Dict[str, float]]] = None
+        self._row_bytes = self.dim * self.dtype.itemsize
+        self._index: Dict[str, int] = {}
+        if self.index_path.exists():
+            with self.index_path.open("r", encoding="utf-8") as handle:
+                self._index = json.load(handle)
+        self._rows = self._trim_partial_row()
+        self._index = {key: row for key, row in self._index.items() if row < self._rows}
+        self._matrix: Optional[np.memmap] = None
+        self._dirty = False
+
+    def _trim_partial_row(self) -> int:
+        if not self.vectors_path.exists():
+            self.vectors_path.touch()
+            return 0
+        size = self.vectors_path.stat().st_size
+        rows, remainder = divmod(size, self._row_bytes)
+        if remainder:
+            logger.warning("Truncating partial row at the end of %s", self.vectors_path)
+            with self.vectors_path.open("r+b") as handle:
+                handle.truncate(rows * self._row_bytes)
+        return rows
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def _view(self) -> Optional[np.memmap]:
+        if self._rows == 0:
+            return None
+        if self._matrix is None or self._matrix.shape[0] != self._rows:
+            self._matrix = np.memmap(
+                self.vectors_path, dtype=self.dtype, mode="r", shape=(self._rows, self.dim)
+            )
+        return self._matrix
+
+    def lookup(self, hashes: Sequence[str]) -> Dict[str, np.ndarray]:
+        """Return stored vectors for the hashes that are present."""
+        rows = {key: self._index[key] for key in hashes if key in self._index}
+        matrix = self._view()
+        if not rows or matrix is None:
+            return {}
+        keys = list(rows)
+        values = np.asarray(matrix[[rows[key] for key in keys]], dtype=np.float32)
+        return dict(zip(keys, values))
+
+    def add(self, hashes: Sequence[str], vectors: np.ndarray) -> None:
+        """Append new vectors; hashes already stored are skipped."""
+        seen = set(self._index)
+        fresh = []
+        for idx, key in enumerate(hashes):
+            if key not in seen:
+                seen.add(key)
+                fresh.append((idx, key))
+        if not fresh:
+            return
+        block = np.ascontiguousarray(
+            np.asarray(vectors, dtype=np.float32)[[idx for idx, _key in fresh]], dtype=self.dtype
+        )
+        if block.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim vectors, got {block.shape[1]}")
+        with self.vectors_path.open("ab") as handle:
+            handle.write(block.tobytes())
+        for offset, (_idx, key) in enumerate(fresh):
+            self._index[key] = self._rows + offset
+        self._rows += len(fresh)
+        self._dirty = True
+
+    def _lexical_map(self) -> Dict[str, Dict[str, float]]:
+        if self._lexical is None:
+            self._lexical = {}
+            if self.lexical_path.exists():
+                with self.lexical_path.open("r", encoding="utf-8") as handle:
+                    for line in handle:
+                        try:
+                            row = json.loads(line)
+                        except ValueError:
+                            continue  # partial line from an interrupted run
+                        self._lexical[row["hash"]] = row["weights"]
+        return self._lexical
+
+    def lookup_lexical(self, hashes: Sequence[str]) -> Dict[str, Dict[str, float]]:
+        lexical = self._lexical_map()
+        return {key: lexical[key] for key in hashes if key in lexical}
+
+    def add_lexical(self, hashes: Sequence[str], weights: Sequence[Mapping[str, float]]) -> None:
+        lexical = self._lexical_map()
+        fresh = {key: dict(value) for key, value in zip(hashes, weights) if key not in lexical}
+        if not fresh:
+            return
+        with self.lexical_path.open("a", encoding="utf-8") as handle:
+            for key, value in fresh.items():
+                handle.write(json.dumps({"hash": key, "weights": value}) + "\n")
+        lexical.update(fresh)
+
+    def flush(self) -> None:
+        """Persist the hash -> row index atomically."""
+        if not self._dirty:
+            return
+        tmp_path = self.index_path.with_suffix(".json.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(self._index, handle)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
@@ -4,17 +4,30 @@ from __future__ import annotations
 
 import json
 import logging
+import os
+import re
 import shutil
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, List, Optional
 
 import tantivy
 
 from app.config import settings
+from app.ingestion.manifest import IngestionManifest, diff_items, fingerprint_chunks
 from app.models.chunk import Chunk
+from app.retrieval.chunk_store import publish_chunk_store
+from app.utils.index_version import bump_index_version, new_version_stamp
 
 logger = logging.getLogger(__name__)
 
+BM25_STAGE = "bm25"
+BM25_SCHEMA_VERSION = "bm25-v4"
+# Each build lives in <bm25_index_dir>/versions/<stamp>; CURRENT names the live one.
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+# Files of an unversioned (pre-``versions/``) index left directly in the root.
+LEGACY_INDEX_FILE = re.compile(r"^(meta\.json|\.managed\.json|\.tantivy-.*\.lock|[0-9a-f]{32}(\.\d+)?\.[a-z]+)$")
+
 
 def load_chunks(path: Path) -> Iterable[Chunk]:
     with path.open("r", encoding="utf-8") as handle:
@@ -25,22 +38,58 @@ def load_chunks(path: Path) -> Iterable[Chunk]:
 
 
 def build_schema() -> tantivy.Schema:
+    """Only ``chunk_id`` is stored; results are hydrated from the chunk store.
+
+    ``chunk_id`` is indexed raw with ``basic`` options, as it is only ever
+    matched whole (for deletes). It is also declared fast, but tantivy-py
+    (0.25) has no per-hit fast-field getter, so searches read the stored value.
+    """
     builder = tantivy.SchemaBuilder()
-    builder.add_text_field("chunk_id", stored=True)
-    builder.add_text_field("guideline_id", stored=True)
-    builder.add_text_field("guideline_title", stored=True)
-    builder.add_text_field("section_id", stored=True)
-    builder.add_text_field("section_title", stored=True)
-    builder.add_text_field("organization", stored=True)
-    builder.add_text_field("year", stored=True)
-    builder.add_text_field("text", stored=True)
-    builder.add_text_field("lang", stored=True)
-    builder.add_text_field("page_range", stored=True)
-    builder.add_text_field("rec_classes", stored=True)
-    builder.add_text_field("loe_list", stored=True)
+    builder.add_text_field("chunk_id", stored=True, fast=True, tokenizer_name="raw", index_option="basic")
+    builder.add_text_field("guideline_title", stored=False)
+    builder.add_text_field("section_title", stored=False)
+    builder.add_text_field("text", stored=False)
     return builder.build()
 
 
+def resolve_index_dir(root: Path) -> Optional[Path]:
+    """Return the live index directory under ``root``, or ``None`` if nothing was built.
+
+    Falls back to ``root`` itself for indexes written before versioned builds.
+    """
+    current = root / CURRENT_FILE
+    if current.exists():
+        return root / VERSIONS_DIR / current.read_text(encoding="utf-8").strip()
+    if (root / "meta.json").exists():
+        return root
+    return None
+
+
+def publish_index_version(root: Path, version: str) -> None:
+    """Atomically point ``CURRENT`` at ``versions/<version>``."""
+    tmp_path = root / f"{CURRENT_FILE}.tmp"
+    tmp_path.write_text(version, encoding="utf-8")
+    os.replace(tmp_path, root / CURRENT_FILE)
+
+
+def prune_index_versions(root: Path, keep: int) -> None:
+    """Delete all but the newest ``keep`` builds (never the live one) and a legacy unversioned index.
+
+    Readers that still hold a searcher on a deleted build keep working on
+    POSIX filesystems, since its segment files are already memory-mapped.
+    """
+    live = resolve_index_dir(root)
+    builds = sorted((path for path in (root / VERSIONS_DIR).iterdir() if path.is_dir()), reverse=True)
+    for path in builds[max(keep, 1):]:
+        if path != live:
+            shutil.rmtree(path, ignore_errors=True)
+    if live == root:
+        return
+    for path in root.iterdir():
+        if path.is_file() and LEGACY_INDEX_FILE.match(path.name):
+            path.unlink(missing_ok=True)
+
+
 def prepare_index(schema: tantivy.Schema, index_dir: Path) -> tantivy.Index:
     if index_dir.exists():
         shutil.rmtree(index_dir)
@@ -48,30 +97,22 @@ def prepare_index(schema: tantivy.Schema, index_dir: Path) -> tantivy.Index:
     return tantivy.Index(schema, path=str(index_dir), reuse=False)
 
 
+def open_index(schema: tantivy.Schema, index_dir: Path) -> tantivy.Index:
+    return tantivy.Index(schema, path=str(index_dir), reuse=True)
+
+
+def delete_chunk(writer: tantivy.IndexWriter, chunk_id: str) -> None:
+    delete_fn = getattr(writer, "delete_documents_by_term", None) or writer.delete_documents
+    delete_fn("chunk_id", chunk_id)
+
+
 def add_chunk(writer: tantivy.IndexWriter, chunk: Chunk) -> None:
-    page_range = ""
-    if chunk.page_range:
-        page_range = f"{chunk.page_range[0]}-{chunk.page_range[1]}"
     document = tantivy.Document()
     document.add_text("chunk_id", chunk.chunk_id)
-    document.add_text("guideline_id", chunk.guideline_id)
     document.add_text("guideline_title", chunk.guideline_title)
-    if chunk.section_id:
-        document.add_text("section_id", chunk.section_id)
     if chunk.section_title:
         document.add_text("section_title", chunk.section_title)
-    if chunk.organization:
-        document.add_text("organization", chunk.organization)
-    if chunk.year:
-        document.add_text("year", str(chunk.year))
     document.add_text("text", chunk.text)
-    document.add_text("lang", chunk.lang)
-    if page_range:
-        document.add_text("page_range", page_range)
-    if chunk.rec_class_list:
-        document.add_text("rec_classes", ";".join(chunk.rec_class_list))
-    if chunk.loe_list:
-        document.add_text("loe_list", ";".join(chunk.loe_list))
     writer.add_document(document)
 
 
@@ -83,14 +124,51 @@ def main() -> None:
         logger.error("Chunk file %s does not exist. Run chunking first.", chunks_path)
         return
     schema = build_schema()
-    index = prepare_index(schema, settings.bm25_index_path_obj)
+    root = settings.bm25_index_path_obj
+    chunks = {chunk.chunk_id: chunk for chunk in load_chunks(chunks_path)}
+    fingerprints = fingerprint_chunks(chunks.values())
+
+    manifest = IngestionManifest.load()
+    live_dir = resolve_index_dir(root) if (root / CURRENT_FILE).exists() else None
+    incremental = manifest.is_current(BM25_STAGE, BM25_SCHEMA_VERSION) and live_dir is not None
+    version = new_version_stamp()
+    index_dir = root / VERSIONS_DIR / version
+    # Builds never touch the live version: the API keeps serving it until CURRENT flips.
+    if incremental:
+        upserts, removed = diff_items(manifest.stage(BM25_STAGE).items, fingerprints)
+        if not upserts and not removed:
+            logger.info("BM25 index %s is up to date (%s chunks)", live_dir, len(chunks))
+            published = publish_chunk_store()
+            if published:
+                bump_index_version(*published)
+            return
+        shutil.copytree(live_dir, index_dir)
+        index = open_index(schema, index_dir)
+    else:
+        upserts, removed = list(chunks), []
+        index = prepare_index(schema, index_dir)
+
     writer = index.writer()
-    count = 0
-    for chunk in load_chunks(chunks_path):
-        count += 1
-        add_chunk(writer, chunk)
+    stale: List[str] = removed + [chunk_id for chunk_id in upserts if incremental]
+    for chunk_id in stale:
+        delete_chunk(writer, chunk_id)
+    for chunk_id in upserts:
+        add_chunk(writer, chunks[chunk_id])
     writer.commit()
-    logger.info("Indexed %s chunks into %s", count, settings.bm25_index_dir)
+    writer.wait_merging_threads()
+    publish_index_version(root, version)
+    prune_index_versions(root, settings.index_keep_versions)
+    manifest.record(BM25_STAGE, BM25_SCHEMA_VERSION, fingerprints)
+    manifest.save()
+    bump_index_version("bm25", *publish_chunk_store())
+    logger.info(
+        "Indexed %s chunks into %s (%s added/updated, %s removed, %s)",
+        len(chunks),
+        index_dir,
+        len(upserts),
+        len(removed),
+        "incremental" if incremental else "full rebuild",
+    )
 
 
 if __name__ == "__main__":
@@ -4,21 +4,43 @@ from __future__ import annotations
 
 import json
 import logging
+import time
 import uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Iterable, List
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
 
+import numpy as np
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qmodels
 
 from app.config import settings
+from app.ingestion.embedding_store import EmbeddingStore
+from app.ingestion.manifest import IngestionManifest, diff_items, fingerprint_chunks
 from app.models.chunk import Chunk
-from app.retrieval.embedder import get_bge_m3_embedder
+from app.retrieval.chunk_store import publish_chunk_store
+from app.retrieval.embedder import MODEL_NAME, get_bge_m3_embedder, lexical_to_dict
+from app.retrieval.lexical_index import META_FILE as LEXICAL_META_FILE
+from app.retrieval.lexical_index import write_lexical_index
+from app.retrieval.local_vector_store import META_FILE, quantization_mode, write_local_index
+from app.utils.hashing import text_hash
+from app.utils.index_version import bump_index_version, new_version_stamp
 
 logger = logging.getLogger(__name__)
 
 EMBEDDING_DIM = 1024
-BATCH_SIZE = 8
+VECTORS_STAGE = "vectors"
+LEXICAL_STAGE = "lexical"
+
+
+def vectors_signature(collection: str) -> str:
+    return f"vectors-v2:{MODEL_NAME}:{EMBEDDING_DIM}:{collection}:{quantization_mode()}"
+
+
+def point_id_for(chunk_id: str) -> str:
+    return str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk_id))
 
 
 def load_chunks(path: Path) -> Iterable[Chunk]:
@@ -29,32 +51,426 @@ def load_chunks(path: Path) -> Iterable[Chunk]:
             yield Chunk(**json.loads(line))
 
 
+def quantization_config(mode: str) -> qmodels.QuantizationConfig | None:
+    if mode == "int8":
+        return qmodels.ScalarQuantization(
+            scalar=qmodels.ScalarQuantizationConfig(type=qmodels.ScalarType.INT8, quantile=0.99, always_ram=True)
+        )
+    if mode == "binary":
+        return qmodels.BinaryQuantization(binary=qmodels.BinaryQuantizationConfig(always_ram=True))
+    return None
+
+
 def ensure_collection(client: QdrantClient, collection: str) -> None:
-    vector_params = qmodels.VectorParams(size=EMBEDDING_DIM, distance=qmodels.Distance.COSINE)
+    mode = quantization_mode()
+    # With quantization only the codes stay in RAM; originals live on disk for rescoring.
+    vector_params = qmodels.VectorParams(
+        size=EMBEDDING_DIM,
+        distance=qmodels.Distance.COSINE,
+        on_disk=mode != "none",
+    )
     if client.collection_exists(collection):
         logger.info("Re-creating existing Qdrant collection %s", collection)
-        client.recreate_collection(
-            collection_name=collection,
-            vectors_config=vector_params,
-        )
-    else:
-        client.create_collection(
-            collection_name=collection,
-            vectors_config=vector_params,
-        )
+        client.delete_collection(collection_name=collection)
+    client.create_collection(
+        collection_name=collection,
+        vectors_config=vector_params,
+        quantization_config=quantization_config(mode),
+    )
+    client.create_payload_index(
+        collection_name=collection,
+        field_name="lang",
+        field_schema=qmodels.PayloadSchemaType.KEYWORD,
+    )
+
+
+def alias_target(client: QdrantClient, alias: str) -> Optional[str]:
+    for description in client.get_aliases().aliases:
+        if description.alias_name == alias:
+            return description.collection_name
+    return None
+
+
+def swap_alias(client: QdrantClient, alias: str, collection: str) -> None:
+    """Repoint ``alias`` at ``collection`` in a single atomic alias update."""
+    operations: List[qmodels.AliasOperations] = []
+    if alias_target(client, alias) is not None:
+        operations.append(qmodels.DeleteAliasOperation(delete_alias=qmodels.DeleteAlias(alias_name=alias)))
+    elif client.collection_exists(alias):
+        # Collections built before aliasing carry the alias name; drop it once.
+        logger.warning("Replacing collection %s with an alias; searches fail until it is created", alias)
+        client.delete_collection(collection_name=alias)
+    operations.append(
+        qmodels.CreateAliasOperation(create_alias=qmodels.CreateAlias(collection_name=collection, alias_name=alias))
+    )
+    client.update_collection_aliases(change_aliases_operations=operations)
+    logger.info("Qdrant alias %s now points at %s", alias, collection)
+
+
+def prune_collections(client: QdrantClient, alias: str, keep: int) -> None:
+    """Drop all but the newest ``keep`` builds behind ``alias`` (never the live one)."""
+    live = alias_target(client, alias)
+    builds = sorted(
+        (item.name for item in client.get_collections().collections if item.name.startswith(f"{alias}_")),
+        reverse=True,
+    )
+    for name in builds[max(keep, 1):]:
+        if name != live:
+            logger.info("Deleting old Qdrant collection %s", name)
+            client.delete_collection(collection_name=name)
+
+
+def chunk_length(chunk: Chunk) -> int:
+    """Stored token count (whitespace length for older chunks) used to bucket chunks of similar size."""
+    return chunk.token_count or len(chunk.text.split())
 
 
-def chunk_batches(items: Iterable[Chunk], batch_size: int) -> Iterable[List[Chunk]]:
+def adaptive_batches(
+    items: Iterable[Chunk], max_tokens: int, max_batch_size: int
+) -> Iterable[List[Chunk]]:
+    """Yield length-sorted batches whose padded size stays within ``max_tokens``.
+
+    The encoder pads every text to the longest one in its batch, so sorting by
+    length keeps padding low and lets short chunks go in much larger batches
+    than long ones.
+    """
     batch: List[Chunk] = []
-    for item in items:
-        batch.append(item)
-        if len(batch) >= batch_size:
+    longest = 0
+    for item in sorted(items, key=chunk_length):
+        length = max(chunk_length(item), 1)
+        if batch and (len(batch) >= max_batch_size or (len(batch) + 1) * max(longest, length) > max_tokens):
             yield batch
-            batch = []
+            batch, longest = [], 0
+        batch.append(item)
+        longest = max(longest, length)
     if batch:
         yield batch
 
 
+def open_embedding_store() -> Optional[EmbeddingStore]:
+    if not settings.embedding_store_dir:
+        return None
+    return EmbeddingStore(
+        Path(settings.embedding_store_dir),
+        MODEL_NAME,
+        EMBEDDING_DIM,
+        dtype=settings.embedding_store_dtype,
+    )
+
+
+def _encode(texts: List[str], lexical: bool) -> Tuple[np.ndarray, Optional[List[Dict[str, float]]]]:
+    # One forward pass per adaptive batch instead of FlagEmbedding's own re-batching.
+    result = get_bge_m3_embedder().encode_corpus(
+        texts, batch_size=len(texts), return_dense=True, return_sparse=lexical
+    )
+    weights = [lexical_to_dict(item) for item in result["lexical_weights"]] if lexical else None
+    return np.asarray(result["dense_vecs"], dtype=np.float32), weights
+
+
+def encode_texts(
+    store: Optional[EmbeddingStore],
+    texts: List[str],
+    lexical: bool = False,
+) -> Tuple[np.ndarray, Optional[List[Dict[str, float]]], int]:
+    """Encode ``texts``, reusing stored outputs; returns (vectors, lexical weights, newly encoded count).
+
+    Lexical weights are only produced (and only required from the store) when
+    ``lexical`` is set. The embedding model is only loaded once a text is
+    missing from the store.
+    """
+    if store is None:
+        vectors, weights = _encode(texts, lexical)
+        return vectors, weights, len(texts)
+    hashes = [text_hash(text) for text in texts]
+    cached = store.lookup(hashes)
+    cached_weights = store.lookup_lexical(hashes) if lexical else {}
+    missing = [
+        idx for idx, key in enumerate(hashes) if key not in cached or (lexical and key not in cached_weights)
+    ]
+    vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    weights: Optional[List[Dict[str, float]]] = [{} for _ in texts] if lexical else None
+    if missing:
+        missing_hashes = [hashes[idx] for idx in missing]
+        encoded, encoded_weights = _encode([texts[idx] for idx in missing], lexical)
+        store.add(missing_hashes, encoded)
+        vectors[missing] = encoded
+        if encoded_weights is not None:
+            store.add_lexical(missing_hashes, encoded_weights)
+            for idx, value in zip(missing, encoded_weights):
+                weights[idx] = value
+    missing_set = set(missing)
+    for idx, key in enumerate(hashes):
+        if idx in missing_set:
+            continue
+        vectors[idx] = cached[key]
+        if weights is not None:
+            weights[idx] = cached_weights[key]
+    return vectors, weights, len(missing)
+
+
+@dataclass
+class IndexingStats:
+    """Counters for the end-of-run throughput report."""
+
+    upserted: int = 0
+    encoded: int = 0
+    batches: int = 0
+    encode_seconds: float = 0.0
+    upsert_seconds: float = 0.0
+    barrier_seconds: float = 0.0
+    wall_seconds: float = 0.0
+
+    def report(self) -> str:
+        rate = self.upserted / self.wall_seconds if self.wall_seconds else 0.0
+        mean_batch = self.upserted / self.batches if self.batches else 0.0
+        return (
+            f"{self.upserted} chunks in {self.wall_seconds:.1f}s ({rate:.1f} chunks/s), "
+            f"{self.batches} batches (mean {mean_batch:.1f}), encode {self.encode_seconds:.1f}s, "
+            f"upsert {self.upsert_seconds:.1f}s across workers, barrier {self.barrier_seconds:.1f}s"
+        )
+
+
+def _upsert(client: QdrantClient, collection: str, points: List[qmodels.PointStruct]) -> float:
+    start = time.perf_counter()
+    client.upsert(collection_name=collection, wait=False, points=points)
+    return time.perf_counter() - start
+
+
+def wait_for_points(client: QdrantClient, collection: str, expected: int, timeout: float) -> bool:
+    """Block until the collection holds at least ``expected`` points."""
+    deadline = time.monotonic() + timeout
+    while True:
+        count = client.count(collection_name=collection, exact=True).count
+        if count >= expected:
+            if count > expected:
+                logger.warning(
+                    "Qdrant collection %s has %s points, %s more than the chunk file", collection, count, count - expected
+                )
+            return True
+        if time.monotonic() >= deadline:
+            logger.warning(
+                "Qdrant collection %s has %s points after %.0fs, expected %s", collection, count, timeout, expected
+            )
+            return False
+        time.sleep(0.2)
+
+
+def index_chunks(
+    client: QdrantClient,
+    collection: str,
+    chunks: Iterable[Chunk],
+    store: Optional[EmbeddingStore],
+) -> IndexingStats:
+    """Encode and upsert ``chunks`` with encoding overlapping the upsert round trips.
+
+    Upserts are sent with ``wait=False`` from a small thread pool; at most
+    ``index_upsert_concurrency`` requests are in flight, so encoding only
+    blocks when Qdrant falls behind. The last batch is re-sent with
+    ``wait=True`` as a barrier: Qdrant applies updates in order, so once it
+    returns every earlier upsert has been applied too.
+    """
+    stats = IndexingStats()
+    start = time.perf_counter()
+    concurrency = max(settings.index_upsert_concurrency, 1)
+    in_flight: Deque[Future] = deque()
+    points: List[qmodels.PointStruct] = []
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="qdrant-upsert") as executor:
+        for batch in adaptive_batches(chunks, settings.index_batch_max_tokens, settings.index_batch_max_size):
+            encode_start = time.perf_counter()
+            embeddings, _weights, batch_encoded = encode_texts(
+                store, [chunk.text for chunk in batch], lexical=settings.lexical_retrieval
+            )
+            stats.encode_seconds += time.perf_counter() - encode_start
+            stats.encoded += batch_encoded
+            stats.batches += 1
+            points = [
+                qmodels.PointStruct(
+                    id=point_id_for(chunk.chunk_id),
+                    vector=vector.tolist(),
+                    payload={"chunk_id": chunk.chunk_id, "lang": chunk.lang},
+                )
+                for chunk, vector in zip(batch, embeddings)
+            ]
+            while len(in_flight) >= concurrency:
+                stats.upsert_seconds += in_flight.popleft().result()
+            in_flight.append(executor.submit(_upsert, client, collection, points))
+            stats.upserted += len(points)
+        while in_flight:
+            stats.upsert_seconds += in_flight.popleft().result()
+    if points:
+        barrier_start = time.perf_counter()
+        client.upsert(collection_name=collection, wait=True, points=points)
+        stats.barrier_seconds = time.perf_counter() - barrier_start
+    stats.wall_seconds = time.perf_counter() - start
+    return stats
+
+
+def index_local(chunks: Dict[str, Chunk], fingerprints: Dict[str, str], manifest: IngestionManifest) -> None:
+    """Rebuild the in-process dense index used when ``vector_backend=local``.
+
+    The matrix is always rewritten in full; with the embedding store enabled
+    only new or changed chunk texts are actually encoded.
+    """
+    directory = Path(settings.local_index_dir)
+    signature = vectors_signature(f"local:{directory}:ann{settings.local_index_ann_threshold}")
+    if (
+        manifest.is_current(VECTORS_STAGE, signature)
+        and (directory / META_FILE).exists()
+        and manifest.stage(VECTORS_STAGE).items == fingerprints
+    ):
+        logger.info("Local vector index %s is up to date (%s chunks)", directory, len(chunks))
+        published = publish_chunk_store()
+        if published:
+            bump_index_version(*published)
+        return
+
+    ordered = list(chunks.values())
+    position = {chunk.chunk_id: idx for idx, chunk in enumerate(ordered)}
+    vectors = np.zeros((len(ordered), EMBEDDING_DIM), dtype=np.float32)
+    store = open_embedding_store()
+    encoded = 0
+    start = time.perf_counter()
+    try:
+        for batch in adaptive_batches(ordered, settings.index_batch_max_tokens, settings.index_batch_max_size):
+            embeddings, _weights, batch_encoded = encode_texts(
+                store, [chunk.text for chunk in batch], lexical=settings.lexical_retrieval
+            )
+            vectors[[position[chunk.chunk_id] for chunk in batch]] = embeddings
+            encoded += batch_encoded
+    finally:
+        if store is not None:
+            store.flush()
+    write_local_index(directory, [(chunk.chunk_id, chunk.lang) for chunk in ordered], vectors, quantization_mode())
+    manifest.record(VECTORS_STAGE, signature, fingerprints)
+    manifest.save()
+    bump_index_version("vectors", *publish_chunk_store())
+    logger.info(
+        "Wrote %s vectors to local index %s (%s freshly encoded) in %.1fs",
+        len(ordered),
+        directory,
+        encoded,
+        time.perf_counter() - start,
+    )
+
+
+def copy_points(client: QdrantClient, source: str, target: str, skip: Iterable[str]) -> int:
+    """Copy every point of ``source`` except ``skip`` (point ids) into ``target``, vectors included."""
+    skip_ids = set(skip)
+    copied = 0
+    offset = None
+    while True:
+        records, offset = client.scroll(
+            collection_name=source,
+            limit=settings.index_batch_max_size,
+            offset=offset,
+            with_payload=True,
+            with_vectors=True,
+        )
+        points = [
+            qmodels.PointStruct(id=record.id, vector=record.vector, payload=record.payload)
+            for record in records
+            if str(record.id) not in skip_ids
+        ]
+        if points:
+            client.upsert(collection_name=target, wait=False, points=points)
+            copied += len(points)
+        if offset is None:
+            return copied
+
+
+def index_qdrant(chunks: Dict[str, Chunk], fingerprints: Dict[str, str], manifest: IngestionManifest) -> None:
+    """Build a new ``<alias>_<stamp>`` collection and atomically swap the ``qdrant_collection`` alias to it.
+
+    Incremental runs copy the unchanged points (with their vectors) from the
+    live collection and only encode new or changed chunks; full rebuilds
+    encode everything. Either way the live collection is never modified, so
+    in-flight searches never see a half-applied update.
+    """
+    alias = settings.qdrant_collection
+    client = QdrantClient(url=settings.qdrant_url, api_key=settings.qdrant_api_key or None)
+    signature = vectors_signature(alias)
+    live = alias_target(client, alias) or (alias if client.collection_exists(alias) else None)
+    incremental = manifest.is_current(VECTORS_STAGE, signature) and live is not None
+    if incremental:
+        upserts, removed = diff_items(manifest.stage(VECTORS_STAGE).items, fingerprints)
+        if not upserts and not removed:
+            logger.info("Qdrant collection %s is up to date (%s chunks)", live, len(chunks))
+            published = publish_chunk_store()
+            if published:
+                bump_index_version(*published)
+            return
+    else:
+        upserts, removed = list(chunks), []
+    collection = f"{alias}_{new_version_stamp()}"
+    ensure_collection(client, collection)
+    if incremental:
+        copied = copy_points(client, live, collection, (point_id_for(chunk_id) for chunk_id in [*upserts, *removed]))
+        logger.info("Copied %s unchanged points from %s into %s", copied, live, collection)
+
+    store = open_embedding_store()
+    try:
+        stats = index_chunks(client, collection, (chunks[chunk_id] for chunk_id in upserts), store)
+    finally:
+        if store is not None:
+            store.flush()
+    if not wait_for_points(client, collection, len(chunks), settings.index_consistency_timeout):
+        logger.error("Dropping incomplete Qdrant collection %s; rerun index_vectors", collection)
+        client.delete_collection(collection_name=collection)
+        return
+    swap_alias(client, alias, collection)
+    prune_collections(client, alias, settings.index_keep_versions)
+
+    manifest.record(VECTORS_STAGE, signature, fingerprints)
+    manifest.save()
+    bump_index_version("vectors", *publish_chunk_store())
+    logger.info(
+        "Indexed %s chunks into Qdrant collection %s (%s freshly encoded, %s removed, %s)",
+        len(chunks),
+        collection,
+        stats.encoded,
+        len(removed),
+        "incremental" if incremental else "full rebuild",
+    )
+    logger.info("Vector indexing throughput: %s", stats.report())
+
+
+def index_lexical(chunks: Dict[str, Chunk], fingerprints: Dict[str, str], manifest: IngestionManifest) -> None:
+    """Rebuild the BGE-M3 lexical inverted index when any chunk changed.
+
+    The dense stages above already put lexical weights in the embedding
+    store, so with the store enabled this normally encodes nothing.
+    """
+    directory = Path(settings.lexical_index_dir)
+    signature = f"lexical-v2:{MODEL_NAME}:{directory}"
+    if (
+        manifest.is_current(LEXICAL_STAGE, signature)
+        and (directory / LEXICAL_META_FILE).exists()
+        and manifest.stage(LEXICAL_STAGE).items == fingerprints
+    ):
+        logger.info("Lexical index %s is up to date (%s chunks)", directory, len(chunks))
+        return
+
+    ordered = list(chunks.values())
+    position = {chunk.chunk_id: idx for idx, chunk in enumerate(ordered)}
+    weights: List[Dict[str, float]] = [{} for _ in ordered]
+    store = open_embedding_store()
+    encoded = 0
+    try:
+        for batch in adaptive_batches(ordered, settings.index_batch_max_tokens, settings.index_batch_max_size):
+            _vectors, batch_weights, batch_encoded = encode_texts(store, [chunk.text for chunk in batch], lexical=True)
+            for chunk, value in zip(batch, batch_weights):
+                weights[position[chunk.chunk_id]] = value
+            encoded += batch_encoded
+    finally:
+        if store is not None:
+            store.flush()
+    write_lexical_index(directory, [(chunk.chunk_id, chunk.lang) for chunk in ordered], weights)
+    manifest.record(LEXICAL_STAGE, signature, fingerprints)
+    manifest.save()
+    bump_index_version("lexical")
+    logger.info("Wrote lexical index %s for %s chunks (%s freshly encoded)", directory, len(ordered), encoded)
+
+
 def main() -> None:
     logging.basicConfig(level=settings.log_level)
     chunks_path = settings.chunks_path_obj
@@ -67,36 +483,15 @@ def main() -> None:
         logger.error("Chunk file %s does not exist. Run chunking first.", chunks_path)
         return
 
-    client = QdrantClient(url=settings.qdrant_url, api_key=settings.qdrant_api_key or None)
-    ensure_collection(client, settings.qdrant_collection)
-    embedder = get_bge_m3_embedder()
-
-    count = 0
-    for batch in chunk_batches(load_chunks(chunks_path), BATCH_SIZE):
-        texts = [chunk.text for chunk in batch]
-        embeddings = embedder.encode_corpus(texts)["dense_vecs"]
-        points = []
-        for chunk, vector in zip(batch, embeddings):
-            count += 1
-            payload = chunk.model_dump()
-            point_id = str(uuid.uuid5(uuid.NAMESPACE_DNS, chunk.chunk_id))
-            points.append(
-                qmodels.PointStruct(
-                    id=point_id,
-                    vector=vector.tolist(),
-                    payload=payload,
-                )
-            )
-        client.upsert(
-            collection_name=settings.qdrant_collection,
-            wait=True,
-            points=points,
-        )
-    logger.info(
-        "Indexed %s chunks into Qdrant collection %s",
-        count,
-        settings.qdrant_collection,
-    )
+    chunks = {chunk.chunk_id: chunk for chunk in load_chunks(chunks_path)}
+    fingerprints = fingerprint_chunks(chunks.values())
+    manifest = IngestionManifest.load()
+    if settings.vector_backend.lower() == "local":
+        index_local(chunks, fingerprints, manifest)
+    else:
+        index_qdrant(chunks, fingerprints, manifest)
+    if settings.lexical_retrieval:
+        index_lexical(chunks, fingerprints, manifest)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,119 @@
+"""Content-hash manifest that lets every ingestion step skip unchanged work."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from pydantic import BaseModel, Field, PrivateAttr
+
+from app.config import settings
+from app.models.chunk import Chunk
+from app.utils.hashing import text_hash
+
+logger = logging.getLogger(__name__)
+
+
+class StageRecord(BaseModel):
+    """What one ingestion stage last produced.
+
+    ``signature`` captures the settings/schema the stage ran with; a mismatch
+    forces a full rebuild of that stage. ``items`` maps a guideline_id or
+    chunk_id to the hash it was built from.
+    """
+
+    signature: str = ""
+    items: Dict[str, str] = Field(default_factory=dict)
+
+
+class IngestionManifest(BaseModel):
+    """Per-PDF content hashes and per-chunk fingerprints for each stage."""
+
+    stages: Dict[str, StageRecord] = Field(default_factory=dict)
+    _recorded: Set[str] = PrivateAttr(default_factory=set)
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> "IngestionManifest":
+        path = Path(path or settings.manifest_path)
+        if not path.exists():
+            return cls()
+        try:
+            with path.open("r", encoding="utf-8") as handle:
+                return cls(**json.load(handle))
+        except (OSError, ValueError) as exc:
+            logger.warning("Ignoring unreadable ingestion manifest %s: %s", path, exc)
+            return cls()
+
+    def save(self, path: Optional[Path] = None) -> None:
+        """Write the stages recorded by this process on top of the file on disk.
+
+        Stages written by other ingestion steps since :meth:`load` are kept,
+        so e.g. ``index_bm25`` and ``index_vectors`` can run side by side.
+        """
+        path = Path(path or settings.manifest_path)
+        merged = IngestionManifest.load(path)
+        for name in self._recorded:
+            merged.stages[name] = self.stages[name]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f"{path.suffix}.{os.getpid()}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(merged.model_dump(), handle, indent=1, sort_keys=True)
+        os.replace(tmp_path, path)
+
+    def stage(self, name: str) -> StageRecord:
+        return self.stages.setdefault(name, StageRecord())
+
+    def is_current(self, name: str, signature: str) -> bool:
+        """True when incremental mode is on and ``name`` last ran with ``signature``."""
+        record = self.stages.get(name)
+        return settings.ingest_incremental and record is not None and record.signature == signature
+
+    def record(self, name: str, signature: str, items: Dict[str, str]) -> None:
+        self.stages[name] = StageRecord(signature=signature, items=dict(items))
+        self._recorded.add(name)
+
+
+def file_hash(path: Path | str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        while True:
+            block = handle.read(block_size)
+            if not block:
+                break
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_fingerprint(chunk: Chunk) -> str:
+    """Hash of everything an index stores for a chunk, not just its text."""
+    return text_hash(json.dumps(chunk.model_dump(), sort_keys=True))
+
+
+def diff_items(previous: Dict[str, str], current: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    """Return (added or changed keys, removed keys) between two hash maps."""
+    upserts = [key for key, value in current.items() if previous.get(key) != value]
+    removed = [key for key in previous if key not in current]
+    return upserts, removed
+
+
+def fingerprint_chunks(chunks: Iterable[Chunk]) -> Dict[str, str]:
+    return {chunk.chunk_id: chunk_fingerprint(chunk) for chunk in chunks}
+
+
+def read_rows_by_guideline(path: Path, guideline_ids: Set[str]) -> Dict[str, List[str]]:
+    """Return raw JSONL rows from a previous run, grouped by guideline_id."""
+    rows: Dict[str, List[str]] = {}
+    if not guideline_ids or not path.exists():
+        return rows
+    with path.open("r", encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            guideline_id = json.loads(line)["guideline_id"]
+            if guideline_id in guideline_ids:
+                rows.setdefault(guideline_id, []).append(line if line.endswith("\n") else line + "\n")
+    return rows
@@ -4,21 +4,44 @@ from __future__ import annotations
 
 import json
 import logging
+import os
 import re
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import fitz
 
 from app.config import settings
+from app.ingestion.manifest import IngestionManifest, file_hash, read_rows_by_guideline
 from app.ingestion.scan_guidelines import discover_guidelines
 from app.models.document import DocumentMeta, Paragraph, Section
+from app.utils.tokenization import count_tokens, get_cl100k_encoding, tokenizer_name
+
+if TYPE_CHECKING:
+    import tiktoken
 
 logger = logging.getLogger(__name__)
 
 SECTION_PATTERN = re.compile(r"^(?P<num>\d+(?:\.\d+)*)(?:\s+)(?P<title>.+)$")
 UPPER_SECTION_PATTERN = re.compile(r"^[A-Z0-9 ,;:/()-]{6,}$")
 
+PARSE_STAGE = "parse"
+PARSER_VERSION = "parse-v2"
+
+PageBlocks = List[Tuple[int, List[str]]]
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Optional["tiktoken.Encoding"]:
+    return get_cl100k_encoding("counting paragraph tokens")
+
+
+def parse_signature() -> str:
+    """Parser version plus tokenizer, since paragraphs carry their token counts."""
+    return f"{PARSER_VERSION}:{tokenizer_name(_encoding())}"
+
 
 def normalize_block_text(text: str) -> str:
     parts = [line.strip() for line in text.splitlines() if line.strip()]
@@ -51,9 +74,33 @@ def iter_page_paragraphs(page: fitz.Page) -> Iterable[str]:
             yield text
 
 
-def parse_document(meta: DocumentMeta) -> List[Paragraph]:
-    """Parse a single PDF into paragraphs."""
-    doc = fitz.open(meta.source_path)
+def extract_page_blocks(source_path: str, page_start: int, page_end: int) -> PageBlocks:
+    """Return cleaned text blocks for pages ``[page_start, page_end)`` of a PDF.
+
+    This is the expensive PyMuPDF part of parsing and is safe to run in a
+    worker process; section detection happens afterwards in document order.
+    """
+    doc = fitz.open(source_path)
+    try:
+        last_page = min(page_end, doc.page_count)
+        return [
+            (page_index + 1, list(iter_page_paragraphs(doc[page_index])))
+            for page_index in range(page_start, last_page)
+        ]
+    finally:
+        doc.close()
+
+
+def page_count(source_path: str) -> int:
+    doc = fitz.open(source_path)
+    try:
+        return doc.page_count
+    finally:
+        doc.close()
+
+
+def build_paragraphs(meta: DocumentMeta, page_blocks: Iterable[Tuple[int, List[str]]]) -> List[Paragraph]:
+    """Turn ordered page blocks into paragraphs, tracking the current section."""
     paragraphs: List[Paragraph] = []
     section_counter = 0
     current_section = Section(
@@ -63,9 +110,8 @@ def parse_document(meta: DocumentMeta) -> List[Paragraph]:
     )
     order = 0
 
-    for page_index in range(doc.page_count):
-        page_number = page_index + 1
-        for block_text in iter_page_paragraphs(doc[page_index]):
+    for page_number, blocks in page_blocks:
+        for block_text in blocks:
             detected = detect_section(block_text)
             if detected:
                 section_counter += 1
@@ -90,13 +136,57 @@ def parse_document(meta: DocumentMeta) -> List[Paragraph]:
                     page=page_number,
                     order=order,
                     text=block_text,
+                    token_count=count_tokens(block_text, _encoding()),
                 )
             )
-    doc.close()
     logger.debug("Parsed %s paragraphs from %s", len(paragraphs), meta.source_path)
     return paragraphs
 
 
+def parse_document(meta: DocumentMeta) -> List[Paragraph]:
+    """Parse a single PDF into paragraphs."""
+    blocks = extract_page_blocks(meta.source_path, 0, page_count(meta.source_path))
+    return build_paragraphs(meta, blocks)
+
+
+def parse_documents_parallel(
+    metas: List[DocumentMeta],
+    workers: int,
+    pages_per_task: int,
+) -> Iterator[Tuple[DocumentMeta, List[Paragraph]]]:
+    """Parse documents on a process pool, yielding them in input order.
+
+    Every document is split into page ranges of ``pages_per_task`` pages and
+    all ranges are submitted up front, so large guidelines are spread across
+    workers too. Results are stitched back per document in page order before
+    section detection, which keeps the output identical to sequential parsing.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        plan: List[Tuple[DocumentMeta, List[Future]]] = []
+        for meta in metas:
+            total_pages = page_count(meta.source_path)
+            futures = [
+                pool.submit(extract_page_blocks, meta.source_path, start, start + pages_per_task)
+                for start in range(0, total_pages, pages_per_task)
+            ]
+            plan.append((meta, futures))
+        for meta, futures in plan:
+            blocks: PageBlocks = []
+            for future in futures:
+                blocks.extend(future.result())
+            yield meta, build_paragraphs(meta, blocks)
+
+
+def parse_documents(metas: List[DocumentMeta]) -> Iterator[Tuple[DocumentMeta, List[Paragraph]]]:
+    workers = settings.parse_workers or os.cpu_count() or 1
+    if workers <= 1:
+        for meta in metas:
+            yield meta, parse_document(meta)
+        return
+    logger.info("Parsing %s PDFs with %s worker processes", len(metas), workers)
+    yield from parse_documents_parallel(metas, workers, max(settings.parse_pages_per_task, 1))
+
+
 def parse_all_guidelines() -> None:
     logging.basicConfig(level=settings.log_level)
     logger.info("Starting PDF parsing from %s", settings.guideline_root)
@@ -107,12 +197,39 @@ def parse_all_guidelines() -> None:
 
     output_path = settings.parsed_docs_path_obj
     output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    manifest = IngestionManifest.load()
+    content_hashes = {meta.guideline_id: file_hash(meta.source_path) for meta in metas}
+    previous: Dict[str, str] = {}
+    if manifest.is_current(PARSE_STAGE, parse_signature()):
+        previous = manifest.stage(PARSE_STAGE).items
+    unchanged = {
+        guideline_id
+        for guideline_id, content_hash in content_hashes.items()
+        if previous.get(guideline_id) == content_hash
+    }
+    reused = read_rows_by_guideline(output_path, unchanged)
+    to_parse = [meta for meta in metas if meta.guideline_id not in reused]
+    logger.info("Reusing %s unchanged guidelines; parsing %s", len(reused), len(to_parse))
+
+    parsed = parse_documents(to_parse)
+    tmp_path = output_path.with_suffix(output_path.suffix + ".tmp")
     total = 0
-    with output_path.open("w", encoding="utf-8") as handle:
+    with tmp_path.open("w", encoding="utf-8") as handle:
         for meta in metas:
-            for paragraph in parse_document(meta):
+            if meta.guideline_id in reused:
+                rows = reused[meta.guideline_id]
+                handle.writelines(rows)
+                total += len(rows)
+                continue
+            _meta, paragraphs = next(parsed)
+            for paragraph in paragraphs:
                 total += 1
                 handle.write(json.dumps(paragraph.model_dump()) + "\n")
+    parsed.close()
+    os.replace(tmp_path, output_path)
+    manifest.record(PARSE_STAGE, parse_signature(), content_hashes)
+    manifest.save()
     logger.info("Wrote %s paragraph rows to %s", total, output_path)
 
 
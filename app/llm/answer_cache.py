@@ -0,0 +1,85 @@
+"""In-process cache of generated answers keyed by question and evidence."""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional, Tuple
+
+from app.llm.prompts import PROMPT_TEMPLATE_HASH, format_evidence_block
+from app.models.retrieval import EvidenceBlock
+from app.utils import metrics
+from app.utils.hashing import normalize_question, text_hash
+from app.utils.index_version import current_index_version
+
+cache_requests = metrics.counter(
+    "answer_cache_requests_total",
+    "Answer cache lookups by result.",
+    labelnames=("result",),
+)
+
+
+def answer_cache_key(question: str, evidences: Iterable[EvidenceBlock], model: str) -> str:
+    """Hash the normalized question, the evidence blocks as rendered into the prompt, template and model.
+
+    Hashing the rendered blocks means any field that reaches the prompt
+    (year, pages, recommendation class/LOE, ...) is part of the key.
+    """
+    rendered = [format_evidence_block(block) for block in evidences]
+    parts = [model, PROMPT_TEMPLATE_HASH, normalize_question(question), *rendered]
+    return text_hash("\x00".join(parts))
+
+
+class AnswerCache:
+    """TTL + max-bytes LRU cache of final answers.
+
+    Entries are dropped wholesale when the index version changes, since a
+    rebuilt index may carry different text under the same evidence ids.
+    """
+
+    def __init__(self, ttl_seconds: float, max_bytes: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._bytes = 0
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _sync_version(self) -> None:
+        version = current_index_version()
+        if version != self._version:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+
+    def _drop(self, key: str) -> None:
+        _answer, _expires, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            self._sync_version()
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] < time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                cache_requests.inc(result="miss")
+                return None
+            self._entries.move_to_end(key)
+        cache_requests.inc(result="hit")
+        return entry[0]
+
+    def put(self, key: str, answer: str) -> None:
+        size = len(answer.encode("utf-8")) + len(key)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._sync_version()
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (answer, time.monotonic() + self.ttl_seconds, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
@@ -2,25 +2,91 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List
+from typing import AsyncIterator, Iterable, List
 
 from app.config import settings
+from app.llm.answer_cache import AnswerCache, answer_cache_key
 from app.llm.openai_client import OpenAIChatClient
 from app.llm.prompts import SYSTEM_PROMPT, build_user_prompt
 from app.models.retrieval import EvidenceBlock
+from app.utils.tracing import stage
 
 
 class AnswerGenerator:
     """Generates guideline-grounded answers."""
 
-    def __init__(self, client: OpenAIChatClient | None = None) -> None:
+    def __init__(
+        self,
+        client: OpenAIChatClient | None = None,
+        cache: AnswerCache | None = None,
+    ) -> None:
         self.client = client or OpenAIChatClient()
+        if cache is None and settings.answer_cache_ttl_seconds > 0 and settings.answer_cache_max_bytes > 0:
+            cache = AnswerCache(
+                ttl_seconds=settings.answer_cache_ttl_seconds,
+                max_bytes=settings.answer_cache_max_bytes,
+            )
+        self.cache = cache
 
-    def generate(self, question: str, evidences: Iterable[EvidenceBlock]) -> str:
-        evidence_list = list(evidences)
-        prompt = build_user_prompt(question, evidence_list)
-        raw_answer = self.client.complete(SYSTEM_PROMPT, prompt)
+    @staticmethod
+    def _with_disclaimer(raw_answer: str) -> str:
         disclaimer = settings.medical_disclaimer.strip()
         if disclaimer.lower() not in raw_answer.lower():
             raw_answer = f"{raw_answer.rstrip()}\n\n{disclaimer}."
         return raw_answer.strip()
+
+    def _cache_key(self, question: str, evidence_list: List[EvidenceBlock]) -> str | None:
+        if self.cache is None:
+            return None
+        return answer_cache_key(question, evidence_list, self.client.model)
+
+    def generate(self, question: str, evidences: Iterable[EvidenceBlock]) -> str:
+        evidence_list = list(evidences)
+        key = self._cache_key(question, evidence_list)
+        if key is not None and (cached := self.cache.get(key)) is not None:
+            return cached
+        prompt = build_user_prompt(question, evidence_list)
+        with stage("llm"):
+            raw_answer = self.client.complete(SYSTEM_PROMPT, prompt)
+        answer = self._with_disclaimer(raw_answer)
+        if key is not None:
+            self.cache.put(key, answer)
+        return answer
+
+    async def agenerate(self, question: str, evidences: Iterable[EvidenceBlock]) -> str:
+        evidence_list = list(evidences)
+        key = self._cache_key(question, evidence_list)
+        if key is not None and (cached := self.cache.get(key)) is not None:
+            return cached
+        prompt = build_user_prompt(question, evidence_list)
+        with stage("llm"):
+            raw_answer = await self.client.acomplete(SYSTEM_PROMPT, prompt)
+        answer = self._with_disclaimer(raw_answer)
+        if key is not None:
+            self.cache.put(key, answer)
+        return answer
+
+    async def astream(self, question: str, evidences: Iterable[EvidenceBlock]) -> AsyncIterator[str]:
+        """Stream answer text as it is generated, ending with the disclaimer.
+
+        Concatenating the yielded pieces gives the same text as
+        :meth:`agenerate` up to surrounding whitespace.
+        """
+        evidence_list = list(evidences)
+        key = self._cache_key(question, evidence_list)
+        if key is not None and (cached := self.cache.get(key)) is not None:
+            yield cached
+            return
+        prompt = build_user_prompt(question, evidence_list)
+        parts: List[str] = []
+        with stage("llm"):
+            async for delta in self.client.astream(SYSTEM_PROMPT, prompt):
+                parts.append(delta)
+                yield delta
+        raw_answer = "".join(parts)
+        answer = self._with_disclaimer(raw_answer)
+        streamed = raw_answer.strip()
+        if answer != streamed and answer.startswith(streamed):
+            yield answer[len(streamed) :]
+        if key is not None:
+            self.cache.put(key, answer)
@@ -2,9 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Optional
-
-from openai import OpenAI
+from typing import AsyncIterator, Optional
 
 from app.config import settings
 
@@ -21,8 +19,29 @@ class OpenAIChatClient:
         api_key = api_key or settings.openai_api_key
         if not api_key:
             raise ValueError("OPENAI_API_KEY is not configured in the environment.")
+        from openai import AsyncOpenAI, OpenAI
+
         self.model = model or settings.openai_model_chat
-        self.client = OpenAI(api_key=api_key, base_url=base_url or settings.openai_base_url)
+        base_url = base_url or settings.openai_base_url
+        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.async_client = AsyncOpenAI(api_key=api_key, base_url=base_url)
+
+    def _request(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float,
+        max_output_tokens: int,
+    ) -> dict:
+        return {
+            "model": self.model,
+            "temperature": temperature,
+            "max_output_tokens": max_output_tokens,
+            "input": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_prompt},
+            ],
+        }
 
     def complete(
         self,
@@ -32,16 +51,41 @@ class OpenAIChatClient:
         max_output_tokens: int = 800,
     ) -> str:
         response = self.client.responses.create(
-            model=self.model,
-            temperature=temperature,
-            max_output_tokens=max_output_tokens,
-            input=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
+            **self._request(system_prompt, user_prompt, temperature, max_output_tokens)
+        )
+        return self._extract_text(response)
+
+    async def acomplete(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        max_output_tokens: int = 800,
+    ) -> str:
+        """Async variant of :meth:`complete` that does not block the event loop."""
+        response = await self.async_client.responses.create(
+            **self._request(system_prompt, user_prompt, temperature, max_output_tokens)
         )
         return self._extract_text(response)
 
+    async def astream(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        temperature: float = 0.2,
+        max_output_tokens: int = 800,
+    ) -> AsyncIterator[str]:
+        """Yield output text deltas as the Responses API streams them."""
+        stream = await self.async_client.responses.create(
+            **self._request(system_prompt, user_prompt, temperature, max_output_tokens),
+            stream=True,
+        )
+        async for event in stream:
+            if getattr(event, "type", None) == "response.output_text.delta":
+                delta = getattr(event, "delta", None)
+                if delta:
+                    yield delta
+
     @staticmethod
     def _extract_text(response) -> str:
         chunks: list[str] = []
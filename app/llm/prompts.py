@@ -5,6 +5,7 @@ from __future__ import annotations
 from typing import Iterable, List
 
 from app.models.retrieval import EvidenceBlock
+from app.utils.hashing import text_hash
 
 SYSTEM_PROMPT = """You are MedAgenticSystem, a clinical guideline assistant for cardiovascular care.
 Use only the provided evidence blocks to answer clinician questions.
@@ -26,10 +27,8 @@ def format_evidence_block(block: EvidenceBlock) -> str:
     )
 
 
-def build_user_prompt(question: str, evidences: Iterable[EvidenceBlock]) -> str:
-    evidence_sections = "\n\n".join(format_evidence_block(block) for block in evidences)
-    return f"""Question:
-{question.strip()}
+USER_PROMPT_TEMPLATE = """Question:
+{question}
 
 Evidence:
 {evidence_sections}
@@ -39,3 +38,13 @@ Instructions:
 - Support every conclusion with a citation such as [Doc 1].
 - Mention recommendation class/level when available.
 - End with a brief safety disclaimer."""
+
+PROMPT_TEMPLATE_HASH = text_hash(SYSTEM_PROMPT + "\x00" + USER_PROMPT_TEMPLATE)[:16]
+
+
+def build_user_prompt(question: str, evidences: Iterable[EvidenceBlock]) -> str:
+    evidence_sections = "\n\n".join(format_evidence_block(block) for block in evidences)
+    return USER_PROMPT_TEMPLATE.format(
+        question=question.strip(),
+        evidence_sections=evidence_sections,
+    )
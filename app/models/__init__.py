@@ -2,10 +2,12 @@
 
 from .chunk import Chunk, ChunkMeta
 from .document import DocumentMeta, Paragraph, Section
-from .qa import QARequest, QAResponse
-from .retrieval import EvidenceBlock, RetrievedChunk, RetrievalRequest, RetrievalResponse
+from .qa import BatchQARequest, BatchQAResult, QARequest, QAResponse
+from .retrieval import EvidenceBlock, RetrievedChunk, RetrievalRequest, RetrievalResponse, ScoredHit
 
 __all__ = [
+    "BatchQARequest",
+    "BatchQAResult",
     "Chunk",
     "ChunkMeta",
     "DocumentMeta",
@@ -16,5 +18,6 @@ __all__ = [
     "RetrievedChunk",
     "RetrievalRequest",
     "RetrievalResponse",
+    "ScoredHit",
     "Section",
 ]
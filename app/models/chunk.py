@@ -27,4 +27,5 @@ class Chunk(ChunkMeta):
 
     chunk_id: str
     text: str
+    token_count: Optional[int] = None
     metadata: Dict[str, Any] = Field(default_factory=dict)
@@ -41,3 +41,4 @@ class Paragraph(BaseModel):
     order: int
     lang: str = "en"
     text: str
+    token_count: Optional[int] = None
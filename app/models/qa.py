@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Optional
 
 from pydantic import BaseModel, Field
 
+from app.config import settings
+
 from .retrieval import EvidenceBlock
 
 
@@ -13,6 +15,7 @@ class QARequest(BaseModel):
     """Incoming question payload."""
 
     question: str = Field(..., min_length=3)
+    include_timings: bool = False
 
 
 class QAResponse(BaseModel):
@@ -20,3 +23,20 @@ class QAResponse(BaseModel):
 
     answer: str
     evidences: List[EvidenceBlock]
+    timings: Optional[Dict[str, float]] = None
+
+
+class BatchQARequest(BaseModel):
+    """Many questions answered in one call (at most ``batch_max_questions``)."""
+
+    questions: List[str] = Field(..., min_length=1, max_length=settings.batch_max_questions)
+
+
+class BatchQAResult(BaseModel):
+    """One line of a batch answer stream; ``index`` points into the request."""
+
+    index: int
+    question: str
+    answer: Optional[str] = None
+    evidences: List[EvidenceBlock] = Field(default_factory=list)
+    error: Optional[str] = None
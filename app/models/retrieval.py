@@ -2,18 +2,26 @@
 
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
 from .chunk import Chunk
 
 
+class ScoredHit(NamedTuple):
+    """A chunk id and its score from one retrieval leg, before hydration."""
+
+    chunk_id: str
+    score: float
+
+
 class RetrievedChunk(Chunk):
     """Chunk extended with retrieval scores."""
 
     sparse_score: Optional[float] = None
     dense_score: Optional[float] = None
+    lexical_score: Optional[float] = None
     fused_score: Optional[float] = None
     rerank_score: Optional[float] = None
 
@@ -41,6 +49,7 @@ class RetrievalRequest(BaseModel):
     top_k_sparse: int = 32
     top_k_dense: int = 32
     top_k_final: int = 20
+    include_timings: bool = False
 
 
 class RetrievalResponse(BaseModel):
@@ -48,3 +57,4 @@ class RetrievalResponse(BaseModel):
 
     question: str
     evidences: List[EvidenceBlock]
+    timings: Optional[Dict[str, float]] = None
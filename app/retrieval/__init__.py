@@ -1,8 +1,26 @@
-"""Retrieval stack utilities."""
+"""Retrieval stack utilities.
 
-from .bm25_store import BM25Store
-from .hybrid_retriever import HybridRetriever
-from .reranker import Reranker
-from .vector_store import VectorStore
+Exports are resolved on first access so that importing a light submodule
+(e.g. ``app.retrieval.evidence``) does not pull in Qdrant or Tantivy.
+"""
 
-__all__ = ["BM25Store", "HybridRetriever", "Reranker", "VectorStore"]
+from importlib import import_module
+from typing import Any
+
+_EXPORTS = {
+    "BM25Store": ".bm25_store",
+    "HybridRetriever": ".hybrid_retriever",
+    "LocalVectorStore": ".local_vector_store",
+    "Reranker": ".reranker",
+    "RetrievalUnavailable": ".errors",
+    "VectorStore": ".vector_store",
+    "create_vector_store": ".vector_store",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(import_module(_EXPORTS[name], __name__), name)
@@ -4,96 +4,72 @@ from __future__ import annotations
 
 import logging
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Tuple
 
 import tantivy
 
 from app.config import settings
-from app.ingestion.index_bm25 import build_schema
-from app.models.retrieval import RetrievedChunk
+from app.ingestion.index_bm25 import build_schema, resolve_index_dir
+from app.models.retrieval import ScoredHit
 
 logger = logging.getLogger(__name__)
 
 
+def parse_query(index: tantivy.Index, query_text: str) -> tantivy.Query:
+    """Parse ``query_text`` against ``index``'s own schema with the title/section boosts."""
+    escaped = query_text.replace('"', " ").replace("\\", " ").strip()
+    if not escaped:
+        escaped = "*"
+    field_parts = [
+        f'section_title:({escaped})^2.0',
+        f'guideline_title:({escaped})^1.5',
+        f'text:({escaped})^1.0',
+    ]
+    combined = " OR ".join(field_parts)
+    query, errors = index.parse_query_lenient(combined)
+    if errors:
+        logger.debug("Tantivy lenient parse warnings: %s", errors)
+    return query
+
+
 class BM25Store:
-    """Wrapper around a Tantivy index."""
+    """Wrapper around a Tantivy index.
+
+    ``index_dir`` is the root of the versioned layout written by
+    :mod:`app.ingestion.index_bm25`; the store opens whichever build
+    ``CURRENT`` names at construction time and keeps it for its lifetime.
+    """
 
     TEXT_FIELDS = ["text", "section_title", "guideline_title"]
 
     def __init__(self, index_dir: Path | None = None):
         self.index_dir = Path(index_dir or settings.bm25_index_dir)
-        if not self.index_dir.exists():
+        version_dir = resolve_index_dir(self.index_dir)
+        if version_dir is None or not version_dir.exists():
             raise FileNotFoundError(
                 f"BM25 index directory {self.index_dir} does not exist. Run index_bm25 first."
             )
+        self.version_dir = version_dir
         schema = build_schema()
-        self.index = tantivy.Index(schema, path=str(self.index_dir), reuse=True)
+        self.index = tantivy.Index(schema, path=str(self.version_dir), reuse=True)
         self.searcher = self.index.searcher()
+        self._chunk_ids: Dict[Tuple[int, int], str] = {}
 
     def _parse_query(self, query_text: str) -> tantivy.Query:
-        escaped = query_text.replace('"', " ").replace("\\", " ").strip()
-        if not escaped:
-            escaped = "*"
-        field_parts = [
-            f'section_title:({escaped})^2.0',
-            f'guideline_title:({escaped})^1.5',
-            f'text:({escaped})^1.0',
-        ]
-        combined = " OR ".join(field_parts)
-        query, errors = self.index.parse_query_lenient(combined)
-        if errors:
-            logger.debug("Tantivy lenient parse warnings: %s", errors)
-        return query
+        return parse_query(self.index, query_text)
 
-    def search(self, query_text: str, top_k: int = 32) -> List[RetrievedChunk]:
+    def _chunk_id(self, doc_addr: tantivy.DocAddress) -> str:
+        # tantivy-py cannot read fast-field values per hit, so the stored
+        # chunk_id is read once per doc address and cached for this searcher.
+        key = (doc_addr.segment_ord, doc_addr.doc)
+        chunk_id = self._chunk_ids.get(key)
+        if chunk_id is None:
+            chunk_id = self.searcher.doc(doc_addr).get_first("chunk_id") or ""
+            self._chunk_ids[key] = chunk_id
+        return chunk_id
+
+    def search(self, query_text: str, top_k: int = 32) -> List[ScoredHit]:
+        """Return ``(chunk_id, bm25 score)`` pairs; chunks are hydrated after fusion."""
         query = self._parse_query(query_text)
         result = self.searcher.search(query, limit=top_k)
-        retrieved: List[RetrievedChunk] = []
-        for score, doc_addr in result.hits:
-            stored = self.searcher.doc(doc_addr)
-            if hasattr(stored, "to_dict"):
-                stored_fields = stored.to_dict()
-
-                def field_values(key: str, default=None):
-                    return stored_fields.get(key, default)
-
-            else:
-
-                def field_values(key: str, default=None):
-                    value = stored.get(key)
-                    return value if value is not None else default
-
-            page_range = field_values("page_range")
-            parsed_page_range = None
-            if page_range:
-                raw_range = page_range[0] if isinstance(page_range, list) else page_range
-                parts = raw_range.split("-")
-                if len(parts) == 2:
-                    parsed_page_range = (int(parts[0]), int(parts[1]))
-            rec_classes_raw = (field_values("rec_classes") or [""])[0]
-            loe_raw = (field_values("loe_list") or [""])[0]
-            year_value = (field_values("year") or [""])[0]
-            section_id_val = (field_values("section_id") or [""])[0]
-            section_title_val = (field_values("section_title") or [""])[0]
-            org_val = (field_values("organization") or [""])[0]
-            retrieved.append(
-                RetrievedChunk(
-                    chunk_id=field_values("chunk_id", [""])[0],
-                    guideline_id=field_values("guideline_id", [""])[0],
-                    guideline_title=field_values("guideline_title", [""])[0],
-                    section_id=section_id_val or None,
-                    section_title=section_title_val or None,
-                    organization=org_val or None,
-                    year=int(year_value) if year_value else None,
-                    text=field_values("text", [""])[0],
-                    lang=field_values("lang", ["en"])[0],
-                    page_range=parsed_page_range,
-                    rec_class_list=[
-                        item.strip() for item in rec_classes_raw.split(";") if item.strip()
-                    ],
-                    loe_list=[item.strip() for item in loe_raw.split(";") if item.strip()],
-                    sparse_score=float(score),
-                    metadata={},
-                )
-            )
-        return retrieved
+        return [ScoredHit(self._chunk_id(doc_addr), float(score)) for score, doc_addr in result.hits]
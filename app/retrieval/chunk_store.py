@@ -0,0 +1,79 @@
+"""SQLite chunk store that retrieval legs hydrate from after fusion."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from app.config import settings
+from app.models.chunk import Chunk
+
+logger = logging.getLogger(__name__)
+
+CHUNK_STORE_COMPONENT = "chunks"
+
+
+def staged_path(path: Path | str | None = None) -> Path:
+    """Where chunking writes a new chunk store until an index step publishes it."""
+    path = Path(path or settings.chunk_store_path)
+    return path.with_name(f"{path.name}.next")
+
+
+def publish_chunk_store(path: Path | str | None = None) -> List[str]:
+    """Move a chunk store staged by chunking into place.
+
+    Index steps call this right before bumping their own version and bump
+    the returned components with it, so the API swaps the new chunk store in
+    together with an index built from the same chunks rather than under the
+    old indexes. Returns ``["chunks"]`` if a store was published, else ``[]``.
+    """
+    path = Path(path or settings.chunk_store_path)
+    staged = staged_path(path)
+    if not staged.exists():
+        return []
+    os.replace(staged, path)
+    logger.info("Published chunk store %s", path)
+    return [CHUNK_STORE_COMPONENT]
+
+
+class ChunkStore:
+    """Read-only ``chunk_id -> Chunk`` lookups.
+
+    Indexes keep only chunk ids (plus ``lang`` for filtering), so full chunk
+    text and metadata are read here once, for the candidates that survive
+    fusion. The file is written by :func:`app.ingestion.chunking.write_chunk_store`.
+    """
+
+    def __init__(self, path: Path | str | None = None) -> None:
+        self.path = Path(path or settings.chunk_store_path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Chunk store {self.path} does not exist. Run chunking first.")
+        self._db = sqlite3.connect(
+            f"file:{self.path}?mode=ro", uri=True, check_same_thread=False
+        )
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()
+        return count
+
+    def get_many(self, chunk_ids: Sequence[str]) -> Dict[str, Chunk]:
+        unique = list(dict.fromkeys(chunk_ids))
+        if not unique:
+            return {}
+        placeholders = ",".join("?" for _ in unique)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT chunk_id, body FROM chunks WHERE chunk_id IN ({placeholders})", unique
+            ).fetchall()
+        return {chunk_id: Chunk(**json.loads(body)) for chunk_id, body in rows}
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
@@ -2,21 +2,160 @@
 
 from __future__ import annotations
 
+import asyncio
 from functools import lru_cache
-from typing import Iterable, List
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
 
-from FlagEmbedding import BGEM3FlagModel
+from app.config import settings
+from app.retrieval.embedding_cache import QueryEmbeddingCache, QueryEncoding
+from app.utils.batching import MicroBatcher
+from app.utils.concurrency import run_blocking
+
+if TYPE_CHECKING:
+    from FlagEmbedding import BGEM3FlagModel
 
 MODEL_NAME = "BAAI/bge-m3"
 
 
 @lru_cache(maxsize=1)
-def get_bge_m3_embedder() -> BGEM3FlagModel:
-    """Load the embedding model once per process."""
+def get_bge_m3_embedder() -> "BGEM3FlagModel":
+    """Load the embedding model once per process (FlagEmbedding is imported on first use)."""
+    from FlagEmbedding import BGEM3FlagModel
+
     return BGEM3FlagModel(MODEL_NAME, use_fp16=False, devices="cpu")
 
 
-def embed_queries(queries: Iterable[str]) -> List[List[float]]:
+def lexical_to_dict(weights) -> Dict[str, float]:
+    """Plain ``{token_id: weight}`` from FlagEmbedding's lexical weights."""
+    return {str(token): float(weight) for token, weight in weights.items()}
+
+
+def _encode_queries(queries: List[str]) -> List[QueryEncoding]:
     model = get_bge_m3_embedder()
-    result = model.encode_queries(list(queries))["dense_vecs"]
-    return [vec.tolist() for vec in result]
+    lexical = settings.lexical_retrieval
+    result = model.encode_queries(queries, return_dense=True, return_sparse=lexical)
+    lexical_weights = result.get("lexical_weights") if lexical else None
+    return [
+        QueryEncoding(vec.tolist(), lexical_to_dict(lexical_weights[idx]) if lexical_weights is not None else None)
+        for idx, vec in enumerate(result["dense_vecs"])
+    ]
+
+
+@lru_cache(maxsize=1)
+def get_query_batcher() -> MicroBatcher[str, QueryEncoding]:
+    """Batcher that merges concurrent query encodes into one forward pass."""
+    return MicroBatcher(
+        _encode_queries,
+        name="query_embedding",
+        window_ms=settings.query_batch_window_ms,
+        max_batch_size=settings.query_batch_max_size,
+    )
+
+
+@lru_cache(maxsize=1)
+def get_query_cache() -> Optional[QueryEmbeddingCache]:
+    """Return the process-wide query embedding cache, or None when disabled."""
+    if settings.query_cache_size <= 0:
+        return None
+    disk_path = Path(settings.query_cache_path) if settings.query_cache_path else None
+    return QueryEmbeddingCache(
+        MODEL_NAME,
+        max_entries=settings.query_cache_size,
+        disk_path=disk_path,
+        disk_max_entries=settings.query_cache_disk_max_entries,
+    )
+
+
+def _use_batcher(query_list: List[str]) -> bool:
+    return 0 < len(query_list) < settings.query_batch_max_size and settings.query_batch_window_ms > 0
+
+
+def _usable(encoding: Optional[QueryEncoding]) -> bool:
+    return encoding is not None and (not settings.lexical_retrieval or encoding.lexical is not None)
+
+
+def _lookup_cached(query_list: List[str]) -> Tuple[List[Optional[QueryEncoding]], List[str]]:
+    cache = get_query_cache()
+    if cache is None:
+        return [None] * len(query_list), query_list
+    cached = [encoding if _usable(encoding) else None for encoding in cache.get_many(query_list)]
+    missing = [query for query, encoding in zip(query_list, cached) if encoding is None]
+    return cached, missing
+
+
+async def _alookup_cached(query_list: List[str]) -> Tuple[List[Optional[QueryEncoding]], List[str]]:
+    """Like :func:`_lookup_cached`, with the SQLite tier read on the executor."""
+    cache = get_query_cache()
+    if cache is None:
+        return [None] * len(query_list), query_list
+    cached = [encoding if _usable(encoding) else None for encoding in cache.get_memory(query_list)]
+    pending = [idx for idx, encoding in enumerate(cached) if encoding is None]
+    if pending and cache.has_disk:
+        from_disk = await run_blocking(cache.get_disk, [query_list[idx] for idx in pending])
+        for idx, encoding in zip(pending, from_disk):
+            cached[idx] = encoding if _usable(encoding) else None
+    missing = [query for query, encoding in zip(query_list, cached) if encoding is None]
+    return cached, missing
+
+
+def _fill(
+    cached: List[Optional[QueryEncoding]],
+    computed: List[QueryEncoding],
+) -> List[QueryEncoding]:
+    fresh = iter(computed)
+    return [encoding if encoding is not None else next(fresh) for encoding in cached]
+
+
+def _merge_cached(
+    cached: List[Optional[QueryEncoding]],
+    missing: List[str],
+    computed: List[QueryEncoding],
+) -> List[QueryEncoding]:
+    cache = get_query_cache()
+    if cache is not None and missing:
+        cache.put_many(missing, computed)
+    return _fill(cached, computed)
+
+
+def encode_queries(queries: Iterable[str]) -> List[QueryEncoding]:
+    """Dense vectors plus lexical weights (when enabled) from one forward pass."""
+    query_list = list(queries)
+    if not query_list:
+        return []
+    cached, missing = _lookup_cached(query_list)
+    computed: List[QueryEncoding] = []
+    if missing:
+        if _use_batcher(missing):
+            computed = get_query_batcher().run(missing)
+        else:
+            computed = _encode_queries(missing)
+    return _merge_cached(cached, missing, computed)
+
+
+async def aencode_queries(queries: Iterable[str]) -> List[QueryEncoding]:
+    """Async variant that awaits the batcher without holding an executor thread."""
+    query_list = list(queries)
+    if not query_list:
+        return []
+    cached, missing = await _alookup_cached(query_list)
+    computed: List[QueryEncoding] = []
+    if missing:
+        if _use_batcher(missing):
+            computed = await asyncio.wrap_future(get_query_batcher().submit(missing))
+        else:
+            computed = await run_blocking(_encode_queries, missing)
+        cache = get_query_cache()
+        if cache is not None:
+            cache.put_memory(missing, computed)
+            if cache.has_disk:
+                await run_blocking(cache.put_disk, missing, computed)
+    return _fill(cached, computed)
+
+
+def embed_queries(queries: Iterable[str]) -> List[List[float]]:
+    return [encoding.dense for encoding in encode_queries(queries)]
+
+
+async def aembed_queries(queries: Iterable[str]) -> List[List[float]]:
+    return [encoding.dense for encoding in await aencode_queries(queries)]
@@ -0,0 +1,214 @@
+"""Two-tier cache for query embeddings keyed by normalized question text."""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from app.utils import metrics
+from app.utils.hashing import question_key
+
+logger = logging.getLogger(__name__)
+
+cache_requests = metrics.counter(
+    "query_embedding_cache_requests_total",
+    "Query embedding cache lookups by tier and result.",
+    labelnames=("tier", "result"),
+)
+
+
+class QueryEncoding(NamedTuple):
+    """Dense vector and, when requested, BGE-M3 lexical weights for one query."""
+
+    dense: List[float]
+    lexical: Optional[Dict[str, float]] = None
+
+
+def _encode_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _decode_vector(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class QueryEmbeddingCache:
+    """In-memory LRU in front of an optional SQLite tier that survives restarts.
+
+    Keys are a hash of the normalized question plus the model name, so a model
+    swap never serves vectors from a different embedding space. Lexical
+    weights are stored alongside the vector when the encoder produced them.
+
+    The tiers have separate locks and entry points: the memory tier is cheap
+    enough to consult on the event loop, while :meth:`get_disk` and
+    :meth:`put_disk` do SQLite I/O and belong on a worker thread.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        max_entries: int = 2048,
+        disk_path: Optional[Path] = None,
+        disk_max_entries: int = 100_000,
+    ) -> None:
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self._memory: "OrderedDict[str, QueryEncoding]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Upper bound on the disk row count (replacements count as inserts); reconciled on eviction.
+        self._disk_rows = 0
+        if disk_path is not None:
+            self._db = self._open_db(Path(disk_path))
+        if self._db is not None:
+            (self._disk_rows,) = self._db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()
+
+    @staticmethod
+    def _open_db(path: Path) -> Optional[sqlite3.Connection]:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS query_embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            db.execute(
+                "CREATE INDEX IF NOT EXISTS query_embeddings_access "
+                "ON query_embeddings(last_access)"
+            )
+            columns = {row[1] for row in db.execute("PRAGMA table_info(query_embeddings)")}
+            if "lexical" not in columns:
+                db.execute("ALTER TABLE query_embeddings ADD COLUMN lexical TEXT")
+            return db
+        except sqlite3.Error as exc:
+            logger.warning("Query embedding disk cache disabled (%s): %s", path, exc)
+            return None
+
+    @property
+    def has_disk(self) -> bool:
+        return self._db is not None
+
+    def _key(self, question: str) -> str:
+        return question_key(question, self.model_name)
+
+    def _remember(self, key: str, encoding: QueryEncoding) -> None:
+        self._memory[key] = encoding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get_memory(self, questions: Sequence[str]) -> List[Optional[QueryEncoding]]:
+        """Memory-tier lookup only; no I/O."""
+        found: List[Optional[QueryEncoding]] = []
+        with self._lock:
+            for question in questions:
+                key = self._key(question)
+                encoding = self._memory.get(key)
+                if encoding is not None:
+                    self._memory.move_to_end(key)
+                    cache_requests.inc(tier="memory", result="hit")
+                else:
+                    cache_requests.inc(tier="memory", result="miss")
+                found.append(encoding)
+        return found
+
+    def get_disk(self, questions: Sequence[str]) -> List[Optional[QueryEncoding]]:
+        """SQLite-tier lookup; hits are promoted into the memory tier."""
+        keys = [self._key(question) for question in questions]
+        unique = list(dict.fromkeys(keys))
+        if self._db is None or not unique:
+            return [None] * len(keys)
+        placeholders = ",".join("?" for _ in unique)
+        with self._db_lock:
+            rows = self._db.execute(
+                f"SELECT key, vector, lexical FROM query_embeddings WHERE key IN ({placeholders})",
+                unique,
+            ).fetchall()
+            if rows:
+                now = time.time()
+                self._db.executemany(
+                    "UPDATE query_embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key, _blob, _lexical in rows],
+                )
+        found = {
+            key: QueryEncoding(_decode_vector(blob), json.loads(lexical) if lexical else None)
+            for key, blob, lexical in rows
+        }
+        with self._lock:
+            for key, encoding in found.items():
+                self._remember(key, encoding)
+        cache_requests.inc(len(found), tier="disk", result="hit")
+        cache_requests.inc(len(unique) - len(found), tier="disk", result="miss")
+        return [found.get(key) for key in keys]
+
+    def get_many(self, questions: Sequence[str]) -> List[Optional[QueryEncoding]]:
+        found = self.get_memory(questions)
+        missing = [idx for idx, encoding in enumerate(found) if encoding is None]
+        if missing and self._db is not None:
+            for idx, encoding in zip(missing, self.get_disk([questions[idx] for idx in missing])):
+                found[idx] = encoding
+        return found
+
+    def put_memory(self, questions: Sequence[str], encodings: Sequence[QueryEncoding]) -> None:
+        with self._lock:
+            for question, encoding in zip(questions, encodings):
+                self._remember(self._key(question), encoding)
+
+    def put_disk(self, questions: Sequence[str], encodings: Sequence[QueryEncoding]) -> None:
+        if self._db is None or not questions:
+            return
+        now = time.time()
+        rows = [
+            (
+                self._key(question),
+                _encode_vector(encoding.dense),
+                json.dumps(encoding.lexical) if encoding.lexical is not None else None,
+                now,
+            )
+            for question, encoding in zip(questions, encodings)
+        ]
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO query_embeddings (key, vector, lexical, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._disk_rows += len(rows)
+            if self._disk_rows > self.disk_max_entries:
+                self._evict_disk()
+
+    def put_many(self, questions: Sequence[str], encodings: Sequence[QueryEncoding]) -> None:
+        self.put_memory(questions, encodings)
+        self.put_disk(questions, encodings)
+
+    def _evict_disk(self) -> None:
+        """Trim the disk tier to 90% of ``disk_max_entries`` so eviction runs once per many puts."""
+        (count,) = self._db.execute("SELECT COUNT(*) FROM query_embeddings").fetchone()
+        overflow = count - int(self.disk_max_entries * 0.9) if count > self.disk_max_entries else 0
+        if overflow > 0:
+            self._db.execute(
+                "DELETE FROM query_embeddings WHERE key IN ("
+                "SELECT key FROM query_embeddings ORDER BY last_access LIMIT ?)",
+                (overflow,),
+            )
+        self._disk_rows = count - overflow
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM query_embeddings")
+                self._disk_rows = 0
@@ -0,0 +1,7 @@
+"""Exceptions raised by the retrieval stack, importable without Qdrant or Tantivy."""
+
+from __future__ import annotations
+
+
+class RetrievalUnavailable(RuntimeError):
+    """Raised when every retrieval leg failed or timed out for a request."""
@@ -3,16 +3,24 @@
 from __future__ import annotations
 
 import logging
-from typing import Dict, List, Optional, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional, Tuple
 
 from app.config import settings
 from app.models.retrieval import EvidenceBlock, RetrievedChunk
 from app.utils.tokenization import count_tokens, get_cl100k_encoding
+from app.utils.tracing import stage
+
+if TYPE_CHECKING:
+    import tiktoken
 
 logger = logging.getLogger(__name__)
 
 
-encoding = get_cl100k_encoding("assembling evidence blocks")
+@lru_cache(maxsize=1)
+def _encoding() -> Optional["tiktoken.Encoding"]:
+    return get_cl100k_encoding("assembling evidence blocks")
 
 
 def _merge_range(existing: Optional[Tuple[int, int]], incoming: Optional[Tuple[int, int]]) -> Optional[Tuple[int, int]]:
@@ -23,54 +31,138 @@ def _merge_range(existing: Optional[Tuple[int, int]], incoming: Optional[Tuple[i
     return (min(existing[0], incoming[0]), max(existing[1], incoming[1]))
 
 
+def _chunk_paragraphs(chunk: RetrievedChunk) -> List[Tuple[Hashable, str, Optional[int]]]:
+    """Split a chunk into ``(paragraph id, text, tokens)`` using its ingestion metadata.
+
+    Chunks without usable ``paragraph_ids`` (or whose text does not split back
+    into that many paragraphs) stay a single unit keyed by ``chunk_id``.
+    """
+    paragraph_ids = chunk.metadata.get("paragraph_ids") or []
+    texts = chunk.text.split("\n\n")
+    if not paragraph_ids or len(paragraph_ids) != len(texts):
+        return [(chunk.chunk_id, chunk.text, chunk.token_count)]
+    tokens = chunk.metadata.get("paragraph_tokens") or []
+    if len(tokens) != len(paragraph_ids):
+        tokens = [None] * len(paragraph_ids)
+    return list(zip(paragraph_ids, texts, tokens))
+
+
+@dataclass
+class _Candidate:
+    """A section's worth of evidence, deduplicated by paragraph, before packing."""
+
+    block: EvidenceBlock
+    position: int
+    score: Optional[float] = None
+    paragraphs: Dict[Hashable, Tuple[str, Optional[int]]] = field(default_factory=dict)
+
+    def add(self, chunk: RetrievedChunk) -> None:
+        for paragraph_id, text, tokens in _chunk_paragraphs(chunk):
+            self.paragraphs.setdefault(paragraph_id, (text, tokens))
+        score = chunk.rerank_score if chunk.rerank_score is not None else chunk.fused_score
+        if score is not None and (self.score is None or score > self.score):
+            self.score = score
+
+    def ordered_ids(self) -> List[Hashable]:
+        ids = list(self.paragraphs)
+        if all(isinstance(paragraph_id, int) for paragraph_id in ids):
+            ids.sort()
+        return ids
+
+    def tokens(self) -> int:
+        total = 0
+        for paragraph_id, (text, tokens) in self.paragraphs.items():
+            if tokens is None:
+                tokens = count_tokens(text, _encoding())
+                self.paragraphs[paragraph_id] = (text, tokens)
+            total += tokens
+        return total
+
+    def finish(self, doc_id: str) -> EvidenceBlock:
+        self.block.id = doc_id
+        self.block.text = "\n\n".join(self.paragraphs[paragraph_id][0] for paragraph_id in self.ordered_ids())
+        return self.block
+
+
 def build_evidence_blocks(
     chunks: List[RetrievedChunk],
     max_blocks: Optional[int] = None,
     max_tokens: Optional[int] = None,
 ) -> List[EvidenceBlock]:
     """Group retrieved chunks into prompt-friendly evidence blocks."""
+    with stage("evidence"):
+        return _build_evidence_blocks(chunks, max_blocks, max_tokens)
+
+
+def _build_evidence_blocks(
+    chunks: List[RetrievedChunk],
+    max_blocks: Optional[int],
+    max_tokens: Optional[int],
+) -> List[EvidenceBlock]:
+    """Merge chunks per section and pack the best-scoring blocks into the token budget.
+
+    Paragraphs repeated by chunk overlap are kept once per block, and token
+    counts come from the ``paragraph_tokens`` recorded at ingestion (only
+    older chunks without them are re-encoded). Blocks are taken greedily by
+    their best rerank (or fused) score; a block that does not fit the tokens
+    left is skipped rather than ending the selection, so smaller lower-ranked
+    blocks can still use the remaining budget. The top block is always kept.
+    """
     if max_blocks is None:
         max_blocks = settings.max_evidence_blocks
     if max_tokens is None:
         max_tokens = settings.max_evidence_tokens
 
-    grouped: Dict[Tuple[str, Optional[str]], EvidenceBlock] = {}
-    ordered: List[EvidenceBlock] = []
+    grouped: Dict[Tuple[str, Optional[str]], _Candidate] = {}
 
     for chunk in chunks:
         key = (chunk.guideline_id, chunk.section_id or chunk.chunk_id)
-        block = grouped.get(key)
-        if not block:
-            block = EvidenceBlock(
-                id="",
-                doc_id=chunk.guideline_id,
-                guideline_id=chunk.guideline_id,
-                guideline_title=chunk.guideline_title,
-                year=chunk.year,
-                section_id=chunk.section_id,
-                section_title=chunk.section_title,
-                page_range=chunk.page_range,
-                text=chunk.text,
-                rec_class_list=chunk.rec_class_list,
-                loe_list=chunk.loe_list,
+        candidate = grouped.get(key)
+        if not candidate:
+            candidate = _Candidate(
+                block=EvidenceBlock(
+                    id="",
+                    doc_id=chunk.guideline_id,
+                    guideline_id=chunk.guideline_id,
+                    guideline_title=chunk.guideline_title,
+                    year=chunk.year,
+                    section_id=chunk.section_id,
+                    section_title=chunk.section_title,
+                    page_range=chunk.page_range,
+                    text="",
+                    rec_class_list=chunk.rec_class_list,
+                    loe_list=chunk.loe_list,
+                ),
+                position=len(grouped),
             )
-            grouped[key] = block
-            ordered.append(block)
+            grouped[key] = candidate
         else:
-            block.text = f"{block.text}\n\n{chunk.text}"
+            block = candidate.block
             block.page_range = _merge_range(block.page_range, chunk.page_range)
             block.rec_class_list = sorted({*block.rec_class_list, *chunk.rec_class_list})
             block.loe_list = sorted({*block.loe_list, *chunk.loe_list})
+        candidate.add(chunk)
 
+    ranked = sorted(
+        grouped.values(),
+        key=lambda candidate: (candidate.score is None, -(candidate.score or 0.0), candidate.position),
+    )
     selected: List[EvidenceBlock] = []
     tokens_left = max_tokens
-    for idx, block in enumerate(ordered, start=1):
-        if len(selected) >= max_blocks:
-            break
-        block_tokens = count_tokens(block.text, encoding)
-        if block_tokens > tokens_left and selected:
-            break
-        block.id = f"Doc {idx}"
-        tokens_left = max(tokens_left - block_tokens, 0)
-        selected.append(block)
+    with stage("token_count"):
+        for candidate in ranked:
+            if len(selected) >= max_blocks or (selected and tokens_left <= 0):
+                break
+            block_tokens = candidate.tokens()
+            if block_tokens > tokens_left and selected:
+                continue
+            tokens_left = max(tokens_left - block_tokens, 0)
+            selected.append(candidate.finish(f"Doc {len(selected) + 1}"))
+    logger.debug(
+        "Packed %s of %s evidence blocks into %s/%s tokens",
+        len(selected),
+        len(ranked),
+        max_tokens - tokens_left,
+        max_tokens,
+    )
     return selected
@@ -2,50 +2,389 @@
 
 from __future__ import annotations
 
+import asyncio
+import contextvars
 import logging
-from typing import Dict, Iterable, List
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, replace
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple, Union
 
-from app.models.retrieval import RetrievedChunk
+from app.config import settings
+from app.models.retrieval import RetrievedChunk, ScoredHit
 from app.retrieval.bm25_store import BM25Store
-from app.retrieval.embedder import embed_queries
-from app.retrieval.vector_store import VectorStore
+from app.retrieval.chunk_store import ChunkStore
+from app.retrieval.embedder import aencode_queries, encode_queries
+from app.retrieval.embedding_cache import QueryEncoding
+from app.retrieval.errors import RetrievalUnavailable
+from app.retrieval.lexical_index import LexicalIndex
+from app.retrieval.local_vector_store import LocalVectorStore
+from app.retrieval.vector_store import VectorStore, create_vector_store
+from app.utils.concurrency import run_blocking
+from app.utils.tracing import stage
 
 logger = logging.getLogger(__name__)
 
-RRF_K = 50
+# A leg returns hits per source name and its timings.
+LegResult = Tuple[Dict[str, List[ScoredHit]], Dict[str, float]]
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """Return the process-wide worker pool used to overlap retrieval legs."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.retrieval_workers,
+                thread_name_prefix="retrieval-leg",
+            )
+        return _executor
+
+
+def _elapsed_ms(start: float) -> float:
+    return round((time.perf_counter() - start) * 1000.0, 3)
+
+
+class _SharedEncoding:
+    """Encodes a question once for the dense and lexical legs, whichever asks first.
+
+    Returns the encoding and the ``embed_ms`` it took; an encode failure is
+    raised to every leg that asks.
+    """
+
+    def __init__(self, question: str) -> None:
+        self.question = question
+        self._lock = threading.Lock()
+        self._result: Optional[Tuple[QueryEncoding, float]] = None
+
+    def get(self) -> Tuple[QueryEncoding, float]:
+        with self._lock:
+            if self._result is None:
+                with stage("embed") as timer:
+                    encoding = encode_queries([self.question])[0]
+                self._result = (encoding, timer.elapsed_ms)
+            return self._result
+
+
+def _shared_task(coro: Awaitable) -> Callable[[], Awaitable]:
+    """Start ``coro`` on first call; later callers await the same task.
+
+    The task is shielded so a leg that times out does not cancel it for the
+    other legs.
+    """
+    task: List[asyncio.Future] = []
+
+    def get() -> Awaitable:
+        if not task:
+            task.append(asyncio.ensure_future(coro))
+        return asyncio.shield(task[0])
+
+    return get
+
+
+async def _timed_aencode(questions: List[str]) -> Tuple[List[QueryEncoding], float]:
+    with stage("embed") as timer:
+        encodings = await aencode_queries(questions)
+    return encodings, timer.elapsed_ms
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """The indexes one request reads; swapped as a whole on reload."""
+
+    bm25_store: Optional[BM25Store]
+    vector_store: Union[VectorStore, LocalVectorStore]
+    lexical_index: Optional[LexicalIndex]
+    chunk_store: ChunkStore
 
 
 class HybridRetriever:
-    """Combines sparse, dense, and reranking stages."""
+    """Combines sparse, dense, and reranking stages.
+
+    Every request captures the current :class:`IndexSnapshot` once, so a
+    :meth:`reload` that swaps in rebuilt indexes never mixes versions within
+    a request, and in-flight requests finish on the indexes they started with.
+    """
 
     def __init__(
         self,
         bm25_store: BM25Store | None = None,
-        vector_store: VectorStore | None = None,
+        vector_store: VectorStore | LocalVectorStore | None = None,
+        parallel: bool | None = None,
+        lexical_index: LexicalIndex | None = None,
+        chunk_store: ChunkStore | None = None,
+        rrf_k: int | None = None,
     ) -> None:
-        self.bm25_store = bm25_store or BM25Store()
-        self.vector_store = vector_store or VectorStore()
+        self.parallel = settings.retrieval_parallel if parallel is None else parallel
+        self.rrf_k = settings.rrf_k if rrf_k is None else rrf_k
+        if lexical_index is None and settings.lexical_retrieval:
+            lexical_index = LexicalIndex()
+        self.snapshot = IndexSnapshot(
+            bm25_store=bm25_store or BM25Store(),
+            vector_store=vector_store or create_vector_store(),
+            lexical_index=lexical_index if lexical_index is not None and len(lexical_index) else None,
+            chunk_store=chunk_store or ChunkStore(),
+        )
+        self._reload_lock = threading.Lock()
+
+    @property
+    def bm25_store(self) -> Optional[BM25Store]:
+        return self.snapshot.bm25_store
+
+    @property
+    def vector_store(self) -> Union[VectorStore, LocalVectorStore]:
+        return self.snapshot.vector_store
+
+    @property
+    def lexical_index(self) -> Optional[LexicalIndex]:
+        return self.snapshot.lexical_index
+
+    @property
+    def chunk_store(self) -> ChunkStore:
+        return self.snapshot.chunk_store
+
+    def reloadable(self, component: str) -> bool:
+        """Whether :meth:`reload` reopens ``component``; Qdrant swaps its alias server-side."""
+        state = self.snapshot
+        if component == "bm25":
+            return state.bm25_store is not None
+        if component == "chunks":
+            return True
+        if component == "vectors":
+            return isinstance(state.vector_store, LocalVectorStore)
+        if component == "lexical":
+            return settings.lexical_retrieval
+        return False
+
+    def reload(self, components: Iterable[str]) -> List[str]:
+        """Reopen the named indexes (``index_version`` components) and swap them in.
+
+        Replacements are built off to the side; a component that fails to
+        load keeps its current version. A Qdrant collection needs no reload
+        because index_vectors swaps its alias server-side. Returns the
+        components that were actually replaced.
+        """
+        with self._reload_lock:
+            current = self.snapshot
+            changes: Dict[str, object] = {}
+            replaced: List[str] = []
+            for component in set(components):
+                if not self.reloadable(component):
+                    continue
+                try:
+                    if component == "bm25":
+                        changes["bm25_store"] = BM25Store(current.bm25_store.index_dir)
+                    elif component == "chunks":
+                        changes["chunk_store"] = ChunkStore(current.chunk_store.path)
+                    elif component == "vectors":
+                        changes["vector_store"] = LocalVectorStore(current.vector_store.directory)
+                    else:
+                        directory = current.lexical_index.directory if current.lexical_index else None
+                        lexical_index = LexicalIndex(directory)
+                        changes["lexical_index"] = lexical_index if len(lexical_index) else None
+                except Exception as exc:
+                    logger.error("Reloading the %s index failed; keeping the current one: %s", component, exc)
+                    continue
+                replaced.append(component)
+            if changes:
+                self.snapshot = replace(current, **changes)
+                logger.info("Swapped in reloaded indexes: %s", ", ".join(sorted(replaced)))
+            return sorted(replaced)
 
     def _rrf_merge(
         self,
-        sparse_results: Iterable[RetrievedChunk],
-        dense_results: Iterable[RetrievedChunk],
-    ) -> Dict[str, RetrievedChunk]:
-        fused: Dict[str, RetrievedChunk] = {}
-
-        def apply_rrf(candidates: Iterable[RetrievedChunk], attr: str) -> None:
-            for rank, chunk in enumerate(candidates, start=1):
-                existing = fused.get(chunk.chunk_id)
-                if not existing:
-                    existing = chunk.model_copy(deep=True)
-                    fused[chunk.chunk_id] = existing
-                setattr(existing, attr, getattr(chunk, attr))
-                existing.fused_score = (existing.fused_score or 0.0) + 1.0 / (RRF_K + rank)
+        sparse_results: Iterable[ScoredHit],
+        dense_results: Iterable[ScoredHit],
+        lexical_results: Iterable[ScoredHit] = (),
+    ) -> Dict[str, Dict[str, float]]:
+        """Fuse ranked id lists into ``chunk_id -> {score field: value}``."""
+        fused: Dict[str, Dict[str, float]] = {}
+
+        def apply_rrf(candidates: Iterable[ScoredHit], attr: str) -> None:
+            for rank, hit in enumerate(candidates, start=1):
+                scores = fused.setdefault(hit.chunk_id, {"fused_score": 0.0})
+                scores[attr] = hit.score
+                scores["fused_score"] += 1.0 / (self.rrf_k + rank)
 
         apply_rrf(sparse_results, "sparse_score")
         apply_rrf(dense_results, "dense_score")
+        apply_rrf(lexical_results, "lexical_score")
         return fused
 
+    def _sparse_leg(self, state: IndexSnapshot, question: str, top_k: int) -> LegResult:
+        with stage("bm25_search") as timer:
+            hits = state.bm25_store.search(question, top_k=top_k)
+        return {"sparse": hits}, {"sparse_ms": timer.elapsed_ms}
+
+    def _dense_leg(self, state: IndexSnapshot, shared: _SharedEncoding, top_k: int) -> LegResult:
+        encoding, embed_ms = shared.get()
+        with stage("dense_search") as timer:
+            hits = state.vector_store.search(encoding.dense, top_k=top_k)
+        return {"dense": hits}, {"embed_ms": embed_ms, "dense_ms": timer.elapsed_ms}
+
+    def _lexical_leg(self, state: IndexSnapshot, shared: _SharedEncoding, top_k: int) -> LegResult:
+        encoding, embed_ms = shared.get()
+        if encoding.lexical is None:
+            return {}, {"embed_ms": embed_ms}
+        with stage("lexical_search") as timer:
+            hits = state.lexical_index.search(encoding.lexical, top_k=top_k)
+        return {"lexical": hits}, {"embed_ms": embed_ms, "lexical_ms": timer.elapsed_ms}
+
+    async def _asparse_leg(self, state: IndexSnapshot, question: str, top_k: int) -> LegResult:
+        return await run_blocking(self._sparse_leg, state, question, top_k)
+
+    async def _adense_leg(self, state: IndexSnapshot, encode: Callable[[], Awaitable], top_k: int) -> LegResult:
+        encodings, embed_ms = await encode()
+        with stage("dense_search") as timer:
+            hits = await state.vector_store.asearch(encodings[0].dense, top_k=top_k)
+        return {"dense": hits}, {"embed_ms": embed_ms, "dense_ms": timer.elapsed_ms}
+
+    async def _alexical_leg(self, state: IndexSnapshot, encode: Callable[[], Awaitable], top_k: int) -> LegResult:
+        encodings, embed_ms = await encode()
+        if encodings[0].lexical is None:
+            return {}, {"embed_ms": embed_ms}
+        with stage("lexical_search") as timer:
+            hits = await state.lexical_index.asearch(encodings[0].lexical, top_k=top_k)
+        return {"lexical": hits}, {"embed_ms": embed_ms, "lexical_ms": timer.elapsed_ms}
+
+    def _run_legs(
+        self,
+        legs: Dict[str, Tuple[Callable[[], LegResult], float]],
+    ) -> Tuple[Dict[str, List[ScoredHit]], Dict[str, float]]:
+        """Run each leg and degrade to the surviving ones on error or timeout.
+
+        In parallel mode every leg is submitted to the shared pool up front and
+        its timeout is measured from that moment, so total latency is bounded
+        by the slowest leg rather than the sum. A leg that times out keeps
+        running in the background but its results are discarded.
+        """
+        hits: Dict[str, List[ScoredHit]] = {}
+        timings: Dict[str, float] = {}
+        errors: Dict[str, BaseException] = {}
+
+        if not self.parallel:
+            for name, (leg, _timeout) in legs.items():
+                try:
+                    leg_hits, leg_timings = leg()
+                    hits.update(leg_hits)
+                    timings.update(leg_timings)
+                except Exception as exc:
+                    errors[name] = exc
+                    logger.error("%s retrieval failed: %s", name.capitalize(), exc)
+        else:
+            executor = _get_executor()
+            submitted = time.perf_counter()
+            # Each leg runs in a copy of the caller's context so stage timings reach the request.
+            futures: Dict[str, Future] = {
+                name: executor.submit(contextvars.copy_context().run, leg) for name, (leg, _timeout) in legs.items()
+            }
+            for name, future in futures.items():
+                timeout = legs[name][1]
+                remaining = max(timeout - (time.perf_counter() - submitted), 0.0)
+                try:
+                    leg_hits, leg_timings = future.result(timeout=remaining)
+                    hits.update(leg_hits)
+                    timings.update(leg_timings)
+                except FutureTimeoutError as exc:
+                    future.cancel()
+                    errors[name] = exc
+                    logger.warning(
+                        "%s retrieval exceeded %.2fs; continuing without it.",
+                        name.capitalize(),
+                        timeout,
+                    )
+                except Exception as exc:
+                    errors[name] = exc
+                    logger.error("%s retrieval failed: %s", name.capitalize(), exc)
+
+        return self._check_legs(hits, timings, errors)
+
+    async def _arun_legs(
+        self,
+        legs: Dict[str, Tuple[Callable[[], Awaitable[LegResult]], float]],
+    ) -> Tuple[Dict[str, List[ScoredHit]], Dict[str, float]]:
+        """Async counterpart of :meth:`_run_legs` with the same degrade policy."""
+        hits: Dict[str, List[ScoredHit]] = {}
+        timings: Dict[str, float] = {}
+        errors: Dict[str, BaseException] = {}
+        names = list(legs)
+        outcomes = await asyncio.gather(
+            *(asyncio.wait_for(legs[name][0](), timeout=legs[name][1]) for name in names),
+            return_exceptions=True,
+        )
+        for name, outcome in zip(names, outcomes):
+            if isinstance(outcome, asyncio.TimeoutError):
+                errors[name] = outcome
+                logger.warning(
+                    "%s retrieval exceeded %.2fs; continuing without it.",
+                    name.capitalize(),
+                    legs[name][1],
+                )
+            elif isinstance(outcome, BaseException):
+                errors[name] = outcome
+                logger.error("%s retrieval failed: %s", name.capitalize(), outcome)
+            else:
+                leg_hits, leg_timings = outcome
+                hits.update(leg_hits)
+                timings.update(leg_timings)
+        return self._check_legs(hits, timings, errors)
+
+    @staticmethod
+    def _check_legs(
+        hits: Dict[str, List[ScoredHit]],
+        timings: Dict[str, float],
+        errors: Dict[str, BaseException],
+    ) -> Tuple[Dict[str, List[ScoredHit]], Dict[str, float]]:
+        if errors and not hits:
+            raise RetrievalUnavailable(
+                "All retrieval legs failed: "
+                + "; ".join(f"{name}: {exc!r}" for name, exc in errors.items())
+            )
+        for name in errors:
+            timings[f"{name}_failed"] = 1.0
+        return hits, timings
+
+    def _finalize(
+        self,
+        state: IndexSnapshot,
+        hits: Dict[str, List[ScoredHit]],
+        timings: Dict[str, float],
+        top_k_final: int,
+        start: float,
+    ) -> List[RetrievedChunk]:
+        with stage("rrf"):
+            fused = self._rrf_merge(hits.get("sparse", []), hits.get("dense", []), hits.get("lexical", []))
+            ranked = sorted(fused.items(), key=lambda item: item[1]["fused_score"], reverse=True)[:top_k_final]
+        return self._hydrate(state.chunk_store, ranked, timings, start)
+
+    def _hydrate(
+        self,
+        chunk_store: ChunkStore,
+        ranked: List[Tuple[str, Dict[str, float]]],
+        timings: Dict[str, float],
+        start: float,
+    ) -> List[RetrievedChunk]:
+        """Load only the fused top-k from the chunk store and attach their scores."""
+        with stage("hydrate") as timer:
+            stored = chunk_store.get_many([chunk_id for chunk_id, _scores in ranked])
+        timings["hydrate_ms"] = timer.elapsed_ms
+        timings["retrieve_ms"] = _elapsed_ms(start)
+        results: List[RetrievedChunk] = []
+        for chunk_id, scores in ranked:
+            chunk = stored.get(chunk_id)
+            if chunk is None:
+                logger.warning("Chunk %s is indexed but missing from the chunk store; skipping.", chunk_id)
+                continue
+            retrieved = RetrievedChunk(**chunk.model_dump(), **scores)
+            retrieved.metadata["retrieval_timings"] = dict(timings)
+            results.append(retrieved)
+        return results
+
     def retrieve(
         self,
         question: str,
@@ -53,24 +392,125 @@ class HybridRetriever:
         top_k_dense: int = 32,
         top_k_final: int = 20,
     ) -> List[RetrievedChunk]:
-        sparse_hits: List[RetrievedChunk] = []
-        dense_hits: List[RetrievedChunk] = []
-
-        if self.bm25_store:
-            sparse_hits = self.bm25_store.search(question, top_k=top_k_sparse)
+        start = time.perf_counter()
+        state = self.snapshot
+        legs: Dict[str, Tuple[Callable[[], LegResult], float]] = {}
+        if state.bm25_store:
+            legs["sparse"] = (
+                lambda: self._sparse_leg(state, question, top_k_sparse),
+                settings.retrieval_sparse_timeout,
+            )
         else:
             logger.warning("BM25 store unavailable; skipping sparse retrieval.")
+        shared = _SharedEncoding(question)
+        legs["dense"] = (
+            lambda: self._dense_leg(state, shared, top_k_dense),
+            settings.retrieval_dense_timeout,
+        )
+        if state.lexical_index is not None:
+            legs["lexical"] = (
+                lambda: self._lexical_leg(state, shared, top_k_dense),
+                settings.retrieval_dense_timeout,
+            )
+        hits, timings = self._run_legs(legs)
+        return self._finalize(state, hits, timings, top_k_final, start)
 
-        try:
-            query_vector = embed_queries([question])[0]
-            dense_hits = self.vector_store.search(query_vector, top_k=top_k_dense)
-        except Exception as exc:  # pragma: no cover - safety net
-            logger.error("Dense retrieval failed: %s", exc)
-
-        fused = self._rrf_merge(sparse_hits, dense_hits)
-        ranked = sorted(
-            fused.values(),
-            key=lambda chunk: chunk.fused_score or 0.0,
-            reverse=True,
+    async def aretrieve(
+        self,
+        question: str,
+        top_k_sparse: int = 32,
+        top_k_dense: int = 32,
+        top_k_final: int = 20,
+    ) -> List[RetrievedChunk]:
+        """Event-loop friendly variant of :meth:`retrieve`.
+
+        Tantivy search and query encoding run on the bounded CPU executor while
+        the Qdrant call goes through the async client.
+        """
+        start = time.perf_counter()
+        state = self.snapshot
+        legs: Dict[str, Tuple[Callable[[], Awaitable[LegResult]], float]] = {}
+        if state.bm25_store:
+            legs["sparse"] = (
+                lambda: self._asparse_leg(state, question, top_k_sparse),
+                settings.retrieval_sparse_timeout,
+            )
+        else:
+            logger.warning("BM25 store unavailable; skipping sparse retrieval.")
+        encode = _shared_task(_timed_aencode([question]))
+        legs["dense"] = (
+            lambda: self._adense_leg(state, encode, top_k_dense),
+            settings.retrieval_dense_timeout,
         )
-        return ranked[:top_k_final]
+        if state.lexical_index is not None:
+            legs["lexical"] = (
+                lambda: self._alexical_leg(state, encode, top_k_dense),
+                settings.retrieval_dense_timeout,
+            )
+        hits, timings = await self._arun_legs(legs)
+        return self._finalize(state, hits, timings, top_k_final, start)
+
+    async def aretrieve_batch(
+        self,
+        questions: List[str],
+        top_k_sparse: int = 32,
+        top_k_dense: int = 32,
+        top_k_final: int = 20,
+    ) -> List[List[RetrievedChunk]]:
+        """Retrieve for many questions with one encode call and one Qdrant batch query.
+
+        BM25 searches still run per question on the CPU executor. If a leg
+        fails for the whole batch the results degrade to the remaining legs,
+        as in :meth:`retrieve`.
+        """
+        start = time.perf_counter()
+        if not questions:
+            return []
+        state = self.snapshot
+
+        async def sparse_leg() -> Tuple[Dict[str, List[List[ScoredHit]]], Dict[str, float]]:
+            with stage("bm25_search") as timer:
+                hits = await asyncio.gather(
+                    *(
+                        run_blocking(state.bm25_store.search, question, top_k=top_k_sparse)
+                        for question in questions
+                    )
+                )
+            return {"sparse": list(hits)}, {"sparse_ms": timer.elapsed_ms}
+
+        encode = _shared_task(_timed_aencode(questions))
+
+        async def dense_leg() -> Tuple[Dict[str, List[List[ScoredHit]]], Dict[str, float]]:
+            encodings, embed_ms = await encode()
+            with stage("dense_search") as timer:
+                hits = await state.vector_store.asearch_batch(
+                    [encoding.dense for encoding in encodings], top_k=top_k_dense
+                )
+            return {"dense": hits}, {"embed_ms": embed_ms, "dense_ms": timer.elapsed_ms}
+
+        async def lexical_leg() -> Tuple[Dict[str, List[List[ScoredHit]]], Dict[str, float]]:
+            encodings, embed_ms = await encode()
+            if any(encoding.lexical is None for encoding in encodings):
+                return {}, {"embed_ms": embed_ms}
+            with stage("lexical_search") as timer:
+                hits = await state.lexical_index.asearch_batch(
+                    [encoding.lexical for encoding in encodings], top_k=top_k_dense
+                )
+            return {"lexical": hits}, {"embed_ms": embed_ms, "lexical_ms": timer.elapsed_ms}
+
+        legs: Dict[str, Tuple[Callable[[], Awaitable[LegResult]], float]] = {}
+        if state.bm25_store:
+            legs["sparse"] = (sparse_leg, settings.retrieval_sparse_timeout * len(questions))
+        legs["dense"] = (dense_leg, settings.retrieval_dense_timeout * len(questions))
+        if state.lexical_index is not None:
+            legs["lexical"] = (lexical_leg, settings.retrieval_dense_timeout * len(questions))
+        batch_hits, timings = await self._arun_legs(legs)
+
+        empty: List[List[ScoredHit]] = [[] for _ in questions]
+        results: List[List[RetrievedChunk]] = []
+        for sparse_hits, dense_hits, lexical_hits in zip(
+            batch_hits.get("sparse", empty), batch_hits.get("dense", empty), batch_hits.get("lexical", empty)
+        ):
+            hits = {"sparse": sparse_hits, "dense": dense_hits, "lexical": lexical_hits}
+            results.append(self._finalize(state, hits, dict(timings), top_k_final, start))
+        return results
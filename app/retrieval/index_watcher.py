@@ -0,0 +1,81 @@
+"""Background reload of rebuilt indexes without restarting the API."""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from app.config import settings
+from app.utils.index_version import read_index_stamps
+
+if TYPE_CHECKING:
+    from app.retrieval.hybrid_retriever import HybridRetriever
+
+logger = logging.getLogger(__name__)
+
+
+class IndexWatcher:
+    """Polls the index version file and hot-swaps changed indexes into a retriever.
+
+    Ingestion bumps a component's stamp only after its new build is fully
+    written (and, for BM25 and Qdrant, published), so a changed stamp is the
+    signal that the component can be reopened.
+    """
+
+    def __init__(self, retriever: "HybridRetriever", interval: float | None = None) -> None:
+        self.retriever = retriever
+        self.interval = settings.index_reload_interval if interval is None else interval
+        self._stamps = self._read_stamps()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @staticmethod
+    def _read_stamps() -> Dict[str, str]:
+        try:
+            return read_index_stamps()
+        except (OSError, ValueError) as exc:
+            logger.warning("Unable to read index stamps: %s", exc)
+            return {}
+
+    def check(self) -> List[str]:
+        """Reload every component whose stamp changed since the last check.
+
+        A component that fails to reload keeps its previous stamp, so the
+        next check retries it.
+        """
+        stamps = self._read_stamps()
+        changed = [name for name, stamp in stamps.items() if self._stamps.get(name) != stamp]
+        if not changed:
+            return []
+        logger.info("Index stamps changed for %s; reloading", ", ".join(sorted(changed)))
+        reloaded = self.retriever.reload(changed)
+        failed = [name for name in changed if name not in reloaded and self.retriever.reloadable(name)]
+        for name in failed:
+            if name in self._stamps:
+                stamps[name] = self._stamps[name]
+            else:
+                del stamps[name]
+        if failed:
+            logger.warning("Will retry reloading %s on the next check", ", ".join(sorted(failed)))
+        self._stamps = stamps
+        return reloaded
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.check()
+            except Exception as exc:  # pragma: no cover - defensive
+                logger.error("Index reload check failed: %s", exc)
+
+    def start(self) -> None:
+        if self.interval <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="index-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1.0)
+            self._thread = None
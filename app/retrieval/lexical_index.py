@@ -0,0 +1,178 @@
+"""Inverted index over BGE-M3 learned sparse (lexical) weights."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.models.retrieval import ScoredHit
+from app.utils.concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+
+POSTINGS_FILE = "postings.npz"
+ROWS_FILE = "rows.jsonl"
+META_FILE = "meta.json"
+
+
+def write_lexical_index(
+    directory: Path,
+    rows: Sequence[Tuple[str, str]],
+    weights: Sequence[Mapping[str, float]],
+) -> None:
+    """Write CSR postings (token -> row and weight) for ``(chunk_id, lang)`` rows.
+
+    ``weights[i]`` are the BGE-M3 lexical weights of ``rows[i]``, keyed by
+    tokenizer id. ``meta.json`` is replaced last.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    if len(weights) != len(rows):
+        raise ValueError(f"Got {len(weights)} weight maps for {len(rows)} chunks")
+
+    tokens: List[int] = []
+    doc_rows: List[int] = []
+    values: List[float] = []
+    for row, doc_weights in enumerate(weights):
+        for token, weight in doc_weights.items():
+            tokens.append(int(token))
+            doc_rows.append(row)
+            values.append(float(weight))
+    token_array = np.asarray(tokens, dtype=np.int64)
+    order = np.argsort(token_array, kind="stable")
+    token_array = token_array[order]
+    terms, starts = np.unique(token_array, return_index=True)
+    offsets = np.append(starts, len(token_array)).astype(np.int64)
+
+    postings_tmp = directory / f"{POSTINGS_FILE}.tmp.npz"
+    np.savez(
+        postings_tmp,
+        terms=terms,
+        offsets=offsets,
+        rows=np.asarray(doc_rows, dtype=np.int32)[order],
+        weights=np.asarray(values, dtype=np.float32)[order],
+    )
+    rows_tmp = directory / f"{ROWS_FILE}.tmp"
+    with rows_tmp.open("w", encoding="utf-8") as handle:
+        for chunk_id, lang in rows:
+            handle.write(json.dumps({"chunk_id": chunk_id, "lang": lang}) + "\n")
+    meta_tmp = directory / f"{META_FILE}.tmp"
+    with meta_tmp.open("w", encoding="utf-8") as handle:
+        json.dump({"count": len(rows), "terms": int(len(terms)), "postings": int(len(token_array))}, handle)
+
+    os.replace(postings_tmp, directory / POSTINGS_FILE)
+    os.replace(rows_tmp, directory / ROWS_FILE)
+    os.replace(meta_tmp, directory / META_FILE)
+
+
+class LexicalIndex:
+    """Scores chunks by the dot product of query and chunk lexical weights.
+
+    This is BGE-M3's own sparse score; query weights come from the same
+    forward pass that produces the dense query vector, so the leg costs one
+    postings scan and no extra model call.
+    """
+
+    def __init__(self, directory: str | Path | None = None) -> None:
+        self.directory = Path(directory or settings.lexical_index_dir)
+        self.terms = np.zeros(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.rows = np.zeros(0, dtype=np.int32)
+        self.weights = np.zeros(0, dtype=np.float32)
+        self.chunk_ids: List[str] = []
+        self.langs = np.zeros(0, dtype=object)
+        self._lang_masks: Dict[str, np.ndarray] = {}
+        self.load()
+
+    def load(self) -> None:
+        if not (self.directory / META_FILE).exists():
+            logger.warning(
+                "Lexical index %s does not exist. Run index_vectors with LEXICAL_RETRIEVAL=1.", self.directory
+            )
+            return
+        with np.load(self.directory / POSTINGS_FILE) as postings:
+            terms, offsets = postings["terms"], postings["offsets"]
+            rows, weights = postings["rows"], postings["weights"]
+        with (self.directory / ROWS_FILE).open("r", encoding="utf-8") as handle:
+            entries = [json.loads(line) for line in handle if line.strip()]
+        chunk_ids = [entry["chunk_id"] for entry in entries]
+        langs = np.asarray([entry.get("lang", "en") for entry in entries], dtype=object)
+        self.terms, self.offsets, self.rows, self.weights = terms, offsets, rows, weights
+        self.chunk_ids = chunk_ids
+        self.langs = langs
+        self._lang_masks = {}
+        logger.info("Loaded lexical index %s (%s chunks, %s terms)", self.directory, len(chunk_ids), len(terms))
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def _lang_mask(self, lang: str) -> Optional[np.ndarray]:
+        if not lang:
+            return None
+        mask = self._lang_masks.get(lang)
+        if mask is None:
+            mask = self.langs == lang
+            self._lang_masks[lang] = mask
+        return mask
+
+    def _scores(self, query_weights: Mapping[str, float]) -> np.ndarray:
+        scores = np.zeros(len(self), dtype=np.float32)
+        if not query_weights:
+            return scores
+        tokens = np.asarray([int(token) for token in query_weights], dtype=np.int64)
+        positions = np.searchsorted(self.terms, tokens)
+        for position, token, weight in zip(positions, tokens, query_weights.values()):
+            if position >= len(self.terms) or self.terms[position] != token:
+                continue
+            start, end = self.offsets[position], self.offsets[position + 1]
+            # Each chunk appears at most once per posting list, so fancy += is safe.
+            scores[self.rows[start:end]] += float(weight) * self.weights[start:end]
+        return scores
+
+    def search(
+        self,
+        query_weights: Mapping[str, float],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[ScoredHit]:
+        if not len(self):
+            return []
+        scores = self._scores(query_weights)
+        mask = self._lang_mask(lang)
+        if mask is not None:
+            scores[~mask] = 0.0
+        candidates = np.flatnonzero(scores > 0)
+        if len(candidates) > top_k:
+            candidates = candidates[np.argpartition(-scores[candidates], top_k - 1)[:top_k]]
+        ordered = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [ScoredHit(self.chunk_ids[idx], float(scores[idx])) for idx in ordered]
+
+    def search_batch(
+        self,
+        query_weights: Sequence[Mapping[str, float]],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[List[ScoredHit]]:
+        return [self.search(weights, top_k=top_k, lang=lang) for weights in query_weights]
+
+    async def asearch(
+        self,
+        query_weights: Mapping[str, float],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[ScoredHit]:
+        return await run_blocking(self.search, query_weights, top_k, lang)
+
+    async def asearch_batch(
+        self,
+        query_weights: Sequence[Mapping[str, float]],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[List[ScoredHit]]:
+        return await run_blocking(self.search_batch, query_weights, top_k, lang)
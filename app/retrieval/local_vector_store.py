@@ -0,0 +1,331 @@
+"""In-process dense index backed by a memory-mapped NumPy matrix."""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import settings
+from app.models.retrieval import ScoredHit
+from app.utils.concurrency import run_blocking
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"
+ROWS_FILE = "rows.jsonl"
+META_FILE = "meta.json"
+HNSW_FILE = "hnsw.bin"
+INT8_FILE = "vectors.int8"
+INT8_SCALES_FILE = "scales.f32"
+BINARY_FILE = "vectors.bin"
+QUANTIZATION_MODES = ("none", "int8", "binary")
+# Rows scored per step when scanning quantized codes, to bound temporary memory.
+SCAN_BLOCK_ROWS = 16_384
+
+_POPCOUNT_TABLE = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+
+def _popcount(values: np.ndarray) -> np.ndarray:
+    bitwise_count = getattr(np, "bitwise_count", None)
+    if bitwise_count is not None:
+        return bitwise_count(values)
+    return _POPCOUNT_TABLE[values]
+
+
+def quantization_mode(value: Optional[str] = None) -> str:
+    mode = (value or settings.vector_quantization or "none").lower()
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown vector quantization {mode!r}; expected one of {QUANTIZATION_MODES}.")
+    return mode
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 codes and the float32 scale that restores each row."""
+    scales = np.maximum(np.abs(matrix).max(axis=1), 1e-12) / 127.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def quantize_binary(matrix: np.ndarray) -> np.ndarray:
+    """One sign bit per dimension, packed eight to a byte."""
+    return np.packbits(matrix > 0, axis=1)
+
+
+def build_hnsw(matrix: np.ndarray, path: Path, quantization: str = "none") -> bool:
+    """Build and save an HNSW graph over ``matrix`` when it is large enough and ``hnswlib`` is installed.
+
+    Quantized indexes never get one: hnswlib keeps float32 vectors in its
+    graph, which would silently undo the quantization.
+    """
+    threshold = settings.local_index_ann_threshold
+    if threshold <= 0 or matrix.shape[0] < threshold:
+        return False
+    if quantization != "none":
+        logger.warning(
+            "VECTOR_QUANTIZATION=%s: skipping the HNSW graph (it would hold float32 vectors in memory); "
+            "the quantized codes are scanned exactly instead.",
+            quantization,
+        )
+        return False
+    try:
+        import hnswlib
+    except ImportError:
+        logger.warning("hnswlib is not installed; the local vector index will be searched exactly.")
+        return False
+    index = hnswlib.Index(space="ip", dim=matrix.shape[1])
+    index.init_index(max_elements=matrix.shape[0], ef_construction=200, M=32)
+    index.add_items(matrix, np.arange(matrix.shape[0]))
+    index.save_index(str(path))
+    logger.info("Built HNSW graph over %s vectors", matrix.shape[0])
+    return True
+
+
+def write_local_index(
+    directory: Path,
+    rows: Sequence[Tuple[str, str]],
+    vectors: np.ndarray,
+    quantization: Optional[str] = None,
+) -> None:
+    """Write ``(chunk_id, lang)`` rows and their vectors (same order) as a local dense index.
+
+    Vectors are L2-normalized so a dot product equals Qdrant's cosine score.
+    With ``int8`` or ``binary`` quantization the compact codes are written
+    next to the float32 matrix, which then only serves rescoring. Above
+    ``local_index_ann_threshold`` rows the HNSW graph is built here too (for
+    unquantized indexes only), so the API only ever loads it. ``meta.json`` is replaced last and is what
+    readers key their reload on.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    mode = quantization_mode(quantization)
+    matrix = np.ascontiguousarray(_normalize(np.asarray(vectors, dtype=np.float32)), dtype=np.float32)
+    if matrix.shape[0] != len(rows):
+        raise ValueError(f"Got {matrix.shape[0]} vectors for {len(rows)} chunks")
+
+    written = {VECTORS_FILE: matrix}
+    if mode == "int8":
+        written[INT8_FILE], written[INT8_SCALES_FILE] = quantize_int8(matrix)
+    elif mode == "binary":
+        written[BINARY_FILE] = quantize_binary(matrix)
+    for name, array in written.items():
+        np.ascontiguousarray(array).tofile(directory / f"{name}.tmp")
+    if build_hnsw(matrix, directory / f"{HNSW_FILE}.tmp", mode):
+        written[HNSW_FILE] = None
+    rows_tmp = directory / f"{ROWS_FILE}.tmp"
+    with rows_tmp.open("w", encoding="utf-8") as handle:
+        for chunk_id, lang in rows:
+            handle.write(json.dumps({"chunk_id": chunk_id, "lang": lang}) + "\n")
+    meta_tmp = directory / f"{META_FILE}.tmp"
+    with meta_tmp.open("w", encoding="utf-8") as handle:
+        json.dump({"count": int(matrix.shape[0]), "dim": int(matrix.shape[1]), "quantization": mode}, handle)
+
+    for name in written:
+        os.replace(directory / f"{name}.tmp", directory / name)
+    os.replace(rows_tmp, directory / ROWS_FILE)
+    for name in (HNSW_FILE, INT8_FILE, INT8_SCALES_FILE, BINARY_FILE):
+        if name not in written:
+            (directory / name).unlink(missing_ok=True)
+    os.replace(meta_tmp, directory / META_FILE)
+
+
+class LocalVectorStore:
+    """Drop-in replacement for the Qdrant ``VectorStore`` that needs no server.
+
+    Scores are exact cosine similarities from one matrix product and an
+    ``argpartition`` top-k, which is faster than a network hop for corpora of
+    a few hundred thousand chunks. Above ``local_index_ann_threshold`` rows
+    the HNSW graph built at ingestion is used when ``hnswlib`` is installed.
+
+    A quantized index keeps only its int8 or binary codes in RAM, scans those,
+    and rescores ``quantization_oversampling * top_k`` candidates against the
+    memory-mapped float32 rows. It never uses the HNSW graph, which holds
+    float32 vectors.
+    """
+
+    def __init__(self, directory: str | Path | None = None) -> None:
+        self.directory = Path(directory or settings.local_index_dir)
+        self.matrix = np.zeros((0, 0), dtype=np.float32)
+        self.chunk_ids: List[str] = []
+        self.langs = np.zeros(0, dtype=object)
+        self.quantization = "none"
+        self.codes: Optional[np.ndarray] = None
+        self.scales: Optional[np.ndarray] = None
+        self._lang_masks: Dict[str, np.ndarray] = {}
+        self._ann = None
+        self.load()
+
+    def load(self) -> None:
+        meta_path = self.directory / META_FILE
+        if not meta_path.exists():
+            logger.warning("Local vector index %s does not exist. Run index_vectors first.", self.directory)
+            return
+        with meta_path.open("r", encoding="utf-8") as handle:
+            meta = json.load(handle)
+        count, dim = meta["count"], meta["dim"]
+        if count:
+            matrix = np.memmap(self.directory / VECTORS_FILE, dtype=np.float32, mode="r", shape=(count, dim))
+        else:
+            matrix = np.zeros((0, dim), dtype=np.float32)
+        with (self.directory / ROWS_FILE).open("r", encoding="utf-8") as handle:
+            rows = [json.loads(line) for line in handle if line.strip()]
+        chunk_ids = [row["chunk_id"] for row in rows]
+        langs = np.asarray([row.get("lang", "en") for row in rows], dtype=object)
+        quantization = meta.get("quantization", "none")
+        codes = scales = None
+        if quantization == "int8":
+            codes = np.fromfile(self.directory / INT8_FILE, dtype=np.int8).reshape(count, dim)
+            scales = np.fromfile(self.directory / INT8_SCALES_FILE, dtype=np.float32)
+        elif quantization == "binary":
+            codes = np.fromfile(self.directory / BINARY_FILE, dtype=np.uint8).reshape(count, -1)
+        self.matrix = matrix
+        self.chunk_ids = chunk_ids
+        self.langs = langs
+        self.quantization = quantization
+        self.codes = codes
+        self.scales = scales
+        self._lang_masks = {}
+        self._ann = self._load_ann()
+        logger.info(
+            "Loaded local vector index %s (%s vectors, quantization=%s)", self.directory, count, quantization
+        )
+
+    def __len__(self) -> int:
+        return len(self.chunk_ids)
+
+    def _load_ann(self):
+        """Load the HNSW graph written by ``index_vectors``; it is never built at serve time."""
+        if self.quantization != "none":
+            return None
+        path = self.directory / HNSW_FILE
+        if settings.local_index_ann_threshold <= 0 or not path.exists():
+            if settings.local_index_ann_threshold > 0 and len(self) >= settings.local_index_ann_threshold:
+                logger.warning("No HNSW graph in %s; searching exactly. Rerun index_vectors to build it.", self.directory)
+            return None
+        try:
+            import hnswlib
+        except ImportError:
+            logger.warning("hnswlib is not installed; local vector search stays exact.")
+            return None
+        index = hnswlib.Index(space="ip", dim=self.matrix.shape[1])
+        index.load_index(str(path), max_elements=len(self))
+        index.set_ef(max(settings.local_index_hnsw_ef, 1))
+        return index
+
+    def _lang_mask(self, lang: str) -> Optional[np.ndarray]:
+        if not lang:
+            return None
+        mask = self._lang_masks.get(lang)
+        if mask is None:
+            mask = self.langs == lang
+            self._lang_masks[lang] = mask
+        return mask
+
+    @staticmethod
+    def _top_k(scores: np.ndarray, k: int) -> List[List[tuple]]:
+        """Per query row, the ``k`` best (column, score) pairs in descending order."""
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return [[] for _ in range(scores.shape[0])]
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(scores, top):
+            ordered = candidates[np.argsort(-row[candidates], kind="stable")]
+            results.append([(int(idx), float(row[idx])) for idx in ordered if np.isfinite(row[idx])])
+        return results
+
+    def _approx_scores(self, queries: np.ndarray) -> np.ndarray:
+        """Similarity estimates from the quantized codes, scanned block by block."""
+        scores = np.empty((queries.shape[0], len(self)), dtype=np.float32)
+        if self.quantization == "binary":
+            query_bits = quantize_binary(queries)
+            dim = self.matrix.shape[1]
+        for start in range(0, len(self), SCAN_BLOCK_ROWS):
+            end = min(start + SCAN_BLOCK_ROWS, len(self))
+            if self.quantization == "int8":
+                block = self.codes[start:end].astype(np.float32)
+                scores[:, start:end] = (queries @ block.T) * self.scales[start:end]
+            else:
+                distance = _popcount(query_bits[:, None, :] ^ self.codes[None, start:end, :]).sum(axis=2)
+                scores[:, start:end] = 1.0 - 2.0 * distance / dim
+        return scores
+
+    def _scan_top_k(self, queries: np.ndarray, top_k: int, mask: Optional[np.ndarray]) -> List[List[tuple]]:
+        if self.quantization == "none":
+            scores = queries @ self.matrix.T
+        else:
+            scores = self._approx_scores(queries)
+        if mask is not None:
+            scores[:, ~mask] = -np.inf
+        if self.quantization == "none":
+            return self._top_k(scores, top_k)
+
+        oversampled = self._top_k(scores, math.ceil(top_k * max(settings.quantization_oversampling, 1.0)))
+        if not settings.quantization_rescore:
+            return [hits[:top_k] for hits in oversampled]
+        results = []
+        for query, hits in zip(queries, oversampled):
+            ids = [idx for idx, _score in hits]
+            exact = self.matrix[ids] @ query if ids else np.zeros(0, dtype=np.float32)
+            order = np.argsort(-exact, kind="stable")[:top_k]
+            results.append([(ids[idx], float(exact[idx])) for idx in order])
+        return results
+
+    def _ann_top_k(self, queries: np.ndarray, top_k: int, mask: Optional[np.ndarray]) -> List[List[tuple]]:
+        # Over-fetch so the lang filter still leaves ``top_k`` hits, then rescore exactly.
+        k = min(len(self), top_k * 4 if mask is not None else top_k)
+        labels, _distances = self._ann.knn_query(queries, k=k)
+        results = []
+        for query, row in zip(queries, labels):
+            ids = [int(idx) for idx in row if mask is None or mask[idx]]
+            scores = self.matrix[ids] @ query if ids else np.zeros(0, dtype=np.float32)
+            order = np.argsort(-scores, kind="stable")[:top_k]
+            results.append([(ids[idx], float(scores[idx])) for idx in order])
+        return results
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[List[ScoredHit]]:
+        if len(query_vectors) == 0:
+            return []
+        if not len(self):
+            return [[] for _ in query_vectors]
+        queries = _normalize(np.asarray(query_vectors, dtype=np.float32).reshape(len(query_vectors), -1))
+        mask = self._lang_mask(lang)
+        if self._ann is not None:
+            hits = self._ann_top_k(queries, top_k, mask)
+        else:
+            hits = self._scan_top_k(queries, top_k, mask)
+        return [[ScoredHit(self.chunk_ids[idx], score) for idx, score in row] for row in hits]
+
+    def search(self, query_vector: Sequence[float], top_k: int = 32, lang: str = "en") -> List[ScoredHit]:
+        return self.search_batch([query_vector], top_k=top_k, lang=lang)[0]
+
+    async def asearch(
+        self,
+        query_vector: Sequence[float],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[ScoredHit]:
+        return await run_blocking(self.search, query_vector, top_k, lang)
+
+    async def asearch_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[List[ScoredHit]]:
+        return await run_blocking(self.search_batch, query_vectors, top_k, lang)
@@ -0,0 +1,65 @@
+"""Bounded cache of cross-encoder scores for (question, chunk) pairs."""
+
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence, Tuple
+
+from app.utils import metrics
+from app.utils.hashing import question_key
+from app.utils.index_version import current_index_version
+
+cache_requests = metrics.counter(
+    "rerank_cache_requests_total",
+    "Rerank score cache lookups by result.",
+    labelnames=("result",),
+)
+
+
+class RerankScoreCache:
+    """LRU of rerank scores keyed by (question hash, chunk_id, index version).
+
+    When the index version changes every entry is dropped, so a re-ingest
+    that rewrites a chunk under the same id never serves a stale score.
+    """
+
+    def __init__(self, model_name: str, max_entries: int = 20_000) -> None:
+        self.model_name = model_name
+        self.max_entries = max_entries
+        self._scores: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _sync_version(self) -> None:
+        version = current_index_version()
+        if version != self._version:
+            self._scores.clear()
+            self._version = version
+
+    def get_many(self, question: str, chunk_ids: Sequence[str]) -> List[Optional[float]]:
+        qkey = question_key(question, self.model_name)
+        results: List[Optional[float]] = []
+        with self._lock:
+            self._sync_version()
+            for chunk_id in chunk_ids:
+                key = (qkey, chunk_id)
+                score = self._scores.get(key)
+                if score is not None:
+                    self._scores.move_to_end(key)
+                results.append(score)
+        hits = sum(score is not None for score in results)
+        cache_requests.inc(hits, result="hit")
+        cache_requests.inc(len(results) - hits, result="miss")
+        return results
+
+    def put_many(self, question: str, chunk_ids: Sequence[str], scores: Sequence[float]) -> None:
+        qkey = question_key(question, self.model_name)
+        with self._lock:
+            self._sync_version()
+            for chunk_id, score in zip(chunk_ids, scores):
+                key = (qkey, chunk_id)
+                self._scores[key] = float(score)
+                self._scores.move_to_end(key)
+            while len(self._scores) > self.max_entries:
+                self._scores.popitem(last=False)
@@ -2,27 +2,194 @@
 
 from __future__ import annotations
 
-from typing import List
-
-from FlagEmbedding import FlagReranker
+import asyncio
+from typing import List, NamedTuple, Optional, Sequence, Tuple
 
+from app.config import settings
 from app.models.retrieval import RetrievedChunk
+from app.retrieval.rerank_cache import RerankScoreCache
+from app.utils.batching import MicroBatcher
+from app.utils.concurrency import run_blocking
+from app.utils.tracing import stage
 
 MODEL_NAME = "BAAI/bge-reranker-v2-m3"
 
 
+class Pair(NamedTuple):
+    """A (query, passage) pair and its approximate length for bucketing."""
+
+    query: str
+    passage: str
+    tokens: int
+
+
+def build_pairs(query: str, candidates: Sequence[RetrievedChunk], indices: Sequence[int]) -> List[Pair]:
+    """Pair ``query`` with the candidates at ``indices``.
+
+    Lengths come from the ``token_count`` stored at ingestion plus one
+    whitespace count of the query, so nothing is tokenized on the hot path;
+    they only need to order pairs, not match the reranker's tokenizer.
+    """
+    query_tokens = len(query.split())
+    pairs: List[Pair] = []
+    for idx in indices:
+        chunk = candidates[idx]
+        chunk_tokens = chunk.token_count if chunk.token_count is not None else len(chunk.text.split())
+        pairs.append(Pair(query, chunk.text, query_tokens + chunk_tokens))
+    return pairs
+
+
 class Reranker:
     """Applies cross-encoder reranking to retrieved candidates."""
 
     def __init__(self, model_name: str = MODEL_NAME):
+        from FlagEmbedding import FlagReranker
+
         self.model = FlagReranker(model_name, use_fp16=False, devices="cpu")
+        self.cache: RerankScoreCache | None = None
+        if settings.rerank_cache_size > 0:
+            self.cache = RerankScoreCache(model_name, max_entries=settings.rerank_cache_size)
+        self.scheduler: MicroBatcher[Pair, float] | None = None
+        if settings.rerank_batch_window_ms > 0:
+            self.scheduler = MicroBatcher(
+                self._score_pairs,
+                name="rerank",
+                window_ms=settings.rerank_batch_window_ms,
+                max_batch_size=settings.rerank_batch_max_pairs,
+            )
 
-    def rerank(self, query: str, candidates: List[RetrievedChunk], top_k: int = 10) -> List[RetrievedChunk]:
-        if not candidates:
-            return []
-        sentence_pairs = [(query, chunk.text) for chunk in candidates]
-        scores = self.model.compute_score(sentence_pairs)
+    def _score_pairs(self, pairs: List[Pair]) -> List[float]:
+        """Score pairs in token-length-sorted sub-batches to minimise padding."""
+        batch_size = max(settings.rerank_batch_size, 1)
+        order = sorted(range(len(pairs)), key=lambda idx: pairs[idx].tokens)
+        scores = [0.0] * len(pairs)
+        for start in range(0, len(order), batch_size):
+            batch_idx = order[start : start + batch_size]
+            batch_scores = self.model.compute_score(
+                [(pairs[idx].query, pairs[idx].passage) for idx in batch_idx], batch_size=batch_size
+            )
+            if not isinstance(batch_scores, list):
+                batch_scores = [batch_scores]
+            for idx, score in zip(batch_idx, batch_scores):
+                scores[idx] = float(score)
+        return scores
+
+    @staticmethod
+    def _apply_scores(
+        candidates: List[RetrievedChunk],
+        scores: Sequence[float],
+        top_k: int,
+    ) -> List[RetrievedChunk]:
         for chunk, score in zip(candidates, scores):
             chunk.rerank_score = float(score)
         reranked = sorted(candidates, key=lambda chunk: chunk.rerank_score or 0.0, reverse=True)
         return reranked[:top_k]
+
+    def _lookup_cached(
+        self,
+        query: str,
+        candidates: List[RetrievedChunk],
+    ) -> Tuple[List[Optional[float]], List[int]]:
+        if self.cache is None:
+            return [None] * len(candidates), list(range(len(candidates)))
+        cached = self.cache.get_many(query, [chunk.chunk_id for chunk in candidates])
+        missing = [idx for idx, score in enumerate(cached) if score is None]
+        return cached, missing
+
+    def _merge_scores(
+        self,
+        query: str,
+        candidates: List[RetrievedChunk],
+        cached: List[Optional[float]],
+        missing: List[int],
+        computed: Sequence[float],
+    ) -> List[float]:
+        if self.cache is not None and missing:
+            self.cache.put_many(query, [candidates[idx].chunk_id for idx in missing], computed)
+        scores = list(cached)
+        for idx, score in zip(missing, computed):
+            scores[idx] = score
+        return scores
+
+    def rerank(self, query: str, candidates: List[RetrievedChunk], top_k: int = 10) -> List[RetrievedChunk]:
+        if not candidates:
+            return []
+        cached, missing = self._lookup_cached(query, candidates)
+        computed: List[float] = []
+        if missing:
+            sentence_pairs = build_pairs(query, candidates, missing)
+            with stage("rerank"):
+                if self.scheduler is not None:
+                    computed = self.scheduler.run(sentence_pairs)
+                else:
+                    computed = self._score_pairs(sentence_pairs)
+        scores = self._merge_scores(query, candidates, cached, missing, computed)
+        return self._apply_scores(candidates, scores, top_k)
+
+    async def arerank(
+        self,
+        query: str,
+        candidates: List[RetrievedChunk],
+        top_k: int = 10,
+    ) -> List[RetrievedChunk]:
+        """Rerank without blocking the event loop.
+
+        With the scheduler enabled the pairs join the shared batch queue and
+        the coroutine simply awaits its slice of the scores; otherwise the
+        scoring runs on the bounded CPU executor.
+        """
+        if not candidates:
+            return []
+        if self.scheduler is None:
+            return await run_blocking(self.rerank, query, candidates, top_k)
+        cached, missing = self._lookup_cached(query, candidates)
+        computed: List[float] = []
+        if missing:
+            sentence_pairs = build_pairs(query, candidates, missing)
+            with stage("rerank"):
+                computed = await asyncio.wrap_future(self.scheduler.submit(sentence_pairs))
+        scores = self._merge_scores(query, candidates, cached, missing, computed)
+        return self._apply_scores(candidates, scores, top_k)
+
+    def rerank_batch(
+        self,
+        queries: Sequence[str],
+        candidate_lists: Sequence[List[RetrievedChunk]],
+        top_k: int = 10,
+    ) -> List[List[RetrievedChunk]]:
+        """Rerank several questions with one length-sorted scoring pass.
+
+        Cache misses from every question are pooled and scored together,
+        bypassing the request scheduler since the batch is already large.
+        """
+        lookups = [
+            self._lookup_cached(query, candidates)
+            for query, candidates in zip(queries, candidate_lists)
+        ]
+        pairs: List[Pair] = []
+        for query, candidates, (_cached, missing) in zip(queries, candidate_lists, lookups):
+            pairs.extend(build_pairs(query, candidates, missing))
+        computed: List[float] = []
+        if pairs:
+            with stage("rerank"):
+                computed = self._score_pairs(pairs)
+
+        results: List[List[RetrievedChunk]] = []
+        offset = 0
+        for query, candidates, (cached, missing) in zip(queries, candidate_lists, lookups):
+            if not candidates:
+                results.append([])
+                continue
+            own = computed[offset : offset + len(missing)]
+            offset += len(missing)
+            scores = self._merge_scores(query, candidates, cached, missing, own)
+            results.append(self._apply_scores(candidates, scores, top_k))
+        return results
+
+    async def arerank_batch(
+        self,
+        queries: Sequence[str],
+        candidate_lists: Sequence[List[RetrievedChunk]],
+        top_k: int = 10,
+    ) -> List[List[RetrievedChunk]]:
+        return await run_blocking(self.rerank_batch, queries, candidate_lists, top_k)
@@ -2,13 +2,16 @@
 
 from __future__ import annotations
 
-from typing import Iterable, List, Sequence
+from typing import Iterable, List, Sequence, Union
 
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.http import models as qmodels
 
 from app.config import settings
-from app.models.retrieval import RetrievedChunk
+from app.models.retrieval import ScoredHit
+
+# Points carry only ``chunk_id`` and ``lang``; full chunks come from the chunk store.
+PAYLOAD_FIELDS = ["chunk_id"]
 
 
 class VectorStore:
@@ -20,20 +23,39 @@ class VectorStore:
         api_key: str | None = None,
         collection: str | None = None,
     ) -> None:
-        self.client = QdrantClient(url=url or settings.qdrant_url, api_key=api_key or settings.qdrant_api_key)
+        url = url or settings.qdrant_url
+        api_key = api_key or settings.qdrant_api_key
+        self.client = QdrantClient(url=url, api_key=api_key)
+        self.async_client = AsyncQdrantClient(url=url, api_key=api_key)
         self.collection = collection or settings.qdrant_collection
 
-    def search(self, query_vector: Sequence[float], top_k: int = 32, lang: str = "en") -> List[RetrievedChunk]:
-        filters = None
-        if lang:
-            filters = qmodels.Filter(
-                must=[
-                    qmodels.FieldCondition(
-                        key="lang",
-                        match=qmodels.MatchValue(value=lang),
-                    )
-                ]
+    @staticmethod
+    def _lang_filter(lang: str) -> qmodels.Filter | None:
+        if not lang:
+            return None
+        return qmodels.Filter(
+            must=[
+                qmodels.FieldCondition(
+                    key="lang",
+                    match=qmodels.MatchValue(value=lang),
+                )
+            ]
+        )
+
+    @staticmethod
+    def _search_params() -> qmodels.SearchParams | None:
+        """Oversample and rescore with the original vectors when the collection is quantized."""
+        if settings.vector_quantization.lower() in ("", "none"):
+            return None
+        return qmodels.SearchParams(
+            quantization=qmodels.QuantizationSearchParams(
+                rescore=settings.quantization_rescore,
+                oversampling=settings.quantization_oversampling,
             )
+        )
+
+    def search(self, query_vector: Sequence[float], top_k: int = 32, lang: str = "en") -> List[ScoredHit]:
+        filters = self._lang_filter(lang)
         results = None
         search_fn = getattr(self.client, "search", None)
         if search_fn is not None:
@@ -41,9 +63,10 @@ class VectorStore:
                 collection_name=self.collection,
                 query_vector=query_vector,
                 limit=top_k,
-                with_payload=True,
+                with_payload=PAYLOAD_FIELDS,
                 score_threshold=None,
                 query_filter=filters,
+                search_params=self._search_params(),
             )
         else:
             search_points_fn = getattr(self.client, "search_points", None)
@@ -52,9 +75,10 @@ class VectorStore:
                     collection_name=self.collection,
                     query_vector=query_vector,
                     limit=top_k,
-                    with_payload=True,
+                    with_payload=PAYLOAD_FIELDS,
                     score_threshold=None,
                     query_filter=filters,
+                    search_params=self._search_params(),
                 )
             else:
                 http_search = getattr(getattr(self.client, "http", None), "search_api", None)
@@ -65,31 +89,93 @@ class VectorStore:
                             vector=query_vector,
                             filter=filters,
                             limit=top_k,
-                            with_payload=True,
+                            with_payload=PAYLOAD_FIELDS,
+                            params=self._search_params(),
                         ),
                     )
                     results = response.result or []
                 else:
                     raise AttributeError("Qdrant client does not support search/search_points.")
-        retrieved: List[RetrievedChunk] = []
+        return self._to_hits(results)
+
+    async def asearch(
+        self,
+        query_vector: Sequence[float],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[ScoredHit]:
+        """Search through the async Qdrant client without blocking the event loop."""
+        response = await self.async_client.query_points(
+            collection_name=self.collection,
+            query=list(query_vector),
+            limit=top_k,
+            with_payload=PAYLOAD_FIELDS,
+            query_filter=self._lang_filter(lang),
+            search_params=self._search_params(),
+        )
+        return self._to_hits(response.points)
+
+    def _batch_requests(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int,
+        lang: str,
+    ) -> List[qmodels.QueryRequest]:
+        filters = self._lang_filter(lang)
+        params = self._search_params()
+        return [
+            qmodels.QueryRequest(
+                query=list(vector), filter=filters, params=params, limit=top_k, with_payload=PAYLOAD_FIELDS
+            )
+            for vector in query_vectors
+        ]
+
+    def search_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[List[ScoredHit]]:
+        """Run one Qdrant batch query for many vectors."""
+        if not query_vectors:
+            return []
+        responses = self.client.query_batch_points(
+            collection_name=self.collection,
+            requests=self._batch_requests(query_vectors, top_k, lang),
+        )
+        return [self._to_hits(response.points) for response in responses]
+
+    async def asearch_batch(
+        self,
+        query_vectors: Sequence[Sequence[float]],
+        top_k: int = 32,
+        lang: str = "en",
+    ) -> List[List[ScoredHit]]:
+        if not query_vectors:
+            return []
+        responses = await self.async_client.query_batch_points(
+            collection_name=self.collection,
+            requests=self._batch_requests(query_vectors, top_k, lang),
+        )
+        return [self._to_hits(response.points) for response in responses]
+
+    @staticmethod
+    def _to_hits(results: Iterable) -> List[ScoredHit]:
+        hits: List[ScoredHit] = []
         for point in results:
             payload = point.payload or {}
-            retrieved.append(
-                RetrievedChunk(
-                    chunk_id=payload.get("chunk_id") or str(point.id),
-                    guideline_id=payload.get("guideline_id"),
-                    guideline_title=payload.get("guideline_title"),
-                    section_id=payload.get("section_id"),
-                    section_title=payload.get("section_title"),
-                    organization=payload.get("organization"),
-                    year=payload.get("year"),
-                    text=payload.get("text", ""),
-                    lang=payload.get("lang", lang),
-                    page_range=tuple(payload.get("page_range", [])) if payload.get("page_range") else None,
-                    rec_class_list=payload.get("rec_class_list", []),
-                    loe_list=payload.get("loe_list", []),
-                    metadata=payload.get("metadata", {}),
-                    dense_score=float(point.score) if point.score is not None else None,
-                )
-            )
-        return retrieved
+            score = float(point.score) if point.score is not None else 0.0
+            hits.append(ScoredHit(payload.get("chunk_id") or str(point.id), score))
+        return hits
+
+
+def create_vector_store() -> Union[VectorStore, "LocalVectorStore"]:
+    """Return the dense backend selected by ``settings.vector_backend``."""
+    backend = settings.vector_backend.lower()
+    if backend == "local":
+        from app.retrieval.local_vector_store import LocalVectorStore
+
+        return LocalVectorStore()
+    if backend != "qdrant":
+        raise ValueError(f"Unknown vector backend {settings.vector_backend!r}; expected 'qdrant' or 'local'.")
+    return VectorStore()
@@ -0,0 +1,154 @@
+"""Dynamic micro-batching of model calls across concurrent requests."""
+
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Generic, List, Optional, Sequence, TypeVar
+
+from app.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+class _Job(Generic[T, R]):
+    __slots__ = ("items", "future", "enqueued_at")
+
+    def __init__(self, items: List[T]) -> None:
+        self.items = items
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher(Generic[T, R]):
+    """Collects items from concurrent callers and processes them in one call.
+
+    Each :meth:`submit` call enqueues a job (a list of items). A single worker
+    thread waits for the first job, keeps gathering jobs until either
+    ``window_ms`` has elapsed or ``max_batch_size`` items are pending, then
+    calls ``process`` once on the concatenated items and fans the results back
+    to each job's future in submission order.
+    """
+
+    def __init__(
+        self,
+        process: Callable[[List[T]], Sequence[R]],
+        name: str,
+        window_ms: float,
+        max_batch_size: int,
+    ) -> None:
+        self.process = process
+        self.name = name
+        self.window = max(window_ms, 0.0) / 1000.0
+        self.max_batch_size = max(max_batch_size, 1)
+        self._queue: "queue.Queue[_Job[T, R]]" = queue.Queue()
+        self._carry: Optional[_Job[T, R]] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pending_items = 0
+
+        self.queue_depth = metrics.gauge(
+            f"{name}_queue_depth", f"Items waiting in the {name} batcher queue."
+        )
+        self.batch_size = metrics.histogram(
+            f"{name}_batch_size",
+            f"Number of items processed per {name} batch.",
+            buckets=BATCH_SIZE_BUCKETS,
+        )
+        self.wait_seconds = metrics.histogram(
+            f"{name}_wait_seconds", f"Time items spent queued before a {name} batch started."
+        )
+        self.process_seconds = metrics.histogram(
+            f"{name}_process_seconds", f"Wall time of one {name} batch call."
+        )
+
+    def _ensure_worker(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._worker, name=f"{self.name}-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, items: Sequence[T]) -> Future:
+        """Enqueue ``items`` and return a future resolving to their results."""
+        job: _Job[T, R] = _Job(list(items))
+        if not job.items:
+            job.future.set_result([])
+            return job.future
+        self._ensure_worker()
+        with self._lock:
+            self._pending_items += len(job.items)
+            self.queue_depth.set(self._pending_items)
+        self._queue.put(job)
+        return job.future
+
+    def run(self, items: Sequence[T]) -> List[R]:
+        """Blocking helper around :meth:`submit`."""
+        return self.submit(items).result()
+
+    def _next_job(self, timeout: Optional[float]) -> Optional[_Job[T, R]]:
+        if self._carry is not None:
+            job, self._carry = self._carry, None
+            return job
+        try:
+            if timeout is None:
+                return self._queue.get()
+            if timeout <= 0:
+                return self._queue.get_nowait()
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def _collect(self) -> List[_Job[T, R]]:
+        first = self._next_job(timeout=None)
+        jobs = [first]
+        size = len(first.items)
+        deadline = time.perf_counter() + self.window
+        while size < self.max_batch_size:
+            job = self._next_job(timeout=deadline - time.perf_counter())
+            if job is None:
+                break
+            if size + len(job.items) > self.max_batch_size:
+                self._carry = job
+                break
+            jobs.append(job)
+            size += len(job.items)
+        return jobs
+
+    def _worker(self) -> None:
+        while True:
+            jobs = self._collect()
+            items = [item for job in jobs for item in job.items]
+            started = time.perf_counter()
+            with self._lock:
+                self._pending_items -= len(items)
+                self.queue_depth.set(self._pending_items)
+            for job in jobs:
+                self.wait_seconds.observe(started - job.enqueued_at)
+            self.batch_size.observe(len(items))
+            try:
+                results = list(self.process(items))
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"{self.name} batch returned {len(results)} results for {len(items)} items"
+                    )
+            except BaseException as exc:  # pragma: no cover - propagated to callers
+                logger.error("%s batch of %s items failed: %s", self.name, len(items), exc)
+                for job in jobs:
+                    job.future.set_exception(exc)
+                continue
+            finally:
+                self.process_seconds.observe(time.perf_counter() - started)
+            offset = 0
+            for job in jobs:
+                job.future.set_result(results[offset : offset + len(job.items)])
+                offset += len(job.items)
@@ -0,0 +1,44 @@
+"""Bounded executor used to keep CPU-bound model work off the event loop."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_lock = threading.Lock()
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Return the shared pool for embedding/reranking work.
+
+    The pool size caps how many model forward passes run at once per process;
+    extra calls queue instead of oversubscribing the CPU.
+    """
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.cpu_executor_workers,
+                thread_name_prefix="cpu-bound",
+            )
+        return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run ``func`` on the bounded CPU executor and await its result.
+
+    The caller's context is copied into the worker so request-scoped
+    context variables (stage timings, trace spans) follow the call.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_cpu_executor(), call)
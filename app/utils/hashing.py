@@ -0,0 +1,24 @@
+"""Stable hashing helpers used for cache keys and change detection."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+
+
+def normalize_question(text: str) -> str:
+    """Case-fold and collapse whitespace so trivially different questions share keys."""
+    normalized = unicodedata.normalize("NFKC", text).casefold()
+    return WHITESPACE_PATTERN.sub(" ", normalized).strip()
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def question_key(question: str, namespace: str) -> str:
+    """Hash of the normalized question scoped by ``namespace`` (e.g. a model name)."""
+    return text_hash(f"{namespace}\x00{normalize_question(question)}")
@@ -0,0 +1,82 @@
+"""Track a version stamp for the on-disk indexes so caches can invalidate."""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from app.config import settings
+from app.utils.hashing import text_hash
+
+logger = logging.getLogger(__name__)
+
+UNVERSIONED = "unversioned"
+
+_cache_lock = threading.Lock()
+_cached: Optional[Tuple[Tuple[int, int], str]] = None
+
+
+def _version_path() -> Path:
+    return Path(settings.index_version_path)
+
+
+def read_index_stamps() -> Dict[str, str]:
+    path = _version_path()
+    if not path.exists():
+        return {}
+    with path.open("r", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def new_version_stamp() -> str:
+    """A sortable, unique stamp such as ``20240101T120000123456-1a2b3c4d``."""
+    return f"{datetime.now():%Y%m%dT%H%M%S%f}-{uuid.uuid4().hex[:8]}"
+
+
+def bump_index_version(*components: str) -> str:
+    """Record that ``components`` (e.g. ``bm25`` or ``vectors``) were rebuilt.
+
+    Components bumped together land in one write, so the index watcher
+    reloads them in the same snapshot swap.
+    """
+    path = _version_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stamps = read_index_stamps()
+    stamp = new_version_stamp()
+    for component in components:
+        stamps[component] = stamp
+    tmp_path = path.with_suffix(path.suffix + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as handle:
+        json.dump(stamps, handle, sort_keys=True)
+    os.replace(tmp_path, path)
+    logger.info("Index version for %s bumped to %s", ", ".join(components), stamp)
+    return stamp
+
+
+def current_index_version() -> str:
+    """Return a short hash of all index stamps, cached on the file's mtime."""
+    global _cached
+    path = _version_path()
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return UNVERSIONED
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _cache_lock:
+        if _cached is not None and _cached[0] == signature:
+            return _cached[1]
+    try:
+        stamps = read_index_stamps()
+    except (OSError, ValueError) as exc:
+        logger.warning("Unable to read index version file %s: %s", path, exc)
+        return UNVERSIONED
+    version = text_hash(json.dumps(stamps, sort_keys=True))[:16]
+    with _cache_lock:
+        _cached = (signature, version)
+    return version
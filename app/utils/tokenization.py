@@ -4,12 +4,14 @@ from __future__ import annotations
 
 import logging
 import sys
-from typing import Optional
-
-import tiktoken
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
 
 from app.config import settings
 
+if TYPE_CHECKING:
+    import tiktoken
+
 logger = logging.getLogger(__name__)
 
 
@@ -42,9 +44,11 @@ def _should_fallback(context: str, reason: Exception) -> bool:
     )
 
 
-def get_cl100k_encoding(context: str) -> Optional[tiktoken.Encoding]:
+def get_cl100k_encoding(context: str) -> Optional["tiktoken.Encoding"]:
     """Try to load the OpenAI tokenizer with an optional operator-approved fallback."""
     try:
+        import tiktoken
+
         return tiktoken.get_encoding("cl100k_base")
     except Exception as exc:
         if _should_fallback(context, exc):
@@ -52,8 +56,18 @@ def get_cl100k_encoding(context: str) -> Optional[tiktoken.Encoding]:
         raise
 
 
-def count_tokens(text: str, encoding: Optional[tiktoken.Encoding]) -> int:
-    """Count tokens using tiktoken if available, otherwise whitespace approximation."""
+def tokenizer_name(encoding: Optional["tiktoken.Encoding"]) -> str:
+    """Name recorded in ingestion signatures so a tokenizer change invalidates stored counts."""
+    return encoding.name if encoding else "whitespace"
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text: str, encoding: Optional["tiktoken.Encoding"]) -> int:
+    """Count tokens using tiktoken if available, otherwise whitespace approximation.
+
+    Memoized: ingestion stores counts on paragraphs and chunks, and repeated
+    texts elsewhere are encoded only once.
+    """
     if encoding:
         return len(encoding.encode(text))
     return len(text.split())
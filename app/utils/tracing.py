@@ -0,0 +1,82 @@
+"""Per-request stage timing: Prometheus histograms, optional OpenTelemetry spans, response timings."""
+
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Dict, Iterator, Optional
+
+from app.config import settings
+from app.utils.metrics import DEFAULT_BUCKETS, histogram
+
+logger = logging.getLogger(__name__)
+
+stage_seconds = histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each pipeline stage.",
+    ["stage"],
+    buckets=DEFAULT_BUCKETS + (30.0, 60.0),
+)
+
+# Timings of the current request; executor hops must copy the context to keep it.
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_timings", default=None)
+
+
+class StageTimer:
+    """Handle yielded by :func:`stage`; ``elapsed_ms`` is set when the block exits."""
+
+    __slots__ = ("name", "elapsed_ms")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.elapsed_ms = 0.0
+
+
+@lru_cache(maxsize=1)
+def _tracer():
+    if not settings.otel_tracing:
+        return None
+    try:
+        from opentelemetry import trace
+    except ImportError:
+        logger.warning("OTEL_TRACING is set but opentelemetry-api is not installed; spans are disabled.")
+        return None
+    return trace.get_tracer("app")
+
+
+@contextmanager
+def stage(name: str) -> Iterator[StageTimer]:
+    """Time a pipeline stage.
+
+    The duration goes to the ``rag_stage_duration_seconds`` histogram, to an
+    OpenTelemetry span when ``otel_tracing`` is on, and into the timings of
+    the enclosing :func:`collect_timings` block (summed if a stage repeats).
+    """
+    timer = StageTimer(name)
+    tracer = _tracer()
+    with tracer.start_as_current_span(name) if tracer is not None else nullcontext():
+        start = time.perf_counter()
+        try:
+            yield timer
+        finally:
+            elapsed = time.perf_counter() - start
+            timer.elapsed_ms = round(elapsed * 1000.0, 3)
+            stage_seconds.observe(elapsed, stage=name)
+            timings = _request_timings.get()
+            if timings is not None:
+                key = f"{name}_ms"
+                timings[key] = round(timings.get(key, 0.0) + timer.elapsed_ms, 3)
+
+
+@contextmanager
+def collect_timings() -> Iterator[Dict[str, float]]:
+    """Gather ``<stage>_ms`` for every :func:`stage` run in this context (and copies of it)."""
+    timings: Dict[str, float] = {}
+    token = _request_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _request_timings.reset(token)
@@ -0,0 +1,6 @@
+"""Shared pytest setup: keep tests offline and away from the real data directory."""
+
+import os
+
+# tiktoken downloads its encoding on first use; count whitespace tokens instead.
+os.environ.setdefault("ALLOW_TIKTOKEN_FALLBACK", "1")
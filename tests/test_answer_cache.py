@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.llm import answer_cache
+from app.llm.answer_cache import AnswerCache, answer_cache_key
+from app.models.retrieval import EvidenceBlock
+
+
+def block(**overrides) -> EvidenceBlock:
+    fields = dict(
+        id="Doc 1",
+        doc_id="esc-hf",
+        guideline_id="esc-hf",
+        guideline_title="Heart failure",
+        year=2021,
+        section_title="Beta blockers",
+        page_range=(10, 11),
+        text="Beta blockers are recommended.",
+        rec_class_list=["Class I"],
+        loe_list=["Level A"],
+    )
+    fields.update(overrides)
+    return EvidenceBlock(**fields)
+
+
+@pytest.fixture
+def index_version(monkeypatch):
+    version = {"value": "v1"}
+    monkeypatch.setattr(answer_cache, "current_index_version", lambda: version["value"])
+    return version
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"value": 0.0}
+    monkeypatch.setattr(answer_cache, "time", SimpleNamespace(monotonic=lambda: now["value"]))
+    return now
+
+
+def test_key_ignores_question_formatting_but_not_model():
+    key = answer_cache_key("Beta blockers in HFrEF?", [block()], "gpt-4.1-mini")
+
+    assert answer_cache_key("  beta blockers in hfref?", [block()], "gpt-4.1-mini") == key
+    assert answer_cache_key("Beta blockers in HFrEF?", [block()], "gpt-4.1") != key
+
+
+@pytest.mark.parametrize(
+    "change",
+    [{"text": "Beta blockers are not recommended."}, {"year": 2016}, {"loe_list": ["Level B"]}, {"page_range": (12, 13)}],
+)
+def test_key_changes_with_any_rendered_evidence_field(change):
+    question = "Beta blockers in HFrEF?"
+
+    assert answer_cache_key(question, [block(**change)], "m") != answer_cache_key(question, [block()], "m")
+
+
+def test_entries_expire_after_ttl(index_version, clock):
+    cache = AnswerCache(ttl_seconds=60, max_bytes=1024)
+    cache.put("key", "answer")
+    clock["value"] = 59.0
+    assert cache.get("key") == "answer"
+    clock["value"] = 61.0
+    assert cache.get("key") is None
+
+
+def test_oldest_entries_are_evicted_over_the_byte_budget(index_version, clock):
+    cache = AnswerCache(ttl_seconds=60, max_bytes=25)
+    cache.put("k1", "a" * 8)
+    cache.put("k2", "b" * 8)
+    cache.get("k1")
+    cache.put("k3", "c" * 8)
+
+    assert [cache.get(key) for key in ("k1", "k2", "k3")] == ["a" * 8, None, "c" * 8]
+    cache.put("too-big", "x" * 64)
+    assert cache.get("too-big") is None
+
+
+def test_index_version_change_drops_every_answer(index_version, clock):
+    cache = AnswerCache(ttl_seconds=60, max_bytes=1024)
+    cache.put("key", "answer")
+    index_version["value"] = "v2"
+
+    assert cache.get("key") is None
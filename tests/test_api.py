@@ -0,0 +1,58 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import main
+from app.api.components import ComponentRegistry
+from app.retrieval.errors import RetrievalUnavailable
+
+
+class FailingRetriever:
+    async def aretrieve(self, question, **kwargs):
+        raise RetrievalUnavailable("All retrieval legs failed: sparse: timeout; dense: timeout")
+
+    async def aretrieve_batch(self, questions, **kwargs):
+        raise RetrievalUnavailable("All retrieval legs failed: sparse: timeout; dense: timeout")
+
+
+class PassThroughReranker:
+    async def arerank(self, question, candidates, top_k=10):
+        return candidates[:top_k]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # A registry loaded synchronously with stand-ins; the lifespan (and real models) never run.
+    registry = ComponentRegistry()
+    registry.register("retriever", FailingRetriever)
+    registry.register("reranker", PassThroughReranker)
+    registry.register("answer_generator", object)
+    registry.load_all()
+    monkeypatch.setattr(main, "components", registry)
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("path", ["/ask", "/ask/stream", "/retrieve"])
+def test_all_retrieval_legs_failing_returns_503(client, path):
+    response = client.post(path, json={"question": "Beta blockers in HFrEF?"})
+
+    assert response.status_code == 503
+    assert response.json() == {"detail": "Service unavailable: no retrieval backend answered"}
+
+
+def test_batch_reports_unavailable_retrieval_per_question(client):
+    response = client.post("/ask/batch", json={"questions": ["q1", "q2"]})
+
+    assert response.status_code == 200
+    lines = sorted(response.text.splitlines())
+    assert len(lines) == 2 and all('"error":"Retrieval failed."' in line for line in lines)
+
+
+def test_components_still_loading_return_503(monkeypatch):
+    registry = ComponentRegistry()
+    registry.register("retriever", FailingRetriever)
+    monkeypatch.setattr(main, "components", registry)
+
+    response = TestClient(main.app).post("/retrieve", json={"question": "q"})
+
+    assert response.status_code == 503
+    assert response.json()["detail"] == "Service unavailable: retriever is still pending"
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from app.utils.batching import MicroBatcher
+
+
+class RecordingProcess:
+    """Doubles each item and records the batches it was called with."""
+
+    def __init__(self, gate: threading.Event | None = None) -> None:
+        self.calls = []
+        self.gate = gate
+
+    def __call__(self, items):
+        if self.gate is not None:
+            self.gate.wait(timeout=5)
+        self.calls.append(list(items))
+        return [item * 2 for item in items]
+
+
+def test_concurrent_submits_are_flushed_as_one_batch():
+    process = RecordingProcess()
+    batcher = MicroBatcher(process, name="test_flush", window_ms=200, max_batch_size=64)
+
+    futures = [batcher.submit([1, 2]), batcher.submit([3]), batcher.submit([4, 5, 6])]
+
+    assert [future.result(timeout=5) for future in futures] == [[2, 4], [6], [8, 10, 12]]
+    assert process.calls == [[1, 2, 3, 4, 5, 6]]
+
+
+def test_batch_flushes_at_max_size_and_carries_the_overflowing_job():
+    gate = threading.Event()
+    process = RecordingProcess(gate)
+    batcher = MicroBatcher(process, name="test_carry", window_ms=200, max_batch_size=3)
+
+    # The first job occupies the worker until the gate opens, so the rest queue up.
+    first = batcher.submit([0])
+    futures = [batcher.submit([1, 2]), batcher.submit([3, 4]), batcher.submit([5])]
+    gate.set()
+
+    assert first.result(timeout=5) == [0]
+    assert [future.result(timeout=5) for future in futures] == [[2, 4], [6, 8], [10]]
+    assert all(len(call) <= 3 for call in process.calls)
+    assert [item for call in process.calls for item in call] == [0, 1, 2, 3, 4, 5]
+
+
+def test_empty_submit_resolves_without_a_batch():
+    process = RecordingProcess()
+    batcher = MicroBatcher(process, name="test_empty", window_ms=0, max_batch_size=8)
+
+    assert batcher.submit([]).result(timeout=1) == []
+    assert process.calls == []
+
+
+def test_process_error_reaches_every_caller_in_the_batch_and_worker_survives():
+    failures = iter([ValueError("model exploded")])
+
+    def process(items):
+        error = next(failures, None)
+        if error is not None:
+            raise error
+        return [item + 1 for item in items]
+
+    batcher = MicroBatcher(process, name="test_error", window_ms=200, max_batch_size=64)
+    futures = [batcher.submit(["a"]), batcher.submit(["b"])]
+
+    for future in futures:
+        with pytest.raises(ValueError, match="model exploded"):
+            future.result(timeout=5)
+    assert batcher.run([1, 2]) == [2, 3]
+
+
+def test_result_count_mismatch_is_reported_to_callers():
+    batcher = MicroBatcher(lambda items: items[:-1], name="test_mismatch", window_ms=0, max_batch_size=8)
+
+    with pytest.raises(RuntimeError, match="returned 1 results for 2 items"):
+        batcher.run([1, 2])
@@ -0,0 +1,71 @@
+import itertools
+from types import SimpleNamespace
+
+import pytest
+
+from app.retrieval import embedding_cache
+from app.retrieval.embedding_cache import QueryEmbeddingCache, QueryEncoding
+
+
+def encoding(value: float) -> QueryEncoding:
+    return QueryEncoding([value, value + 0.5])
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Strictly increasing ``last_access`` stamps so disk eviction order is deterministic."""
+    ticks = itertools.count(1)
+    monkeypatch.setattr(embedding_cache, "time", SimpleNamespace(time=lambda: float(next(ticks))))
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = QueryEmbeddingCache("bge-m3", max_entries=2)
+    cache.put_memory(["q1", "q2"], [encoding(1), encoding(2)])
+    cache.get_memory(["q1"])
+    cache.put_memory(["q3"], [encoding(3)])
+
+    assert cache.get_memory(["q1", "q2", "q3"]) == [encoding(1), None, encoding(3)]
+
+
+def test_keys_use_normalized_question_and_model():
+    cache = QueryEmbeddingCache("bge-m3")
+    cache.put_memory(["Statin  therapy?"], [encoding(1)])
+
+    assert cache.get_memory(["statin therapy?"]) == [encoding(1)]
+    assert QueryEmbeddingCache("other-model").get_memory(["statin therapy?"]) == [None]
+
+
+def test_disk_tier_survives_restart_and_promotes_hits(tmp_path):
+    path = tmp_path / "queries.sqlite"
+    lexical = QueryEncoding([0.25, -1.0], {"statin": 0.7})
+    QueryEmbeddingCache("bge-m3", disk_path=path).put_many(["q1", "q2"], [encoding(1), lexical])
+
+    reopened = QueryEmbeddingCache("bge-m3", disk_path=path)
+    assert reopened.get_memory(["q2"]) == [None]
+    assert reopened.get_many(["q2", "missing", "q1"]) == [lexical, None, encoding(1)]
+    assert reopened.get_memory(["q2"]) == [lexical]
+
+
+def test_disk_tier_trims_least_recently_accessed_rows(tmp_path, clock):
+    cache = QueryEmbeddingCache("bge-m3", disk_path=tmp_path / "queries.sqlite", disk_max_entries=10)
+    for idx in range(10):
+        cache.put_disk([f"q{idx}"], [encoding(idx)])
+    cache.get_disk(["q0"])
+    cache.put_disk(["q10"], [encoding(10)])
+
+    survivors = [question for question, found in zip(
+        [f"q{idx}" for idx in range(11)],
+        cache.get_disk([f"q{idx}" for idx in range(11)]),
+    ) if found is not None]
+    # Over the limit, the tier is trimmed to 90% by last access; q0 was read recently.
+    assert len(survivors) == 9
+    assert "q0" in survivors and "q10" in survivors
+    assert not {"q1", "q2"} & set(survivors)
+
+
+def test_replacing_rows_does_not_trigger_eviction(tmp_path):
+    cache = QueryEmbeddingCache("bge-m3", disk_path=tmp_path / "queries.sqlite", disk_max_entries=3)
+    cache.put_disk(["q1", "q2", "q3"], [encoding(1), encoding(2), encoding(3)])
+    cache.put_disk(["q1"], [encoding(4)])
+
+    assert cache.get_disk(["q1", "q2", "q3"]) == [encoding(4), encoding(2), encoding(3)]
@@ -0,0 +1,92 @@
+from app.models.retrieval import RetrievedChunk
+from app.retrieval.evidence import build_evidence_blocks
+
+
+def chunk(chunk_id, section_id, paragraphs, score, tokens=None, guideline_id="g1", **fields):
+    """A retrieved chunk carrying the paragraph metadata chunking records."""
+    orders = [order for order, _text in paragraphs]
+    return RetrievedChunk(
+        chunk_id=chunk_id,
+        guideline_id=guideline_id,
+        guideline_title="Guideline",
+        section_id=section_id,
+        text="\n\n".join(text for _order, text in paragraphs),
+        rerank_score=score,
+        metadata={
+            "paragraph_ids": orders,
+            "paragraph_tokens": tokens if tokens is not None else [10] * len(orders),
+        },
+        **fields,
+    )
+
+
+def test_overlapping_chunks_merge_without_repeated_paragraphs():
+    chunks = [
+        chunk("c2", "s1", [(2, "p2"), (3, "p3")], 0.9, page_range=(4, 5), loe_list=["Level B"]),
+        chunk("c1", "s1", [(1, "p1"), (2, "p2")], 0.5, page_range=(3, 4), loe_list=["Level A"]),
+    ]
+
+    [block] = build_evidence_blocks(chunks, max_blocks=5, max_tokens=1000)
+
+    assert block.text == "p1\n\np2\n\np3"
+    assert block.page_range == (3, 5)
+    assert block.loe_list == ["Level A", "Level B"]
+
+
+def test_budget_counts_deduplicated_paragraph_tokens():
+    chunks = [
+        chunk("c1", "s1", [(1, "p1"), (2, "p2")], 0.9, tokens=[40, 40]),
+        chunk("c2", "s1", [(2, "p2"), (3, "p3")], 0.8, tokens=[40, 40]),
+        chunk("c3", "s2", [(1, "q1")], 0.7, tokens=[80]),
+    ]
+
+    # s1 costs 120 tokens once p2 is counted once, leaving exactly 80 for s2.
+    blocks = build_evidence_blocks(chunks, max_blocks=5, max_tokens=200)
+
+    assert [block.section_id for block in blocks] == ["s1", "s2"]
+
+
+def test_blocks_are_packed_by_score_and_oversized_ones_skipped():
+    chunks = [
+        chunk("low", "s1", [(1, "small low")], 0.1, tokens=[20]),
+        chunk("big", "s2", [(1, "big")], 0.8, tokens=[500]),
+        chunk("top", "s3", [(1, "top")], 0.9, tokens=[60]),
+        chunk("mid", "s4", [(1, "mid")], 0.5, tokens=[30]),
+    ]
+
+    blocks = build_evidence_blocks(chunks, max_blocks=5, max_tokens=100)
+
+    assert [block.section_id for block in blocks] == ["s3", "s4"]
+    assert [block.id for block in blocks] == ["Doc 1", "Doc 2"]
+
+
+def test_top_block_is_kept_even_over_budget():
+    chunks = [chunk("huge", "s1", [(1, "huge")], 0.9, tokens=[5000]), chunk("next", "s2", [(1, "next")], 0.5)]
+
+    blocks = build_evidence_blocks(chunks, max_blocks=5, max_tokens=100)
+
+    assert [block.section_id for block in blocks] == ["s1"]
+
+
+def test_max_blocks_caps_selection():
+    chunks = [chunk(f"c{idx}", f"s{idx}", [(1, f"p{idx}")], 1.0 - idx / 10) for idx in range(5)]
+
+    blocks = build_evidence_blocks(chunks, max_blocks=2, max_tokens=1000)
+
+    assert [block.section_id for block in blocks] == ["s0", "s1"]
+
+
+def test_chunks_without_paragraph_metadata_fall_back_to_chunk_tokens():
+    legacy = RetrievedChunk(
+        chunk_id="legacy", guideline_id="g1", guideline_title="Guideline", section_id="s1",
+        text="one two three", token_count=90, fused_score=0.9,
+    )
+    counted = RetrievedChunk(
+        chunk_id="counted", guideline_id="g1", guideline_title="Guideline", section_id="s2",
+        text="four five", fused_score=0.8,
+    )
+
+    # 90 stored tokens leave 10; the unrecorded chunk is counted (2 whitespace tokens) and fits.
+    blocks = build_evidence_blocks([legacy, counted], max_blocks=5, max_tokens=100)
+
+    assert [block.text for block in blocks] == ["one two three", "four five"]
@@ -0,0 +1,140 @@
+import asyncio
+import json
+
+import pytest
+
+from app.ingestion.chunking import write_chunk_store
+from app.models.chunk import Chunk
+from app.models.retrieval import ScoredHit
+from app.retrieval import hybrid_retriever
+from app.retrieval.chunk_store import ChunkStore
+from app.retrieval.embedding_cache import QueryEncoding
+from app.retrieval.errors import RetrievalUnavailable
+from app.retrieval.hybrid_retriever import HybridRetriever
+
+RRF_K = 50
+
+
+class FakeLeg:
+    """Stands in for BM25Store, a vector store or LexicalIndex with fixed hits or a fixed error."""
+
+    def __init__(self, hits=(), error=None):
+        self.hits = [ScoredHit(chunk_id, score) for chunk_id, score in hits]
+        self.error = error
+
+    def __len__(self):
+        return len(self.hits)
+
+    def __bool__(self):
+        # An opened store, even one with no hits for this query.
+        return True
+
+    def search(self, query, top_k=32, lang="en"):
+        if self.error is not None:
+            raise self.error
+        return self.hits[:top_k]
+
+    async def asearch(self, query, top_k=32, lang="en"):
+        return self.search(query, top_k)
+
+
+@pytest.fixture
+def chunk_store(tmp_path):
+    path = tmp_path / "chunks.sqlite"
+    chunks = [Chunk(chunk_id=chunk_id, guideline_id="g", guideline_title="G", text=chunk_id) for chunk_id in "abcd"]
+    write_chunk_store(path, (json.dumps(chunk.model_dump()) for chunk in chunks))
+    return ChunkStore(path)
+
+
+@pytest.fixture(autouse=True)
+def encoder(monkeypatch):
+    encoding = QueryEncoding([1.0, 0.0], {"statin": 0.5})
+
+    async def aencode_queries(questions):
+        return [encoding for _ in questions]
+
+    monkeypatch.setattr(hybrid_retriever, "encode_queries", lambda questions: [encoding for _ in questions])
+    monkeypatch.setattr(hybrid_retriever, "aencode_queries", aencode_queries)
+
+
+def make_retriever(chunk_store, sparse, dense, lexical=None, parallel=True):
+    return HybridRetriever(
+        bm25_store=sparse,
+        vector_store=dense,
+        lexical_index=lexical,
+        chunk_store=chunk_store,
+        parallel=parallel,
+        rrf_k=RRF_K,
+    )
+
+
+def test_rrf_rewards_agreement_across_legs(chunk_store):
+    retriever = make_retriever(chunk_store, FakeLeg(), FakeLeg())
+
+    fused = retriever._rrf_merge(
+        [ScoredHit("a", 9.0), ScoredHit("b", 8.0)],
+        [ScoredHit("b", 0.9), ScoredHit("c", 0.8)],
+    )
+
+    assert fused["b"] == {
+        "fused_score": pytest.approx(1 / (RRF_K + 2) + 1 / (RRF_K + 1)),
+        "sparse_score": 8.0,
+        "dense_score": 0.9,
+    }
+    assert fused["a"] == {"fused_score": pytest.approx(1 / (RRF_K + 1)), "sparse_score": 9.0}
+    assert max(fused, key=lambda chunk_id: fused[chunk_id]["fused_score"]) == "b"
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_failed_dense_leg_falls_back_to_sparse_ranking(chunk_store, parallel):
+    sparse = FakeLeg([("a", 3.0), ("b", 2.0)])
+    retriever = make_retriever(chunk_store, sparse, FakeLeg(error=ConnectionError("qdrant down")), parallel=parallel)
+
+    results = retriever.retrieve("statins", top_k_final=5)
+
+    assert [chunk.chunk_id for chunk in results] == ["a", "b"]
+    assert [chunk.dense_score for chunk in results] == [None, None]
+    assert results[0].fused_score == pytest.approx(1 / (RRF_K + 1))
+    assert results[0].metadata["retrieval_timings"]["dense_failed"] == 1.0
+
+
+def test_async_failed_sparse_leg_keeps_dense_and_lexical(chunk_store):
+    retriever = make_retriever(
+        chunk_store,
+        FakeLeg(error=RuntimeError("tantivy error")),
+        FakeLeg([("c", 0.9), ("a", 0.5)]),
+        lexical=FakeLeg([("a", 0.4), ("d", 0.3)]),
+    )
+
+    results = asyncio.run(retriever.aretrieve("statins", top_k_final=5))
+
+    assert [chunk.chunk_id for chunk in results] == ["a", "c", "d"]
+    assert results[0].sparse_score is None
+    assert results[0].lexical_score == 0.4
+    assert results[0].metadata["retrieval_timings"]["sparse_failed"] == 1.0
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_lexical_leg_survives_dense_failure(chunk_store, parallel):
+    retriever = make_retriever(
+        chunk_store,
+        FakeLeg(),
+        FakeLeg(error=ConnectionError("qdrant down")),
+        lexical=FakeLeg([("d", 0.7)]),
+        parallel=parallel,
+    )
+
+    results = retriever.retrieve("statins", top_k_final=5)
+
+    assert [(chunk.chunk_id, chunk.lexical_score) for chunk in results] == [("d", 0.7)]
+
+
+def test_all_legs_failing_raises_retrieval_unavailable(chunk_store):
+    retriever = make_retriever(
+        chunk_store, FakeLeg(error=RuntimeError("sparse")), FakeLeg(error=RuntimeError("dense"))
+    )
+
+    with pytest.raises(RetrievalUnavailable, match="All retrieval legs failed"):
+        retriever.retrieve("statins")
+    with pytest.raises(RetrievalUnavailable, match="All retrieval legs failed"):
+        asyncio.run(retriever.aretrieve("statins"))
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from app.config import settings
+from app.ingestion.chunking import write_chunk_store
+from app.models.chunk import Chunk
+from app.retrieval.chunk_store import ChunkStore
+from app.retrieval.hybrid_retriever import HybridRetriever
+from app.retrieval.index_watcher import IndexWatcher
+from app.utils.index_version import bump_index_version
+
+
+class FakeStore:
+    """A BM25 or Qdrant stand-in; neither is reopened from disk in these tests."""
+
+    def __bool__(self):
+        return True
+
+
+@pytest.fixture(autouse=True)
+def version_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "index_version_path", str(tmp_path / "index_version.json"))
+
+
+@pytest.fixture
+def store_path(tmp_path):
+    path = tmp_path / "chunks.sqlite"
+    write_store(path, "old text")
+    return path
+
+
+def write_store(path, text):
+    chunk = Chunk(chunk_id="c1", guideline_id="g", guideline_title="G", text=text)
+    write_chunk_store(path, [json.dumps(chunk.model_dump())])
+
+
+def make_retriever(store_path):
+    return HybridRetriever(
+        bm25_store=FakeStore(), vector_store=FakeStore(), chunk_store=ChunkStore(store_path), parallel=False
+    )
+
+
+def test_unchanged_stamps_reload_nothing(store_path):
+    bump_index_version("chunks")
+    retriever = make_retriever(store_path)
+    watcher = IndexWatcher(retriever, interval=0)
+
+    assert watcher.check() == []
+    assert retriever.chunk_store.get_many(["c1"])["c1"].text == "old text"
+
+
+def test_failed_reload_keeps_its_stamp_and_is_retried(store_path):
+    bump_index_version("chunks")
+    retriever = make_retriever(store_path)
+    watcher = IndexWatcher(retriever, interval=0)
+
+    # The store is mid-write when the stamp changes, so reopening it raises once.
+    store_path.unlink()
+    bump_index_version("chunks")
+    assert watcher.check() == []
+    assert retriever.chunk_store.get_many(["c1"])["c1"].text == "old text"
+
+    write_store(store_path, "new text")
+    assert watcher.check() == ["chunks"]
+    assert retriever.chunk_store.get_many(["c1"])["c1"].text == "new text"
+    assert watcher.check() == []
+
+
+def test_components_without_a_reload_are_not_retried(store_path, monkeypatch):
+    retriever = make_retriever(store_path)
+    watcher = IndexWatcher(retriever, interval=0)
+    calls = []
+    reload = retriever.reload
+    monkeypatch.setattr(retriever, "reload", lambda components: calls.append(list(components)) or reload(components))
+
+    # A Qdrant-backed retriever swaps "vectors" server-side, so there is nothing to retry.
+    bump_index_version("vectors")
+    assert watcher.check() == []
+    assert watcher.check() == []
+    assert calls == [["vectors"]]
+
+
+
+def test_index_and_chunk_store_bumped_together_reload_in_one_call(store_path, monkeypatch):
+    retriever = make_retriever(store_path)
+    watcher = IndexWatcher(retriever, interval=0)
+    calls = []
+    reload = retriever.reload
+    monkeypatch.setattr(retriever, "reload", lambda components: calls.append(sorted(components)) or reload(components))
+
+    # An index step publishing a staged chunk store bumps both in one write.
+    bump_index_version("vectors", "chunks")
+    assert watcher.check() == ["chunks"]
+    assert calls == [["chunks", "vectors"]]
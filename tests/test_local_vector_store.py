@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+
+from app.config import settings
+from app.retrieval.local_vector_store import HNSW_FILE, LocalVectorStore, write_local_index
+
+
+def clustered_corpus(seed: int = 7, clusters: int = 100, per_cluster: int = 20, dim: int = 128):
+    """Embedding-like data: rows scattered around cluster centres, queries near the first 40 centres."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((clusters, dim))
+    corpus = np.repeat(centres, per_cluster, axis=0) + 0.6 * rng.standard_normal((clusters * per_cluster, dim))
+    queries = centres[:40] + 0.6 * rng.standard_normal((40, dim))
+    rows = [(f"c{idx}", "en" if idx % 4 else "de") for idx in range(len(corpus))]
+    return rows, corpus.astype(np.float32), queries.astype(np.float32)
+
+
+def brute_force(corpus: np.ndarray, query: np.ndarray, top_k: int):
+    normalized = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return [(f"c{idx}", float(scores[idx])) for idx in np.argsort(-scores, kind="stable")[:top_k]]
+
+
+def test_exact_search_matches_brute_force_cosine(tmp_path):
+    rows, corpus, queries = clustered_corpus()
+    write_local_index(tmp_path, rows, corpus)
+    store = LocalVectorStore(tmp_path)
+
+    for query, hits in zip(queries[:5], store.search_batch(queries[:5], top_k=10, lang="")):
+        expected = brute_force(corpus, query, 10)
+        assert [hit.chunk_id for hit in hits] == [chunk_id for chunk_id, _score in expected]
+        assert [hit.score for hit in hits] == pytest.approx([score for _chunk_id, score in expected], abs=1e-5)
+
+
+def test_lang_filter_only_returns_matching_rows(tmp_path):
+    rows, corpus, queries = clustered_corpus()
+    write_local_index(tmp_path, rows, corpus)
+    store = LocalVectorStore(tmp_path)
+    langs = dict(rows)
+
+    hits = store.search(queries[0], top_k=20, lang="de")
+    assert len(hits) == 20
+    assert {langs[hit.chunk_id] for hit in hits} == {"de"}
+
+
+def test_missing_index_searches_empty(tmp_path):
+    store = LocalVectorStore(tmp_path / "absent")
+
+    assert len(store) == 0
+    assert store.search_batch([[1.0, 0.0]], top_k=5) == [[]]
+
+
+def test_reload_picks_up_a_rewritten_index(tmp_path):
+    rows, corpus, queries = clustered_corpus()
+    write_local_index(tmp_path, rows[:10], corpus[:10])
+    store = LocalVectorStore(tmp_path)
+    assert len(store) == 10
+
+    write_local_index(tmp_path, rows, corpus)
+    store.load()
+    assert len(store) == len(rows)
+
+
+def test_small_indexes_get_no_hnsw_graph(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "local_index_ann_threshold", 1_000_000)
+    rows, corpus, _queries = clustered_corpus()
+    write_local_index(tmp_path, rows, corpus)
+
+    assert not (tmp_path / HNSW_FILE).exists()
+    assert LocalVectorStore(tmp_path)._ann is None
+
+
+def recall(expected, got) -> float:
+    return float(np.mean([
+        len({hit.chunk_id for hit in want} & {hit.chunk_id for hit in have}) / len(want)
+        for want, have in zip(expected, got)
+    ]))
+
+
+@pytest.fixture
+def indexes(tmp_path):
+    rows, corpus, queries = clustered_corpus()
+    for mode in ("none", "int8", "binary"):
+        write_local_index(tmp_path / mode, rows, corpus, quantization=mode)
+    return tmp_path, queries
+
+
+@pytest.mark.parametrize("mode", ["int8", "binary"])
+def test_rescored_quantized_search_keeps_recall(indexes, monkeypatch, mode):
+    monkeypatch.setattr(settings, "quantization_oversampling", 3.0)
+    monkeypatch.setattr(settings, "quantization_rescore", True)
+    directory, queries = indexes
+    exact = LocalVectorStore(directory / "none").search_batch(queries, top_k=10, lang="")
+    store = LocalVectorStore(directory / mode)
+    assert store.quantization == mode and store.codes is not None
+
+    hits = store.search_batch(queries, top_k=10, lang="")
+    assert recall(exact, hits) >= 0.95
+    # Rescoring against the float32 rows returns exact cosine scores.
+    exact_scores = {hit.chunk_id: hit.score for row in exact for hit in row}
+    for hit in (hit for row in hits for hit in row if hit.chunk_id in exact_scores):
+        assert hit.score == pytest.approx(exact_scores[hit.chunk_id], abs=1e-5)
+
+
+def test_binary_recall_depends_on_oversampled_rescoring(indexes, monkeypatch):
+    directory, queries = indexes
+    exact = LocalVectorStore(directory / "none").search_batch(queries, top_k=10, lang="")
+    store = LocalVectorStore(directory / "binary")
+
+    monkeypatch.setattr(settings, "quantization_oversampling", 3.0)
+    monkeypatch.setattr(settings, "quantization_rescore", False)
+    raw = recall(exact, store.search_batch(queries, top_k=10, lang=""))
+    monkeypatch.setattr(settings, "quantization_rescore", True)
+    rescored = recall(exact, store.search_batch(queries, top_k=10, lang=""))
+
+    assert rescored >= 0.95
+    assert rescored > raw
+
+
+def test_switching_back_to_float32_removes_quantized_files(indexes):
+    directory, _queries = indexes
+    rows, corpus, _ = clustered_corpus()
+    write_local_index(directory / "int8", rows, corpus, quantization="none")
+
+    store = LocalVectorStore(directory / "int8")
+    assert store.quantization == "none" and store.codes is None
+    assert not list((directory / "int8").glob("vectors.int8*"))
+
+
+def test_quantized_indexes_skip_the_hnsw_graph(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "local_index_ann_threshold", 1)
+    rows, corpus, queries = clustered_corpus()
+    write_local_index(tmp_path, rows, corpus, quantization="int8")
+
+    assert "skipping the HNSW graph" in caplog.text
+    assert not (tmp_path / HNSW_FILE).exists()
+    # Even a stray graph file is ignored: the quantized codes are what gets searched.
+    (tmp_path / HNSW_FILE).write_bytes(b"stale")
+    store = LocalVectorStore(tmp_path)
+    assert store._ann is None
+    assert len(store.search(queries[0], top_k=5, lang="")) == 5
@@ -0,0 +1,128 @@
+import json
+
+import pytest
+
+from app.config import settings
+from app.ingestion import chunking
+from app.ingestion.manifest import IngestionManifest, chunk_fingerprint, diff_items
+from app.models.chunk import Chunk
+from app.retrieval.chunk_store import ChunkStore, publish_chunk_store, staged_path
+from app.utils.index_version import read_index_stamps
+
+
+def test_diff_items_reports_added_changed_and_removed_keys():
+    previous = {"same": "h1", "changed": "h2", "removed": "h3"}
+    current = {"same": "h1", "changed": "h2b", "added": "h4"}
+
+    assert diff_items(previous, current) == (["changed", "added"], ["removed"])
+    assert diff_items(current, current) == ([], [])
+
+
+def test_chunk_fingerprint_covers_metadata_not_just_text():
+    chunk = Chunk(chunk_id="c1", guideline_id="g", guideline_title="G", text="same text", year=2020)
+
+    assert chunk_fingerprint(chunk) == chunk_fingerprint(chunk.model_copy())
+    assert chunk_fingerprint(chunk) != chunk_fingerprint(chunk.model_copy(update={"year": 2021}))
+
+
+def test_save_keeps_stages_written_by_other_steps(tmp_path):
+    path = tmp_path / "manifest.json"
+    first = IngestionManifest.load(path)
+    second = IngestionManifest.load(path)
+    first.record("bm25", "sig-bm25", {"c1": "h1"})
+    first.save(path)
+    second.record("vectors", "sig-vec", {"c1": "h1"})
+    second.save(path)
+
+    merged = IngestionManifest.load(path)
+    assert merged.stages["bm25"].signature == "sig-bm25"
+    assert merged.stages["vectors"].items == {"c1": "h1"}
+
+
+@pytest.fixture
+def ingest_paths(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "parsed_docs_path", str(tmp_path / "docs.jsonl"))
+    monkeypatch.setattr(settings, "chunks_path", str(tmp_path / "chunks.jsonl"))
+    monkeypatch.setattr(settings, "chunk_store_path", str(tmp_path / "chunks.sqlite"))
+    monkeypatch.setattr(settings, "manifest_path", str(tmp_path / "manifest.json"))
+    monkeypatch.setattr(settings, "index_version_path", str(tmp_path / "index_version.json"))
+    monkeypatch.setattr(settings, "ingest_incremental", True)
+    return tmp_path
+
+
+def write_parse_stage(paths, texts, signature="parse-test"):
+    """Write parsed paragraphs for each guideline and the parse stage that chunking reads."""
+    with (paths / "docs.jsonl").open("w", encoding="utf-8") as handle:
+        for guideline_id, paragraphs in texts.items():
+            for order, text in enumerate(paragraphs):
+                row = {"guideline_id": guideline_id, "guideline_title": guideline_id, "order": order, "text": text}
+                handle.write(json.dumps(row) + "\n")
+    manifest = IngestionManifest.load()
+    manifest.record("parse", signature, {guideline_id: "|".join(text) for guideline_id, text in texts.items()})
+    manifest.save()
+
+
+def chunk_rows():
+    with settings.chunks_path_obj.open("r", encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle]
+
+
+def mark_rows():
+    """Tag every stored chunk so a reused row can be told apart from a re-chunked one."""
+    rows = chunk_rows()
+    with settings.chunks_path_obj.open("w", encoding="utf-8") as handle:
+        for row in rows:
+            row["metadata"]["marker"] = True
+            handle.write(json.dumps(row) + "\n")
+
+
+def reused(guideline_id):
+    return [row["metadata"].get("marker", False) for row in chunk_rows() if row["guideline_id"] == guideline_id]
+
+
+def test_only_changed_guidelines_are_rechunked(ingest_paths):
+    write_parse_stage(ingest_paths, {"g1": ["alpha one", "alpha two"], "g2": ["beta one"]})
+    chunking.main()
+    mark_rows()
+
+    write_parse_stage(ingest_paths, {"g1": ["alpha one", "alpha two"], "g2": ["beta one", "beta two"]})
+    chunking.main()
+
+    assert reused("g1") == [True]
+    assert reused("g2") == [False]
+    assert "beta two" in chunk_rows()[-1]["text"]
+
+
+def test_parse_signature_change_rechunks_everything(ingest_paths):
+    texts = {"g1": ["alpha one"], "g2": ["beta one"]}
+    write_parse_stage(ingest_paths, texts)
+    chunking.main()
+    mark_rows()
+
+    write_parse_stage(ingest_paths, texts, signature="parse-test-v2")
+    chunking.main()
+
+    assert reused("g1") == reused("g2") == [False]
+
+
+def test_removed_guidelines_drop_out_of_the_chunk_store(ingest_paths):
+    write_parse_stage(ingest_paths, {"g1": ["alpha one"], "g2": ["beta one"]})
+    chunking.main()
+
+    write_parse_stage(ingest_paths, {"g1": ["alpha one"]})
+    chunking.main()
+
+    assert {row["guideline_id"] for row in chunk_rows()} == {"g1"}
+    assert IngestionManifest.load().stages["chunk"].items == {"g1": "alpha one"}
+
+
+def test_chunk_store_is_staged_until_an_index_step_publishes_it(ingest_paths):
+    write_parse_stage(ingest_paths, {"g1": ["alpha one"]})
+    chunking.main()
+
+    live = ingest_paths / "chunks.sqlite"
+    assert not live.exists() and staged_path().exists()
+    assert "chunks" not in read_index_stamps()
+    assert publish_chunk_store() == ["chunks"]
+    assert len(ChunkStore(live)) == 1 and not staged_path().exists()
+    assert publish_chunk_store() == []
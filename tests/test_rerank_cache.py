@@ -0,0 +1,40 @@
+import pytest
+
+from app.retrieval import rerank_cache
+from app.retrieval.rerank_cache import RerankScoreCache
+
+
+@pytest.fixture
+def index_version(monkeypatch):
+    """Mutable stand-in for the on-disk index version."""
+    version = {"value": "v1"}
+    monkeypatch.setattr(rerank_cache, "current_index_version", lambda: version["value"])
+    return version
+
+
+def test_scores_are_cached_per_question_and_chunk(index_version):
+    cache = RerankScoreCache("bge-reranker")
+    cache.put_many("Statin therapy?", ["c1", "c2"], [0.9, 0.1])
+
+    assert cache.get_many("statin  therapy?", ["c2", "c3", "c1"]) == [0.1, None, 0.9]
+    assert cache.get_many("aspirin", ["c1"]) == [None]
+    assert RerankScoreCache("other-reranker").get_many("Statin therapy?", ["c1"]) == [None]
+
+
+def test_least_recently_used_scores_are_evicted(index_version):
+    cache = RerankScoreCache("bge-reranker", max_entries=2)
+    cache.put_many("q", ["c1", "c2"], [1.0, 2.0])
+    cache.get_many("q", ["c1"])
+    cache.put_many("q", ["c3"], [3.0])
+
+    assert cache.get_many("q", ["c1", "c2", "c3"]) == [1.0, None, 3.0]
+
+
+def test_index_version_change_drops_every_score(index_version):
+    cache = RerankScoreCache("bge-reranker")
+    cache.put_many("q", ["c1"], [0.5])
+    index_version["value"] = "v2"
+
+    assert cache.get_many("q", ["c1"]) == [None]
+    cache.put_many("q", ["c1"], [0.7])
+    assert cache.get_many("q", ["c1"]) == [0.7]
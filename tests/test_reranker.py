@@ -0,0 +1,57 @@
+from app.config import settings
+from app.models.retrieval import RetrievedChunk
+from app.retrieval.reranker import Reranker, build_pairs
+
+
+class FakeModel:
+    """Scores a pair by passage length and records the sub-batches it was given."""
+
+    def __init__(self):
+        self.batches = []
+
+    def compute_score(self, pairs, batch_size):
+        self.batches.append([passage for _query, passage in pairs])
+        return [float(len(passage)) for _query, passage in pairs]
+
+
+def make_reranker():
+    # Skip __init__: it loads the FlagEmbedding model.
+    reranker = Reranker.__new__(Reranker)
+    reranker.model = FakeModel()
+    reranker.cache = None
+    reranker.scheduler = None
+    return reranker
+
+
+def chunk(chunk_id, text, token_count=None):
+    return RetrievedChunk(chunk_id=chunk_id, guideline_id="g", guideline_title="G", text=text, token_count=token_count)
+
+
+def test_pair_lengths_use_stored_token_counts():
+    candidates = [chunk("a", "short text", token_count=300), chunk("b", "four words of text")]
+
+    pairs = build_pairs("beta blockers dose", candidates, [0, 1])
+
+    assert [pair.tokens for pair in pairs] == [303, 7]
+    assert [(pair.query, pair.passage) for pair in pairs] == [
+        ("beta blockers dose", "short text"),
+        ("beta blockers dose", "four words of text"),
+    ]
+
+
+def test_pairs_are_scored_in_length_sorted_sub_batches(monkeypatch):
+    monkeypatch.setattr(settings, "rerank_batch_size", 2)
+    reranker = make_reranker()
+    candidates = [
+        chunk("long", "l" * 40, token_count=400),
+        chunk("short", "s" * 10, token_count=10),
+        chunk("mid", "m" * 20, token_count=200),
+        chunk("tiny", "t" * 5, token_count=5),
+    ]
+
+    ranked = reranker.rerank("q", candidates, top_k=4)
+
+    assert reranker.model.batches == [["t" * 5, "s" * 10], ["m" * 20, "l" * 40]]
+    assert [(item.chunk_id, item.rerank_score) for item in ranked] == [
+        ("long", 40.0), ("mid", 20.0), ("short", 10.0), ("tiny", 5.0),
+    ]